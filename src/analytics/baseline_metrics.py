@@ -1,4 +1,10 @@
-"""Compute baseline KPIs from aggregated run data."""
+"""Compute baseline KPIs from aggregated run data.
+
+With ``--bootstrap N`` the report also carries per-run reveal rates and
+trait shares and the entropy, each with an ``N``-resample bootstrap
+confidence interval.  Bootstrapping requires NumPy and the ``testing``
+package on the import path (``PYTHONPATH=src``).
+"""
 
 from __future__ import annotations
 
@@ -48,6 +54,63 @@ def compute_metrics(rows: Iterable[Dict[str, str]]) -> Dict[str, float]:
     return metrics
 
 
+def bootstrap_metrics(
+    rows: Iterable[Dict[str, str]],
+    resamples: int = 2000,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> Dict[str, float]:
+    """Return reveal, share and entropy estimates with bootstrap intervals.
+
+    Runs are the resampling unit.  ``reveal_<trait>`` is the fraction of
+    runs revealing the trait in their top three and ``share_<trait>`` the
+    mean final normalized share; each comes with ``_low`` and ``_high``
+    bounds.  ``entropy_low`` and ``entropy_high`` bound the entropy of
+    :func:`compute_metrics`, which weights every run by its number of
+    decisions.
+    """
+
+    import numpy as np
+    from testing.bootstrap import entropy, percentile_interval, resample_means
+
+    finals: Dict[str, Dict[str, float]] = {}
+    top3: Dict[str, List[str]] = {}
+    decisions: Counter[str] = Counter()
+    for row in rows:
+        run = row["run"]
+        decisions[run] += 1
+        if run not in finals:
+            finals[run] = json.loads(row["final_normalized"])
+            top3[run] = json.loads(row.get("top3") or "[]")
+    if not finals:
+        return {}
+
+    traits = sorted({t for final in finals.values() for t in final})
+    revealed = sorted({t for reveal in top3.values() for t in reveal})
+    runs = list(finals)
+    shares = np.array([[finals[run].get(t, 0.0) for t in traits] for run in runs]).reshape(len(runs), -1)
+    hits = np.array([[t in top3[run] for t in revealed] for run in runs], dtype=float).reshape(len(runs), -1)
+    weighted = shares * np.array([decisions[run] for run in runs], dtype=float)[:, None]
+
+    # One set of resamples for every statistic.
+    columns = np.hstack([shares, hits, weighted])
+    replicates = resample_means(columns, resamples, seed)
+    estimates = columns.mean(axis=0)
+
+    metrics: Dict[str, float] = {}
+    names = [f"share_{t}" for t in traits] + [f"reveal_{t}" for t in revealed]
+    for j, name in enumerate(names):
+        interval = percentile_interval(estimates[j], replicates[:, j], confidence)
+        metrics[name] = interval.estimate
+        metrics[f"{name}_low"] = interval.low
+        metrics[f"{name}_high"] = interval.high
+    if traits:
+        interval = percentile_interval(0.0, entropy(replicates[:, len(names) :]), confidence)
+        metrics["entropy_low"] = interval.low
+        metrics["entropy_high"] = interval.high
+    return metrics
+
+
 def generate_report(metrics: Dict[str, float], out: Path) -> None:
     out.parent.mkdir(parents=True, exist_ok=True)
     with out.open("w") as f:
@@ -59,11 +122,22 @@ def main(argv: List[str] | None = None) -> None:
     parser = argparse.ArgumentParser(description="Compute baseline metrics")
     parser.add_argument("--in", dest="csv_in", type=Path, required=True)
     parser.add_argument("--report", type=Path, required=True)
+    parser.add_argument(
+        "--bootstrap",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Add bootstrap confidence intervals from N resamples (requires NumPy)",
+    )
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the bootstrap resamples")
     args = parser.parse_args(argv)
 
     with args.csv_in.open() as f:
         rows = list(csv.DictReader(f))
     metrics = compute_metrics(rows)
+    if args.bootstrap > 0:
+        metrics.update(bootstrap_metrics(rows, args.bootstrap, args.confidence, args.seed))
     generate_report(metrics, args.report)
 
 
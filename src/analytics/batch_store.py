@@ -0,0 +1,541 @@
+"""Columnar batch files holding many run artifacts.
+
+One indented JSON file per run repeats every key, choice text and trait
+label at every step.  A batch file stores the runs of one batch together:
+per-run scalars (``runId``, ``normalized``, ``top3``, ...) stay in a small
+JSON header, repeated strings are kept once in tables, and the per-step
+data is stored as packed numeric columns.
+
+File layout (little endian)::
+
+    b"JRB1"                      magic
+    uint32                       length of the JSON header
+    header                       {"runs": [...], "traits": [...], "choices": [...],
+                                  "deltas": [...], "flags": [...], "hashes": [...],
+                                  "columns": [[name, typecode, length], ...]}
+    columns                      in header order
+
+with the columns
+
+``choice``
+    ``uint32`` per step, index into ``choices`` (scene, choice, text,
+    primary, pw, secondary, sw);
+``totals``
+    ``float64`` per step and trait, in ``traits`` order;
+``delta``
+    ``uint32`` per step, ``0`` for none or ``1 +`` index into ``deltas``
+    (a tuple of trait labels), with the values in ``deltaValues``;
+``flags`` / ``hash``
+    ``uint32`` per step, ``0`` for none or ``1 +`` table index.
+
+Optional columns are only written when a run uses them.  Three run layouts
+are understood and read back as the exact dictionaries that were written:
+``testrig`` artifacts (``decisions`` plus ``timeline``), runner step lists
+under ``trait_progression`` or ``trace`` such as the dashboard saves, and
+anything else, which is kept verbatim in the header.  Totals and deltas are
+read back as floats.
+
+Run ``python -m src.analytics.batch_store DIR`` to pack the ``run_*.json`` files
+of a results directory into batch files.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+from .run_log import open_log
+
+MAGIC = b"JRB1"
+
+# File name suffix of batch files.
+SUFFIX = ".jrb"
+
+# Artifact keys stored as columns rather than in the header.
+ARTIFACT_COLUMNS = ("timeline", "decisions", "sceneHashes")
+
+# Keys of one runner step dictionary, in the runner's order.
+STEP_KEYS = (
+    "run_id",
+    "step",
+    "scene_id",
+    "choice_id",
+    "text",
+    "primary",
+    "pw",
+    "secondary",
+    "sw",
+    "delta",
+    "totals",
+    "flags",
+    "end",
+)
+
+# Keys holding a runner step list.
+STEP_LISTS = ("trait_progression", "trace")
+
+_DECISION_KEYS = ("step", "sceneId", "choiceId", "text", "primary", "pw", "secondary", "sw")
+_CHOICE_FIELDS = ("scene_id", "choice_id", "text", "primary", "pw", "secondary", "sw")
+
+
+class _Table:
+    """Distinct values in first-seen order."""
+
+    def __init__(self) -> None:
+        self.values: List[Any] = []
+        self._index: Dict[Hashable, int] = {}
+
+    def code(self, value: Hashable) -> int:
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class _Unsupported(Exception):
+    """Raised when a run cannot be stored in columns."""
+
+
+class _Encoder:
+    def __init__(self) -> None:
+        self.runs: List[Dict[str, Any]] = []
+        self.traits = _Table()
+        self.choices = _Table()
+        self.deltas = _Table()
+        self.flags = _Table()
+        self.hashes = _Table()
+        self.choice = array("I")
+        # Totals are collected sparsely until the number of traits is known.
+        self.total_rows = array("I")
+        self.total_codes = array("I")
+        self.total_values = array("d")
+        self.delta = array("I")
+        self.delta_values = array("d")
+        self.flag = array("I")
+        self.hash = array("I")
+
+    # ------------------------------------------------------------------
+
+    def add(self, data: Mapping[str, Any]) -> None:
+        mark = len(self.choice), len(self.total_rows), len(self.delta_values)
+        try:
+            if "decisions" in data and "timeline" in data:
+                entry = self._artifact(data)
+            else:
+                entry = self._steps(data)
+        except (_Unsupported, AttributeError, KeyError, TypeError):
+            self._rollback(*mark)
+            entry = {"layout": "raw", "data": dict(data)}
+        self.runs.append(entry)
+
+    def _rollback(self, steps: int, totals: int, values: int) -> None:
+        for column in (self.choice, self.delta, self.flag, self.hash):
+            del column[steps:]
+        for column in (self.total_rows, self.total_codes, self.total_values):
+            del column[totals:]
+        del self.delta_values[values:]
+
+    def _row(self, totals: Mapping[str, float], known: List[str], intro: List[List[int]], step: int) -> None:
+        labels = list(totals)
+        if labels[: len(known)] != known:
+            raise _Unsupported("totals lose a trait")
+        for label in labels[len(known) :]:
+            intro.append([self.traits.code(label), step])
+            known.append(label)
+        row = len(self.choice) - 1
+        for label, value in totals.items():
+            if not isinstance(value, (int, float)):
+                raise _Unsupported("non-numeric total")
+            self.total_rows.append(row)
+            self.total_codes.append(self.traits.code(label))
+            self.total_values.append(value)
+
+    def _delta(self, delta: Mapping[str, float] | None) -> None:
+        if delta is None:
+            self.delta.append(0)
+            return
+        self.delta.append(1 + self.deltas.code(tuple(delta)))
+        for value in delta.values():
+            if not isinstance(value, (int, float)):
+                raise _Unsupported("non-numeric delta")
+            self.delta_values.append(float(value))
+
+    def _artifact(self, data: Mapping[str, Any]) -> Dict[str, Any]:
+        decisions, timeline = data["decisions"], data["timeline"]
+        hashes = data.get("sceneHashes")
+        if len(decisions) != len(timeline) or (hashes is not None and len(hashes) != len(decisions)):
+            raise _Unsupported("misaligned artifact")
+        with_delta = bool(decisions) and "delta" in decisions[0]
+        keys = set(_DECISION_KEYS) | ({"delta"} if with_delta else set())
+        known: List[str] = []
+        intro: List[List[int]] = []
+        for i, (decision, entry) in enumerate(zip(decisions, timeline)):
+            if set(decision) != keys or set(entry) != {"step", "totals"}:
+                raise _Unsupported("unexpected decision keys")
+            if decision["step"] != i + 1 or entry["step"] != i + 1:
+                raise _Unsupported("steps out of order")
+            self.choice.append(self.choices.code(tuple(decision[k] for k in _DECISION_KEYS[1:])))
+            self._row(entry["totals"], known, intro, i)
+            self._delta(decision["delta"] if with_delta else None)
+            self.flag.append(0)
+            self.hash.append(0 if hashes is None else 1 + self.hashes.code(hashes[i]))
+
+        meta = {k: v for k, v in data.items() if k not in ARTIFACT_COLUMNS}
+        return {
+            "layout": "artifact",
+            "meta": meta,
+            "steps": len(decisions),
+            "intro": intro,
+            "keys": list(data),
+            "delta": with_delta,
+            "hashes": hashes is not None,
+        }
+
+    def _steps(self, data: Mapping[str, Any]) -> Dict[str, Any]:
+        name = next((k for k in STEP_LISTS if k in data), None)
+        if name is None:
+            raise _Unsupported("no step data")
+        steps = data[name]
+        if not steps or steps[-1].get("end") is not True:
+            raise _Unsupported("step list without an end record")
+        records, end = steps[:-1], steps[-1]
+        run_id = records[0]["run_id"] if records else end.get("run_id")
+        known: List[str] = []
+        intro: List[List[int]] = []
+        for i, record in enumerate(records):
+            if tuple(record) != STEP_KEYS or record["end"] is not False:
+                raise _Unsupported("unexpected step keys")
+            if record["step"] != i + 1 or record["run_id"] != run_id:
+                raise _Unsupported("steps out of order")
+            if not isinstance(record["flags"], list) or not isinstance(record["delta"], dict):
+                raise _Unsupported("unexpected step values")
+            self.choice.append(self.choices.code(tuple(record[k] for k in _CHOICE_FIELDS)))
+            self._row(record["totals"], known, intro, i)
+            self._delta(record["delta"])
+            self.flag.append(1 + self.flags.code(tuple(record["flags"])))
+            self.hash.append(0)
+
+        meta = {k: v for k, v in data.items() if k != name}
+        return {
+            "layout": "steps",
+            "meta": meta,
+            "steps": len(records),
+            "intro": intro,
+            "keys": list(data),
+            "list": name,
+            "runId": run_id,
+            "end": end,
+        }
+
+    # ------------------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        width = len(self.traits.values)
+        totals = array("d", bytes(8 * width * len(self.choice)))
+        for row, code, value in zip(self.total_rows, self.total_codes, self.total_values):
+            totals[row * width + code] = value
+
+        columns = [("choice", self.choice), ("totals", totals)]
+        if any(self.delta):
+            columns += [("delta", self.delta), ("deltaValues", self.delta_values)]
+        if any(self.flag):
+            columns.append(("flags", self.flag))
+        if any(self.hash):
+            columns.append(("hash", self.hash))
+
+        header = json.dumps(
+            {
+                "runs": self.runs,
+                "traits": self.traits.values,
+                "choices": self.choices.values,
+                "deltas": self.deltas.values,
+                "flags": self.flags.values,
+                "hashes": self.hashes.values,
+                "columns": [[name, column.typecode, len(column)] for name, column in columns],
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+        parts = [MAGIC, struct.pack("<I", len(header)), header]
+        for _, column in columns:
+            if sys.byteorder == "big":
+                column = array(column.typecode, column)
+                column.byteswap()
+            parts.append(column.tobytes())
+        return b"".join(parts)
+
+
+def encode_runs(runs: Iterable[Mapping[str, Any]]) -> bytes:
+    """Return the batch file bytes of ``runs``."""
+
+    encoder = _Encoder()
+    for data in runs:
+        encoder.add(data)
+    return encoder.to_bytes()
+
+
+class RunBatch:
+    """Read access to the runs of one batch file.
+
+    Per-run scalars are available from the header alone through
+    :meth:`meta`; :meth:`run` rebuilds a full run dictionary from the
+    columns.
+    """
+
+    def __init__(self, header: Dict[str, Any], columns: Dict[str, array]) -> None:
+        self._runs: List[Dict[str, Any]] = header["runs"]
+        self._traits: List[str] = header["traits"]
+        self._choices: List[List[Any]] = header["choices"]
+        self._deltas: List[List[str]] = header["deltas"]
+        self._flags: List[List[str]] = header["flags"]
+        self._hashes: List[str] = header["hashes"]
+        self._columns = columns
+        # First step row and first delta value of every run.
+        self._offsets: List[Tuple[int, int]] = []
+        row = value = 0
+        deltas = columns.get("delta")
+        for entry in self._runs:
+            self._offsets.append((row, value))
+            steps = entry.get("steps", 0)
+            if deltas is not None:
+                for code in deltas[row : row + steps]:
+                    if code:
+                        value += len(self._deltas[code - 1])
+            row += steps
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "RunBatch":
+        if data[:4] != MAGIC:
+            raise ValueError("Not a run batch")
+        (size,) = struct.unpack_from("<I", data, 4)
+        header = json.loads(data[8 : 8 + size].decode("utf-8"))
+        columns: Dict[str, array] = {}
+        offset = 8 + size
+        for name, typecode, length in header["columns"]:
+            column = array(typecode)
+            end = offset + length * column.itemsize
+            if end > len(data):
+                raise ValueError("Truncated run batch")
+            column.frombytes(data[offset:end])
+            if sys.byteorder == "big":
+                column.byteswap()
+            columns[name] = column
+            offset = end
+        return cls(header, columns)
+
+    @classmethod
+    def load(cls, path: Path) -> "RunBatch":
+        return cls.from_bytes(path.read_bytes())
+
+    def __len__(self) -> int:
+        return len(self._runs)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self._runs)):
+            yield self.run(i)
+
+    def meta(self, i: int) -> Dict[str, Any]:
+        """Return the header fields of run ``i`` without its step data."""
+
+        entry = self._runs[i]
+        return entry["data"] if entry["layout"] == "raw" else entry["meta"]
+
+    def run(self, i: int) -> Dict[str, Any]:
+        """Return run ``i`` as it was written."""
+
+        entry = self._runs[i]
+        layout = entry["layout"]
+        if layout == "raw":
+            return json.loads(json.dumps(entry["data"]))
+        meta = json.loads(json.dumps(entry["meta"]))
+        steps = self._decode(i)
+        if layout == "artifact":
+            columns = {
+                "timeline": [{"step": s["step"], "totals": s["totals"]} for s in steps],
+                "decisions": [self._decision(s, entry["delta"]) for s in steps],
+            }
+            if entry["hashes"]:
+                columns["sceneHashes"] = [s["hash"] for s in steps]
+        else:
+            records = [
+                {
+                    "run_id": entry["runId"],
+                    "step": s["step"],
+                    **dict(zip(_CHOICE_FIELDS, s["choice"])),
+                    "delta": s["delta"],
+                    "totals": s["totals"],
+                    "flags": s["flags"],
+                    "end": False,
+                }
+                for s in steps
+            ]
+            records.append(json.loads(json.dumps(entry["end"])))
+            columns = {entry["list"]: records}
+        return {key: columns[key] if key in columns else meta[key] for key in entry["keys"]}
+
+    @staticmethod
+    def _decision(step: Mapping[str, Any], with_delta: bool) -> Dict[str, Any]:
+        decision = {"step": step["step"], **dict(zip(_DECISION_KEYS[1:], step["choice"]))}
+        if with_delta:
+            decision["delta"] = step["delta"]
+        return decision
+
+    def _decode(self, i: int) -> List[Dict[str, Any]]:
+        entry = self._runs[i]
+        start, value = self._offsets[i]
+        columns = self._columns
+        width = len(self._traits)
+        totals = columns["totals"]
+        known: List[Tuple[str, int]] = []
+        intro = iter(entry["intro"])
+        pending = next(intro, None)
+
+        steps = []
+        for n in range(entry["steps"]):
+            row = start + n
+            while pending is not None and pending[1] == n:
+                known.append((self._traits[pending[0]], pending[0]))
+                pending = next(intro, None)
+            base = row * width
+
+            delta = None
+            code = columns["delta"][row] if "delta" in columns else 0
+            if code:
+                labels = self._deltas[code - 1]
+                delta = dict(zip(labels, columns["deltaValues"][value : value + len(labels)]))
+                value += len(labels)
+            flags = columns["flags"][row] if "flags" in columns else 0
+            digest = columns["hash"][row] if "hash" in columns else 0
+            steps.append(
+                {
+                    "step": n + 1,
+                    "choice": self._choices[columns["choice"][row]],
+                    "totals": {label: totals[base + code] for label, code in known},
+                    "delta": delta,
+                    "flags": list(self._flags[flags - 1]) if flags else [],
+                    "hash": self._hashes[digest - 1] if digest else None,
+                }
+            )
+        return steps
+
+
+def save_runs(path: Path, runs: Iterable[Mapping[str, Any]]) -> None:
+    """Write ``runs`` to the batch file ``path``, replacing it atomically."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(encode_runs(runs))
+    tmp.replace(path)
+
+
+def load_runs(path: Path) -> List[Dict[str, Any]]:
+    """Return every run of the batch file ``path``."""
+
+    return list(RunBatch.load(path))
+
+
+def batch_files(results_dir: Path) -> List[Path]:
+    """Return the batch files of ``results_dir`` in name order."""
+
+    return sorted(results_dir.glob(f"*{SUFFIX}"))
+
+
+def iter_runs(results_dir: Path) -> Iterator[Tuple[Path, Dict[str, Any]]]:
+    """Yield ``(path, run)`` for every stored run of ``results_dir``.
+
+    ``run_*.json`` files come first in name order, followed by the runs of
+    every batch file and those of the run log, if there is one.
+    """
+
+    for path in sorted(results_dir.glob("run_*.json")):
+        with path.open("r", encoding="utf-8") as fh:
+            yield path, json.load(fh)
+    for path in batch_files(results_dir):
+        for data in RunBatch.load(path):
+            yield path, data
+    log = open_log(results_dir)
+    if log is not None:
+        for data in log:
+            yield log.directory, data
+
+
+def run_order(path: Path) -> Tuple[int, str]:
+    """Sort key placing ``run_<n>`` files by ``n``, ahead of other names."""
+
+    match = re.fullmatch(r"run_(\d+)", path.stem)
+    return (int(match.group(1)) if match else sys.maxsize, path.name)
+
+
+def convert(
+    results_dir: Path,
+    out_dir: Path | None = None,
+    batch_size: int = 1000,
+    remove: bool = False,
+) -> List[Path]:
+    """Pack the ``run_*.json`` files of ``results_dir`` into batch files.
+
+    Files are taken in run order, ``batch_size`` per batch, and written to
+    ``out_dir`` (default ``results_dir``) as ``runs_<first>-<last>.jrb``
+    named after the first and last file stem.  Every batch is read back and
+    compared with its source files before ``remove`` deletes them.
+
+    Raises
+    ------
+    ValueError
+        If a batch does not read back as its source files.
+    """
+
+    out_dir = out_dir or results_dir
+    paths = sorted(results_dir.glob("run_*.json"), key=run_order)
+    written: List[Path] = []
+    for start in range(0, len(paths), batch_size):
+        chunk = paths[start : start + batch_size]
+        runs = []
+        for path in chunk:
+            with path.open("r", encoding="utf-8") as fh:
+                runs.append(json.load(fh))
+        target = out_dir / f"runs_{chunk[0].stem[4:]}-{chunk[-1].stem[4:]}{SUFFIX}"
+        save_runs(target, runs)
+        if load_runs(target) != runs:
+            target.unlink()
+            raise ValueError(f"{target.name} does not read back as its source runs")
+        written.append(target)
+        if remove:
+            for path in chunk:
+                path.unlink()
+    return written
+
+
+__all__ = [
+    "RunBatch",
+    "encode_runs",
+    "save_runs",
+    "load_runs",
+    "batch_files",
+    "iter_runs",
+    "convert",
+    "run_order",
+    "SUFFIX",
+]
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Pack run_*.json files into batch files")
+    parser.add_argument("results_dir", type=Path)
+    parser.add_argument("--out", type=Path, help="Directory for the batch files")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--remove", action="store_true", help="Delete converted JSON files")
+    args = parser.parse_args(argv)
+
+    for path in convert(args.results_dir, args.out, args.batch_size, args.remove):
+        print(f"wrote {path}")
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry
+    main()
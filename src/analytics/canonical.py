@@ -4,7 +4,10 @@ from __future__ import annotations
 
 from typing import Dict
 
-# Mapping of known duplicate trait labels to their canonical form
+from modules.trait_registry import TRAIT_REGISTRY
+
+# Mapping of known duplicate trait labels to their canonical form.  Every
+# label resolves the same way through ``TRAIT_REGISTRY``.
 CANONICAL_MAP: Dict[str, str] = {
     "Control & Perfectionism": "Control",
     "Apathy & Sloth": "Apathy",
@@ -15,19 +18,7 @@ CANONICAL_MAP: Dict[str, str] = {
 }
 
 # Set of canonical trait names
-CANONICAL_TRAITS = set(CANONICAL_MAP.values()) | {
-    "Hubris",
-    "Avarice",
-    "Deception",
-    "Wrath",
-    "Impulsivity",
-    "Rigidity",
-    "Moodiness",
-    "Control",
-    "Fear",
-    "Apathy",
-    "Envy",
-}
+CANONICAL_TRAITS = set(TRAIT_REGISTRY.names)
 
 
 def canonicalize(trait: str) -> str:
@@ -39,11 +30,7 @@ def canonicalize(trait: str) -> str:
         If the trait is unknown and not already canonical.
     """
 
-    if trait in CANONICAL_MAP:
-        return CANONICAL_MAP[trait]
-    if trait in CANONICAL_TRAITS:
-        return trait
-    raise ValueError(f"Unknown trait: {trait}")
+    return TRAIT_REGISTRY.canonical(trait)
 
 
 def normalize_traits(mapping: Dict[str, float]) -> Dict[str, float]:
@@ -52,11 +39,18 @@ def normalize_traits(mapping: Dict[str, float]) -> Dict[str, float]:
     Duplicate entries are merged under the canonical label.
     """
 
+    names = TRAIT_REGISTRY.names
+    code = TRAIT_REGISTRY.code
     result: Dict[str, float] = {}
     for trait, value in mapping.items():
-        canon = canonicalize(trait)
+        canon = names[code(trait)]
         result[canon] = result.get(canon, 0.0) + value
     return result
 
 
-__all__ = ["canonicalize", "normalize_traits", "CANONICAL_MAP", "CANONICAL_TRAITS"]
+__all__ = [
+    "canonicalize",
+    "normalize_traits",
+    "CANONICAL_MAP",
+    "CANONICAL_TRAITS",
+]
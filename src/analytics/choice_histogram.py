@@ -0,0 +1,335 @@
+"""Scene x choice x policy selection counts.
+
+A :class:`ChoiceHistogram` counts how often every choice of every scene was
+taken, per policy.  Counts are collected while runs are simulated or
+ingested, merged across shards with :meth:`ChoiceHistogram.merge` and
+stored in a compact binary file, so questions like "how often does the
+random policy pick ``admit_fault``?" never need the per-run JSON files.
+
+File layout (little endian)::
+
+    b"JCH1"                      magic
+    uint32                       length of the JSON header
+    header                       {"policies": [...], "choices": [[scene, choice], ...],
+                                  "runs": [...]}
+    uint64[policies x choices]   counts, one row per policy
+
+Choices are keyed by ``(scene_id, choice_id)`` rather than by content
+index, so histograms stay comparable across content edits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Tuple
+
+from .batch_store import iter_runs
+
+MAGIC = b"JCH1"
+
+# Default histogram file name inside a results directory.
+HISTOGRAM_FILE = "choice_histogram.bin"
+
+Key = Tuple[str, str]
+
+
+class ChoiceHistogram:
+    """Mergeable selection counts per policy, scene and choice."""
+
+    def __init__(self) -> None:
+        self._choices: List[Key] = []
+        self._index: Dict[Key, int] = {}
+        self._counts: Dict[str, array] = {}
+        self._runs: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Collection
+
+    def _row(self, policy: str) -> array:
+        row = self._counts.get(policy)
+        if row is None:
+            row = self._counts[policy] = array("Q")
+            self._runs.setdefault(policy, 0)
+        missing = len(self._choices) - len(row)
+        if missing > 0:
+            row.extend(array("Q", bytes(8 * missing)))
+        return row
+
+    def _slot(self, scene_id: str, choice_id: str) -> int:
+        key = (scene_id, choice_id)
+        slot = self._index.get(key)
+        if slot is None:
+            slot = self._index[key] = len(self._choices)
+            self._choices.append(key)
+        return slot
+
+    def add(self, policy: str, scene_id: str, choice_id: str, count: int = 1) -> None:
+        """Add ``count`` selections; a negative ``count`` removes them.
+
+        Raises
+        ------
+        ValueError
+            If removing would make a count negative.
+        """
+
+        slot = self._slot(scene_id, choice_id)
+        row = self._row(policy)
+        value = row[slot] + count
+        if value < 0:
+            raise ValueError(f"Count of {policy}/{scene_id}/{choice_id} would become negative")
+        row[slot] = value
+
+    def add_trace(self, policy: str, trace: Any, sign: int = 1) -> None:
+        """Count the choices of one run.
+
+        ``trace`` is a columnar :class:`~testing.trace.Trace` or a list of
+        step dictionaries.  ``sign=-1`` removes a run counted before.
+        """
+
+        if hasattr(trace, "scene_indices"):
+            pairs: Iterable[Key] = (
+                (trace.scene(step).scene_id, trace.outcome(step).option.choice_id)
+                for step in range(trace.steps)
+            )
+        else:
+            pairs = ((s["scene_id"], s["choice_id"]) for s in trace if not s.get("end"))
+        self._add_run(policy, pairs, sign)
+
+    def add_artifact(self, data: Mapping[str, Any], sign: int = 1) -> None:
+        """Count the ``decisions`` of a ``testrig`` run artifact."""
+
+        pairs = ((d.get("sceneId"), d.get("choiceId")) for d in data.get("decisions", []))
+        self._add_run(data.get("policy", ""), pairs, sign)
+
+    def add_rows(self, rows: Iterable[Mapping[str, Any]]) -> None:
+        """Count ingested CSV rows, one per decision, with runs by ``run``."""
+
+        seen = set()
+        for row in rows:
+            policy = str(row["policy"])
+            run = (policy, row["run"])
+            if run not in seen:
+                seen.add(run)
+                self._row(policy)
+                self._runs[policy] += 1
+            self.add(policy, str(row["scene_id"]), str(row["choice_id"]))
+
+    def _add_run(self, policy: str, pairs: Iterable[Key], sign: int) -> None:
+        for scene_id, choice_id in pairs:
+            self.add(policy, scene_id, choice_id, sign)
+        self._row(policy)
+        runs = self._runs[policy] + sign
+        if runs < 0:
+            raise ValueError(f"Run count of {policy} would become negative")
+        self._runs[policy] = runs
+
+    def merge(self, other: "ChoiceHistogram") -> "ChoiceHistogram":
+        """Add the counts of ``other`` and return this histogram."""
+
+        slots = [self._slot(scene_id, choice_id) for scene_id, choice_id in other._choices]
+        for policy, counts in other._counts.items():
+            row = self._row(policy)
+            for slot, count in zip(slots, counts):
+                row[slot] += count
+            self._runs[policy] += other._runs.get(policy, 0)
+        return self
+
+    # ------------------------------------------------------------------
+    # Queries
+
+    @property
+    def policies(self) -> List[str]:
+        return list(self._counts)
+
+    def scenes(self) -> List[str]:
+        """Return every scene id seen, in first-seen order."""
+
+        return list(dict.fromkeys(scene_id for scene_id, _ in self._choices))
+
+    def runs(self, policy: str | None = None) -> int:
+        """Number of runs counted, for one policy or all of them."""
+
+        if policy is not None:
+            return self._runs.get(policy, 0)
+        return sum(self._runs.values())
+
+    def count(self, scene_id: str, choice_id: str, policy: str | None = None) -> int:
+        """Times ``choice_id`` was taken at ``scene_id``."""
+
+        slot = self._index.get((scene_id, choice_id))
+        if slot is None:
+            return 0
+        rows = self._rows(policy)
+        return sum(row[slot] for row in rows if slot < len(row))
+
+    def scene_counts(self, scene_id: str, policy: str | None = None) -> Dict[str, int]:
+        """Return ``choice_id -> count`` for one scene."""
+
+        rows = self._rows(policy)
+        return {
+            choice_id: sum(row[slot] for row in rows if slot < len(row))
+            for (scene, choice_id), slot in self._index.items()
+            if scene == scene_id
+        }
+
+    def shares(self, scene_id: str, policy: str | None = None) -> Dict[str, float]:
+        """Return ``choice_id -> fraction`` of the visits to one scene."""
+
+        counts = self.scene_counts(scene_id, policy)
+        total = sum(counts.values())
+        return {choice: (count / total if total else 0.0) for choice, count in counts.items()}
+
+    def items(self) -> Iterator[Tuple[str, str, str, int]]:
+        """Yield ``(policy, scene_id, choice_id, count)`` for non-zero counts."""
+
+        for policy, row in self._counts.items():
+            for (scene_id, choice_id), count in zip(self._choices, row):
+                if count:
+                    yield policy, scene_id, choice_id, count
+
+    def _rows(self, policy: str | None) -> List[array]:
+        if policy is None:
+            return list(self._counts.values())
+        row = self._counts.get(policy)
+        return [] if row is None else [row]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ChoiceHistogram):
+            return NotImplemented
+        return sorted(self.items()) == sorted(other.items()) and {
+            p: n for p, n in self._runs.items() if n
+        } == {p: n for p, n in other._runs.items() if n}
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return (
+            f"ChoiceHistogram(policies={len(self._counts)}, choices={len(self._choices)}, "
+            f"runs={self.runs()})"
+        )
+
+    # ------------------------------------------------------------------
+    # Persistence
+
+    def to_bytes(self) -> bytes:
+        policies = list(self._counts)
+        header = json.dumps(
+            {
+                "policies": policies,
+                "choices": [list(key) for key in self._choices],
+                "runs": [self._runs[p] for p in policies],
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+        body = array("Q")
+        for policy in policies:
+            body.extend(self._row(policy))
+        if sys.byteorder == "big":
+            body.byteswap()
+        return MAGIC + struct.pack("<I", len(header)) + header + body.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ChoiceHistogram":
+        if data[:4] != MAGIC:
+            raise ValueError("Not a choice histogram")
+        (size,) = struct.unpack_from("<I", data, 4)
+        header = json.loads(data[8 : 8 + size].decode("utf-8"))
+        body = array("Q")
+        body.frombytes(data[8 + size :])
+        if sys.byteorder == "big":
+            body.byteswap()
+
+        hist = cls()
+        hist._choices = [tuple(key) for key in header["choices"]]  # type: ignore[misc]
+        hist._index = {key: i for i, key in enumerate(hist._choices)}
+        width = len(hist._choices)
+        if len(body) != width * len(header["policies"]):
+            raise ValueError("Truncated choice histogram")
+        for i, (policy, runs) in enumerate(zip(header["policies"], header["runs"])):
+            hist._counts[policy] = body[i * width : (i + 1) * width]
+            hist._runs[policy] = runs
+        return hist
+
+    def save(self, path: Path) -> None:
+        """Write the histogram to ``path``, replacing it atomically."""
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(self.to_bytes())
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "ChoiceHistogram":
+        """Read a histogram file; a missing file gives an empty histogram."""
+
+        if not path.exists():
+            return cls()
+        return cls.from_bytes(path.read_bytes())
+
+
+def rebuild_histogram(results_dir: Path) -> ChoiceHistogram:
+    """Count every ``testrig`` artifact in ``results_dir`` and save the result.
+
+    Artifacts are read from ``run_*.json`` and batch files alike.
+    """
+
+    hist = ChoiceHistogram()
+    for _, data in iter_runs(results_dir):
+        if "decisions" in data and "trait_progression" not in data:
+            hist.add_artifact(data)
+    hist.save(results_dir / HISTOGRAM_FILE)
+    return hist
+
+
+def update_histogram(
+    results_dir: Path,
+    added: ChoiceHistogram,
+    removed: Iterable[Mapping[str, Any]] = (),
+) -> ChoiceHistogram:
+    """Merge the counts of newly written runs into a results directory.
+
+    ``removed`` are the previous artifacts of runs that were overwritten;
+    their old decisions are subtracted first so a re-written run is not
+    counted twice.  Without a histogram file yet, one is built from every
+    artifact in the directory, which already includes the new runs.
+    """
+
+    path = results_dir / HISTOGRAM_FILE
+    if not path.exists():
+        return rebuild_histogram(results_dir)
+    hist = ChoiceHistogram.load(path)
+    for data in removed:
+        hist.add_artifact(data, sign=-1)
+    hist.merge(added)
+    hist.save(path)
+    return hist
+
+
+__all__ = ["ChoiceHistogram", "rebuild_histogram", "update_histogram", "HISTOGRAM_FILE"]
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Query a choice histogram")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--policy")
+    parser.add_argument("--scene", action="append", help="Scene id to report (repeatable)")
+    args = parser.parse_args(argv)
+
+    hist = ChoiceHistogram.load(args.path)
+    print(f"runs: {hist.runs(args.policy)}")
+    for scene_id in args.scene or hist.scenes():
+        counts = hist.scene_counts(scene_id, args.policy)
+        total = sum(counts.values())
+        print(f"{scene_id} ({total})")
+        for choice_id, count in counts.items():
+            share = count / total if total else 0.0
+            print(f"  {choice_id}: {count} ({share:.1%})")
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry
+    main()
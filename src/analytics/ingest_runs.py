@@ -6,9 +6,12 @@ import argparse
 import csv
 import json
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Any, Dict, Iterable, List, Tuple
 
-from .canonical import canonicalize, normalize_traits
+from modules.trait_registry import TRAIT_REGISTRY
+
+from .batch_store import iter_runs
+from .choice_histogram import ChoiceHistogram
 
 COLUMNS = [
     "run",
@@ -27,9 +30,76 @@ COLUMNS = [
 ]
 
 
+class _TraitNames(Dict[str, str]):
+    """Canonical name per trait label, resolved once per run."""
+
+    def __missing__(self, label: str) -> str:
+        name = self[label] = TRAIT_REGISTRY.canonical(label)
+        return name
+
+
+def _encode(mapping: Dict[str, float], names: _TraitNames) -> str:
+    """JSON of ``mapping`` with aliases merged under their canonical name."""
+
+    merged: Dict[str, float] = {}
+    for label, value in mapping.items():
+        name = names[label]
+        merged[name] = merged.get(name, 0.0) + value
+    return json.dumps(merged, sort_keys=True)
+
+
+def _rows_from_artifact(path: Path, data: Dict) -> List[Dict[str, object]]:
+    """Rows for a ``testrig`` artifact (``decisions`` plus ``timeline``)."""
+
+    run = data.get("runId", path.stem)
+    names = _TraitNames()
+    final_normalized = _encode(data.get("normalized", {}), names)
+    top3 = json.dumps([names[t] for t in data.get("top3", [])])
+    totals = {entry.get("step"): entry.get("totals", {}) for entry in data.get("timeline", [])}
+
+    rows: List[Dict[str, object]] = []
+    for decision in data.get("decisions", []):
+        primary, secondary = decision.get("primary"), decision.get("secondary")
+        pw, sw = decision.get("pw", 0.0), decision.get("sw", 0.0)
+        # Calibrated runs store their applied weights; otherwise use the
+        # runner's rule that only positive weights are applied.
+        delta: Dict[str, float] = decision.get("delta") or {}
+        if "delta" not in decision:
+            if primary and pw > 0:
+                delta[primary] = pw
+            if secondary and sw > 0:
+                delta[secondary] = sw
+        rows.append(
+            {
+                "run": run,
+                "policy": data.get("policy", ""),
+                "step": decision.get("step"),
+                "scene_id": decision.get("sceneId"),
+                "choice_id": decision.get("choiceId"),
+                "primary": names[primary] if primary else "",
+                "secondary": names[secondary] if secondary else "",
+                "pw": pw,
+                "sw": sw,
+                "delta": _encode(delta, names),
+                "totals": _encode(totals.get(decision.get("step"), {}), names),
+                "final_normalized": final_normalized,
+                "top3": top3,
+            }
+        )
+    return rows
+
+
 def _rows_from_run(path: Path) -> Iterable[Dict[str, object]]:
     with path.open() as f:
         data = json.load(f)
+    return _rows_from_data(path, data)
+
+
+def _rows_from_data(path: Path, data: Dict) -> Iterable[Dict[str, object]]:
+    """Rows for one run read from ``path``, whatever its layout."""
+
+    if "decisions" in data and "trait_progression" not in data:
+        return _rows_from_artifact(path, data)
 
     policy = data.get("policy", "")
     steps: List[Dict] = data.get("trait_progression", [])
@@ -40,36 +110,53 @@ def _rows_from_run(path: Path) -> Iterable[Dict[str, object]]:
     final_step = steps[-1]
     if final_step.get("end"):
         steps = steps[:-1]
-    final_normalized = normalize_traits(final_step.get("normalized", {}))
-    top3 = [canonicalize(t) for t in data.get("final_reveal", [])]
+    names = _TraitNames()
+    final_normalized = _encode(final_step.get("normalized", {}), names)
+    top3 = json.dumps([names[t] for t in data.get("final_reveal", [])])
+
+    # Option deltas repeat across steps; encode each distinct one once.
+    deltas: Dict[tuple, str] = {}
 
     rows: List[Dict[str, object]] = []
     for step in steps:
+        delta = step.get("delta", {})
+        key = tuple(delta.items())
+        if key not in deltas:
+            deltas[key] = _encode(delta, names)
         row = {
             "run": step.get("run_id", path.stem),
             "policy": policy,
             "step": step.get("step"),
             "scene_id": step.get("scene_id"),
             "choice_id": step.get("choice_id"),
-            "primary": canonicalize(step.get("primary")) if step.get("primary") else "",
-            "secondary": canonicalize(step.get("secondary")) if step.get("secondary") else "",
+            "primary": names[step["primary"]] if step.get("primary") else "",
+            "secondary": names[step["secondary"]] if step.get("secondary") else "",
             "pw": step.get("pw"),
             "sw": step.get("sw"),
-            "delta": json.dumps(normalize_traits(step.get("delta", {})), sort_keys=True),
-            "totals": json.dumps(normalize_traits(step.get("totals", {})), sort_keys=True),
-            "final_normalized": json.dumps(final_normalized, sort_keys=True),
-            "top3": json.dumps(top3),
+            "delta": deltas[key],
+            "totals": _encode(step.get("totals", {}), names),
+            "final_normalized": final_normalized,
+            "top3": top3,
         }
         rows.append(row)
     return rows
 
 
-def ingest_runs(runs_dir: Path, out: Path) -> List[Dict[str, object]]:
-    """Ingest run JSON files from ``runs_dir`` and write a CSV to ``out``."""
+def ingest_runs(
+    runs_dir: Path, out: Path, histogram: Path | None = None
+) -> List[Dict[str, object]]:
+    """Ingest the runs stored in ``runs_dir`` and write a CSV to ``out``.
+
+    Run JSON files, batch files and the run log are read through
+    :func:`~analytics.batch_store.iter_runs`.
+
+    When ``histogram`` is given, the choice counts of the ingested rows are
+    also written there as a :class:`~analytics.choice_histogram.ChoiceHistogram`.
+    """
 
     all_rows: List[Dict[str, object]] = []
-    for path in sorted(runs_dir.glob("run_*.json")):
-        all_rows.extend(_rows_from_run(path))
+    for path, data in iter_runs(runs_dir):
+        all_rows.extend(_rows_from_data(path, data))
 
     out.parent.mkdir(parents=True, exist_ok=True)
     with out.open("w", newline="") as f:
@@ -77,16 +164,63 @@ def ingest_runs(runs_dir: Path, out: Path) -> List[Dict[str, object]]:
         writer.writeheader()
         for row in all_rows:
             writer.writerow(row)
+
+    if histogram is not None:
+        counts = ChoiceHistogram()
+        counts.add_rows(all_rows)
+        counts.save(histogram)
     return all_rows
 
 
+def update_csv(
+    out: Path, paths: Iterable[Path], runs: Iterable[Tuple[Path, Dict[str, Any]]] = ()
+) -> List[Dict[str, object]]:
+    """Replace the rows of the runs in ``paths`` in an existing CSV.
+
+    ``runs`` adds ``(path, run)`` pairs already read, such as runs fetched
+    from a run log.  Rows of other runs are kept as written.  Re-ingested
+    runs take the place of their previous rows; runs not yet in the CSV are
+    appended.
+    """
+
+    fresh: Dict[str, List[Dict[str, object]]] = {}
+    for path in paths:
+        for row in _rows_from_run(path):
+            fresh.setdefault(str(row["run"]), []).append(row)
+    for path, data in runs:
+        for row in _rows_from_data(path, data):
+            fresh.setdefault(str(row["run"]), []).append(row)
+
+    with out.open(newline="") as f:
+        existing = list(csv.DictReader(f))
+
+    rows: List[Dict[str, object]] = []
+    for row in existing:
+        run = row["run"]
+        if run not in fresh:
+            rows.append(row)
+        elif fresh[run] is not None:
+            rows.extend(fresh[run])
+            fresh[run] = None  # type: ignore[assignment]
+    for run_rows in fresh.values():
+        if run_rows is not None:
+            rows.extend(run_rows)
+
+    with out.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
+
+
 def main(argv: List[str] | None = None) -> None:
     parser = argparse.ArgumentParser(description="Ingest run data into a CSV")
     parser.add_argument("--runs-dir", type=Path, required=True)
     parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--histogram", type=Path, help="Also write choice counts to this file")
     args = parser.parse_args(argv)
 
-    ingest_runs(args.runs_dir, args.out)
+    ingest_runs(args.runs_dir, args.out, args.histogram)
 
 
 if __name__ == "__main__":  # pragma: no cover - CLI entry
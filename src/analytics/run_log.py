@@ -0,0 +1,355 @@
+"""Append-only JSON Lines log of run artifacts.
+
+A :class:`RunLog` is a directory of rolling segments, each holding one
+compact JSON run per line, and a sidecar offset index::
+
+    run_log/
+        segment_00000.jsonl      {"runId": ..., ...}\\n  one run per line
+        segment_00001.jsonl      started once a segment reaches ``segment_bytes``
+        index.jsonl              {"runId", "segment", "offset", "length", "summary"}\\n
+
+Any run is fetched with one seek through :meth:`RunLog.get`, and listings
+such as ``build_index`` or the dashboard history read the ``summary`` of
+every index entry without touching the segments.  Appending a run again
+under the same ``runId`` supersedes the earlier line.
+
+A log is opened for reading by default, which never writes to it: a
+truncated last index line, such as one a writer is still appending, is
+skipped.  Opening it with ``mode="a"`` takes an exclusive writer lock, so
+only one process appends at a time, and recovers from an interrupted
+write.  Writes are crash-safe: a run is appended to its segment before its
+index line, so recovery cuts off a truncated last line of the index or of
+a segment and indexes again complete segment lines that never reached the
+index.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Mapping, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+# Default log directory inside a results directory.
+LOG_DIR = "run_log"
+
+INDEX_FILE = "index.jsonl"
+
+# Held with an exclusive lock by the process appending to a log.
+LOCK_FILE = "writer.lock"
+
+# A new segment is started once the current one reaches this size.
+SEGMENT_BYTES = 64 << 20
+
+# Fields copied into the index: the ``build_index`` summary plus what the
+# dashboard history shows.
+INDEX_KEYS = (
+    "runId",
+    "policy",
+    "seed",
+    "steps",
+    "normalized",
+    "top3",
+    "endingId",
+    "flags",
+    "timestamp",
+    "dominance_threshold",
+    "decisions_made",
+    "metadata",
+)
+
+
+@dataclass(frozen=True)
+class LogEntry:
+    """Location and summary of one run in the log."""
+
+    run_id: str
+    segment: int
+    offset: int
+    length: int
+    summary: Dict[str, Any]
+
+    def to_line(self) -> bytes:
+        record = {
+            "runId": self.run_id,
+            "segment": self.segment,
+            "offset": self.offset,
+            "length": self.length,
+            "summary": self.summary,
+        }
+        return json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+
+    @classmethod
+    def from_line(cls, line: bytes) -> "LogEntry":
+        record = json.loads(line)
+        return cls(record["runId"], record["segment"], record["offset"], record["length"], record["summary"])
+
+
+def _summary(run: Mapping[str, Any]) -> Dict[str, Any]:
+    return {key: run[key] for key in INDEX_KEYS if key in run}
+
+
+def _run_id(run: Mapping[str, Any]) -> str:
+    run_id = run.get("runId")
+    if run_id is None:
+        raise ValueError("Logged runs need a runId")
+    return str(run_id)
+
+
+def _complete_lines(data: bytes) -> Tuple[List[Tuple[int, bytes]], int]:
+    """Return ``(offset, line)`` of every newline-terminated line and their end."""
+
+    lines = []
+    start = 0
+    while True:
+        end = data.find(b"\n", start)
+        if end < 0:
+            return lines, start
+        lines.append((start, data[start:end]))
+        start = end + 1
+
+
+def _lock(path: Path) -> BinaryIO:
+    """Open ``path`` and lock it, failing at once if another writer holds it."""
+
+    fh = path.open("a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:  # pragma: no cover - Windows
+            msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        fh.close()
+        raise RuntimeError(f"Run log {path.parent} is already open for appending") from None
+    return fh
+
+
+class RunLog:
+    """Rolling JSON Lines segments with an offset index.
+
+    Parameters
+    ----------
+    directory:
+        Log directory, created when opened for appending.
+    segment_bytes:
+        Size at which appends move on to a new segment.
+    mode:
+        ``"r"`` to read the log as it is, ``"a"`` to lock it, recover from
+        an interrupted write and append runs.
+    """
+
+    def __init__(self, directory: Path, segment_bytes: int = SEGMENT_BYTES, mode: str = "r") -> None:
+        if mode not in ("r", "a"):
+            raise ValueError(f"Unknown run log mode: {mode!r}")
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.mode = mode
+        self._entries: Dict[str, LogEntry] = {}
+        self._segment = 0
+        self._size = 0
+        self._out: BinaryIO | None = None
+        self._index: BinaryIO | None = None
+        self._writer: BinaryIO | None = None
+        if mode == "a":
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._writer = _lock(self.directory / LOCK_FILE)
+            self._recover()
+        else:
+            self._read()
+
+    # ------------------------------------------------------------------
+    # Files
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.directory / f"segment_{segment:05d}.jsonl"
+
+    def _segments(self) -> List[int]:
+        return sorted(int(p.stem.split("_")[1]) for p in self.directory.glob("segment_*.jsonl"))
+
+    def _indexed(self) -> Tuple[List[LogEntry], int, int]:
+        """Return the entries of the index up to its first bad line.
+
+        Also returns the size of those lines and of the whole index file.
+        """
+
+        index = self.directory / INDEX_FILE
+        data = index.read_bytes() if index.exists() else b""
+        lines, _ = _complete_lines(data)
+        entries = []
+        for _, line in lines:
+            try:
+                entries.append(LogEntry.from_line(line))
+            except (ValueError, KeyError):
+                break
+        good = sum(len(line) + 1 for _, line in lines[: len(entries)])
+        return entries, good, len(data)
+
+    def _read(self) -> None:
+        entries, _, _ = self._indexed()
+        for entry in entries:
+            self._entries[entry.run_id] = entry
+
+    def _recover(self) -> None:
+        index = self.directory / INDEX_FILE
+        entries, good, size = self._indexed()
+        if good != size:
+            with index.open("r+b") as fh:
+                fh.truncate(good)
+
+        # Segments written past their last indexed run were interrupted.
+        ends: Dict[int, int] = {}
+        for entry in entries:
+            ends[entry.segment] = max(ends.get(entry.segment, 0), entry.offset + entry.length + 1)
+        first = max(ends, default=0)
+        missing: List[LogEntry] = []
+        for segment in (s for s in self._segments() if s >= first):
+            path = self._segment_path(segment)
+            tail = path.read_bytes()
+            start = ends.get(segment, 0)
+            lines, end = _complete_lines(tail[start:])
+            kept = start
+            for offset, line in lines:
+                try:
+                    run = json.loads(line)
+                    missing.append(
+                        LogEntry(_run_id(run), segment, start + offset, len(line), _summary(run))
+                    )
+                except ValueError:
+                    break
+                kept = start + offset + len(line) + 1
+            if kept < len(tail):
+                with path.open("r+b") as fh:
+                    fh.truncate(kept)
+            self._segment, self._size = segment, kept
+
+        for entry in entries:
+            self._entries[entry.run_id] = entry
+        if missing:
+            with index.open("ab") as fh:
+                for entry in missing:
+                    fh.write(entry.to_line())
+                    self._entries[entry.run_id] = entry
+
+    def _open(self) -> None:
+        if self._out is not None:
+            return
+        if self.mode != "a":
+            raise ValueError("Run log is open for reading; open it with mode='a' to append")
+        self._out = self._segment_path(self._segment).open("ab")
+        self._index = (self.directory / INDEX_FILE).open("ab")
+
+    def _roll(self) -> None:
+        assert self._out is not None
+        self._out.close()
+        self._segment += 1
+        self._size = 0
+        self._out = self._segment_path(self._segment).open("ab")
+
+    # ------------------------------------------------------------------
+    # Writing
+
+    def append(self, run: Mapping[str, Any]) -> LogEntry:
+        """Append one run and return its index entry."""
+
+        line = json.dumps(run, separators=(",", ":")).encode("utf-8")
+        self._open()
+        assert self._out is not None and self._index is not None
+        if self._size and self._size + len(line) + 1 > self.segment_bytes:
+            self._roll()
+        entry = LogEntry(_run_id(run), self._segment, self._size, len(line), _summary(run))
+        self._out.write(line + b"\n")
+        self._out.flush()
+        self._index.write(entry.to_line())
+        self._index.flush()
+        self._size += len(line) + 1
+        self._entries[entry.run_id] = entry
+        return entry
+
+    def extend(self, runs: Iterable[Mapping[str, Any]]) -> List[LogEntry]:
+        return [self.append(run) for run in runs]
+
+    def sync(self) -> None:
+        """Flush appended runs to stable storage."""
+
+        for fh in (self._out, self._index):
+            if fh is not None:
+                fh.flush()
+                os.fsync(fh.fileno())
+
+    def close(self) -> None:
+        """Close the segment and index files and release the writer lock."""
+
+        for fh in (self._out, self._index, self._writer):
+            if fh is not None:
+                fh.close()
+        self._out = self._index = self._writer = None
+
+    def __enter__(self) -> "RunLog":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Reading
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, run_id: object) -> bool:
+        return run_id in self._entries
+
+    def run_ids(self) -> List[str]:
+        """Return every logged ``runId`` in the order first appended."""
+
+        return list(self._entries)
+
+    def entry(self, run_id: str) -> LogEntry | None:
+        return self._entries.get(run_id)
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """Return the index summary of every run, without reading segments."""
+
+        return [entry.summary for entry in self._entries.values()]
+
+    def get(self, run_id: str) -> Dict[str, Any] | None:
+        """Return the latest run logged as ``run_id``, or ``None``."""
+
+        entry = self._entries.get(run_id)
+        if entry is None:
+            return None
+        if self._out is not None:
+            self._out.flush()
+        with self._segment_path(entry.segment).open("rb") as fh:
+            fh.seek(entry.offset)
+            return json.loads(fh.read(entry.length))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Yield every run, reading each segment once."""
+
+        if self._out is not None:
+            self._out.flush()
+        by_segment: Dict[int, List[LogEntry]] = {}
+        for entry in self._entries.values():
+            by_segment.setdefault(entry.segment, []).append(entry)
+        for segment in sorted(by_segment):
+            data = self._segment_path(segment).read_bytes()
+            for entry in sorted(by_segment[segment], key=lambda e: e.offset):
+                yield json.loads(data[entry.offset : entry.offset + entry.length])
+
+
+def open_log(results_dir: Path, name: str = LOG_DIR) -> RunLog | None:
+    """Return the run log ``name`` of ``results_dir`` for reading, or ``None``."""
+
+    directory = results_dir / name
+    return RunLog(directory) if (directory / INDEX_FILE).exists() else None
+
+
+__all__ = ["RunLog", "LogEntry", "open_log", "LOG_DIR", "INDEX_KEYS", "SEGMENT_BYTES"]
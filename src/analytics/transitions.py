@@ -0,0 +1,338 @@
+"""First-order transition counts between consecutive choices.
+
+A :class:`TransitionMatrix` counts, per policy, how often one state is
+immediately followed by another within a run.  Two kinds of state are
+built in one pass over the stored runs:
+
+``"choice"``
+    the choice taken, as ``"<scene_id>:<choice_id>"``;
+``"trait"``
+    the canonical primary trait of the choice taken.
+
+Matrices are sparse: only observed pairs are stored.  They are saved in a
+compact binary file for quick reloading (little endian)::
+
+    b"JTM1"                      magic
+    uint32                       length of the JSON header
+    header                       {"kind": ..., "states": [...],
+                                  "policies": [...], "sizes": [...]}
+    per policy, ``size`` entries of
+        uint32[size] source state, uint32[size] target state, uint64[size] count
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+from .canonical import canonicalize
+from .batch_store import iter_runs
+from .ingest_runs import _rows_from_data
+
+MAGIC = b"JTM1"
+
+# Transition kinds built by :func:`build_transitions`.
+KINDS = ("choice", "trait")
+
+# Trait state of a choice without a primary trait.
+NO_TRAIT = "(none)"
+
+
+class TransitionMatrix:
+    """Sparse per-policy counts of ``state -> next state`` transitions."""
+
+    def __init__(self, kind: str = "choice") -> None:
+        self.kind = kind
+        self._states: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._counts: Dict[str, Dict[Tuple[int, int], int]] = {}
+
+    def _state(self, name: str) -> int:
+        code = self._index.get(name)
+        if code is None:
+            code = self._index[name] = len(self._states)
+            self._states.append(name)
+        return code
+
+    # ------------------------------------------------------------------
+    # Collection
+
+    def add(self, policy: str, source: str, target: str, count: int = 1) -> None:
+        counts = self._counts.setdefault(policy, {})
+        key = (self._state(source), self._state(target))
+        counts[key] = counts.get(key, 0) + count
+
+    def add_sequence(self, policy: str, states: Iterable[str]) -> None:
+        """Count every consecutive pair of one run's ``states``."""
+
+        counts = self._counts.setdefault(policy, {})
+        previous = None
+        for name in states:
+            code = self._state(name)
+            if previous is not None:
+                key = (previous, code)
+                counts[key] = counts.get(key, 0) + 1
+            previous = code
+
+    def merge(self, other: "TransitionMatrix") -> "TransitionMatrix":
+        """Add the counts of ``other`` and return this matrix."""
+
+        if other.kind != self.kind:
+            raise ValueError(f"Cannot merge {other.kind!r} transitions into {self.kind!r}")
+        codes = [self._state(name) for name in other._states]
+        for policy, pairs in other._counts.items():
+            counts = self._counts.setdefault(policy, {})
+            for (src, dst), count in pairs.items():
+                key = (codes[src], codes[dst])
+                counts[key] = counts.get(key, 0) + count
+        return self
+
+    # ------------------------------------------------------------------
+    # Queries
+
+    @property
+    def policies(self) -> List[str]:
+        return list(self._counts)
+
+    @property
+    def states(self) -> List[str]:
+        return list(self._states)
+
+    def _pairs(self, policy: str | None) -> Iterator[Dict[Tuple[int, int], int]]:
+        if policy is None:
+            yield from self._counts.values()
+        elif policy in self._counts:
+            yield self._counts[policy]
+
+    def count(self, source: str, target: str, policy: str | None = None) -> int:
+        src, dst = self._index.get(source), self._index.get(target)
+        if src is None or dst is None:
+            return 0
+        return sum(pairs.get((src, dst), 0) for pairs in self._pairs(policy))
+
+    def row(self, source: str, policy: str | None = None) -> Dict[str, int]:
+        """Return ``target -> count`` of the transitions out of ``source``."""
+
+        src = self._index.get(source)
+        result: Dict[str, int] = {}
+        if src is None:
+            return result
+        for pairs in self._pairs(policy):
+            for (s, d), count in pairs.items():
+                if s == src:
+                    name = self._states[d]
+                    result[name] = result.get(name, 0) + count
+        return result
+
+    def probabilities(self, source: str, policy: str | None = None) -> Dict[str, float]:
+        """Return the empirical ``P(target | source)``."""
+
+        row = self.row(source, policy)
+        total = sum(row.values())
+        return {target: count / total for target, count in row.items()} if total else {}
+
+    def items(self, policy: str | None = None) -> Iterator[Tuple[str, str, str, int]]:
+        """Yield ``(policy, source, target, count)`` for every stored pair."""
+
+        names = self._states
+        for name, pairs in self._counts.items():
+            if policy is None or name == policy:
+                for (src, dst), count in pairs.items():
+                    yield name, names[src], names[dst], count
+
+    def most_common(self, n: int = 10, policy: str | None = None) -> List[Tuple[str, str, int]]:
+        """Return the ``n`` most frequent ``(source, target, count)`` pairs."""
+
+        totals: Dict[Tuple[str, str], int] = {}
+        for _, src, dst, count in self.items(policy):
+            totals[(src, dst)] = totals.get((src, dst), 0) + count
+        ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+        return [(src, dst, count) for (src, dst), count in ranked[:n]]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TransitionMatrix):
+            return NotImplemented
+        return self.kind == other.kind and sorted(self.items()) == sorted(other.items())
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        pairs = sum(len(p) for p in self._counts.values())
+        return f"TransitionMatrix(kind={self.kind!r}, states={len(self._states)}, pairs={pairs})"
+
+    # ------------------------------------------------------------------
+    # Persistence
+
+    def to_bytes(self) -> bytes:
+        policies = list(self._counts)
+        header = json.dumps(
+            {
+                "kind": self.kind,
+                "states": self._states,
+                "policies": policies,
+                "sizes": [len(self._counts[p]) for p in policies],
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+        parts = [MAGIC, struct.pack("<I", len(header)), header]
+        for policy in policies:
+            pairs = sorted(self._counts[policy].items())
+            columns = (
+                array("I", [src for (src, _), _ in pairs]),
+                array("I", [dst for (_, dst), _ in pairs]),
+                array("Q", [count for _, count in pairs]),
+            )
+            for column in columns:
+                if sys.byteorder == "big":
+                    column.byteswap()
+                parts.append(column.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TransitionMatrix":
+        if data[:4] != MAGIC:
+            raise ValueError("Not a transition matrix")
+        (size,) = struct.unpack_from("<I", data, 4)
+        header = json.loads(data[8 : 8 + size].decode("utf-8"))
+        matrix = cls(header["kind"])
+        matrix._states = list(header["states"])
+        matrix._index = {name: i for i, name in enumerate(matrix._states)}
+
+        offset = 8 + size
+        for policy, n in zip(header["policies"], header["sizes"]):
+            columns = []
+            for typecode in ("I", "I", "Q"):
+                column = array(typecode)
+                end = offset + n * column.itemsize
+                if end > len(data):
+                    raise ValueError("Truncated transition matrix")
+                column.frombytes(data[offset:end])
+                if sys.byteorder == "big":
+                    column.byteswap()
+                columns.append(column)
+                offset = end
+            matrix._counts[policy] = {
+                (src, dst): count for src, dst, count in zip(*columns)
+            }
+        return matrix
+
+    def save(self, path: Path) -> None:
+        """Write the matrix to ``path``, replacing it atomically."""
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(self.to_bytes())
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "TransitionMatrix":
+        return cls.from_bytes(path.read_bytes())
+
+
+# ---------------------------------------------------------------------------
+# Builders
+
+
+def _trait_state(primary: Any) -> str:
+    return canonicalize(primary) if primary else NO_TRAIT
+
+
+def _add_run(matrices: Mapping[str, TransitionMatrix], policy: str, steps: Sequence[Tuple[str, str, Any]]) -> None:
+    """Count one run given ``(scene_id, choice_id, primary)`` per step."""
+
+    if "choice" in matrices:
+        matrices["choice"].add_sequence(policy, (f"{s}:{c}" for s, c, _ in steps))
+    if "trait" in matrices:
+        matrices["trait"].add_sequence(policy, (_trait_state(p) for _, _, p in steps))
+
+
+def _matrices(kinds: Sequence[str]) -> Dict[str, TransitionMatrix]:
+    for kind in kinds:
+        if kind not in KINDS:
+            raise ValueError(f"Unknown transition kind: {kind!r}")
+    return {kind: TransitionMatrix(kind) for kind in kinds}
+
+
+def from_runs(runs_dir: Path, kinds: Sequence[str] = KINDS) -> Dict[str, TransitionMatrix]:
+    """Build transition matrices from the run artifacts in ``runs_dir``.
+
+    Both ``run_*.json`` and batch files are read.  ``testrig`` artifacts
+    are read from their ``decisions``; other runs go through the same
+    parsing as :mod:`analytics.ingest_runs`.
+    """
+
+    matrices = _matrices(kinds)
+    for path, data in iter_runs(runs_dir):
+        if "decisions" in data and "trait_progression" not in data:
+            decisions = sorted(data["decisions"], key=lambda d: d.get("step") or 0)
+            steps = [(d.get("sceneId"), d.get("choiceId"), d.get("primary")) for d in decisions]
+            _add_run(matrices, data.get("policy", ""), steps)
+        else:
+            rows = list(_rows_from_data(path, data))
+            if rows:
+                steps = [(r["scene_id"], r["choice_id"], r["primary"]) for r in rows]
+                _add_run(matrices, str(rows[0]["policy"]), steps)
+    return matrices
+
+
+def from_rows(rows: Iterable[Mapping[str, Any]], kinds: Sequence[str] = KINDS) -> Dict[str, TransitionMatrix]:
+    """Build transition matrices from ``runs_agg.csv`` rows.
+
+    Rows of one run must be contiguous and in step order, as written by
+    :func:`analytics.ingest_runs.ingest_runs`.
+    """
+
+    matrices = _matrices(kinds)
+    run = None
+    policy = ""
+    steps: List[Tuple[str, str, Any]] = []
+    for row in rows:
+        if row["run"] != run:
+            if steps:
+                _add_run(matrices, policy, steps)
+            run, policy, steps = row["run"], str(row["policy"]), []
+        steps.append((row["scene_id"], row["choice_id"], row["primary"]))
+    if steps:
+        _add_run(matrices, policy, steps)
+    return matrices
+
+
+def from_csv(path: Path, kinds: Sequence[str] = KINDS) -> Dict[str, TransitionMatrix]:
+    """Build transition matrices from a ``runs_agg.csv`` file."""
+
+    with path.open(newline="") as fh:
+        return from_rows(csv.DictReader(fh), kinds)
+
+
+__all__ = ["TransitionMatrix", "from_runs", "from_rows", "from_csv", "KINDS", "NO_TRAIT"]
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Build choice transition matrices")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--runs-dir", type=Path, help="Directory of run artifacts")
+    source.add_argument("--csv", type=Path, help="runs_agg.csv written by ingest_runs")
+    parser.add_argument("--choices", type=Path, help="Write choice transitions to this file")
+    parser.add_argument("--traits", type=Path, help="Write primary-trait transitions to this file")
+    parser.add_argument("--top", type=int, default=0, help="Print the N most common transitions")
+    parser.add_argument("--policy", help="Restrict --top to one policy")
+    args = parser.parse_args(argv)
+
+    outputs = {"choice": args.choices, "trait": args.traits}
+    kinds = [kind for kind in KINDS if outputs[kind] is not None or args.top]
+    matrices = from_runs(args.runs_dir, kinds) if args.runs_dir else from_csv(args.csv, kinds)
+    for kind, matrix in matrices.items():
+        if outputs[kind] is not None:
+            matrix.save(outputs[kind])
+        for src, dst, count in matrix.most_common(args.top, args.policy) if args.top else ():
+            print(f"{kind}: {src} -> {dst}: {count}")
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry
+    main()
@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 
 def _clamp(value: float, low: float, high: float) -> float:
@@ -31,17 +31,18 @@ class Calibrator:
         self.act_cap = _clamp(self.config.get("act_cap", 1.5), 0.0, 1.5)
         self.epsilon = _clamp(self.config.get("epsilon", 0.03), 0.0, 0.03)
 
-    def calibrate(self, history: List[str], trait: str) -> float:
-        """Return calibrated multiplier for *trait* given selection *history*.
+    def multiplier(self, trait: str, streak_trait: Optional[str] = None, streak: int = 0) -> float:
+        """Return calibrated multiplier for *trait* from constant-size streak state.
 
-        The multiplier is bounded and applies anti-streak dampening for
-        consecutive selections of the same trait as well as a per-step decay.
+        *streak_trait* is the most recently selected trait and *streak* the
+        number of consecutive selections of it, as maintained by
+        :meth:`advance`.  Equivalent to :meth:`calibrate` on the full history.
         """
         mult = self.multipliers.get(trait, 1.0)
 
         # Anti-streak: if the last two selections match the current trait,
         # dampen the multiplier by the configured percentage.
-        if len(history) >= 2 and history[-1] == history[-2] == trait:
+        if streak >= 2 and streak_trait == trait:
             mult *= 1.0 - self.anti_streak
 
         # Apply per-step decay.
@@ -50,3 +51,19 @@ class Calibrator:
         # Enforce act-wide cap (scene caps require external tracking).
         mult = _clamp(mult, 0.0, self.act_cap)
         return mult
+
+    @staticmethod
+    def advance(streak_trait: Optional[str], streak: int, selected: str) -> Tuple[str, int]:
+        """Return the streak state after *selected* is appended to the history."""
+        if selected == streak_trait:
+            return selected, streak + 1
+        return selected, 1
+
+    def calibrate(self, history: List[str], trait: str) -> float:
+        """Return calibrated multiplier for *trait* given selection *history*.
+
+        The multiplier is bounded and applies anti-streak dampening for
+        consecutive selections of the same trait as well as a per-step decay.
+        """
+        streak = 2 if len(history) >= 2 and history[-1] == history[-2] else min(len(history), 1)
+        return self.multiplier(trait, history[-1] if history else None, streak)
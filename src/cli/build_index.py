@@ -1,10 +1,23 @@
-"""Generate a summary index for run artifacts."""
+"""Generate a summary index for run artifacts.
+
+The index is kept up to date incrementally.  A JSON manifest,
+``index.manifest``, records the size and modification time of every run
+file and where its entries sit in ``index.json``, so a refresh only parses
+files that are new or changed since the last one, copies the other entries
+from the previous index text and drops the entries of deleted files.  The
+run log is followed through its append-only offset index: only lines added
+since the last refresh are read.
+"""
 
 from __future__ import annotations
 
 import json
+import os
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
+
+from analytics.batch_store import SUFFIX, RunBatch
+from analytics.run_log import INDEX_FILE, LOG_DIR, LogEntry, open_log
 
 SUMMARY_KEYS = [
     "runId",
@@ -19,34 +32,195 @@ SUMMARY_KEYS = [
     "dominance_threshold",
 ]
 
+MANIFEST_FILE = "index.manifest"
 
-def build_index(results_dir: Path | None = None) -> List[Dict[str, Any]]:
-    """Rebuild the run summary index.
+# Bumped whenever the manifest layout or the rendering of entries changes.
+MANIFEST_VERSION = 1
 
-    Parameters
-    ----------
-    results_dir:
-        Directory containing ``run_*.json`` files. Defaults to ``data/test_results``
-        under the repository root.
+
+def _default_results_dir() -> Path:
+    return Path(__file__).resolve().parents[2] / "data" / "test_results"
+
+
+def _render(summary: Dict[str, Any]) -> str:
+    """Render one index entry exactly as ``json.dump(index, indent=2)`` does."""
+
+    entry = {key: summary.get(key) for key in SUMMARY_KEYS}
+    return "  " + json.dumps(entry, indent=2).replace("\n", "\n  ")
+
+
+def _file_block(path: Path) -> Tuple[str, int]:
+    """Return the index entries of one run file and how many there are."""
+
+    if path.suffix == SUFFIX:
+        batch = RunBatch.load(path)
+        return ",\n".join(_render(batch.meta(i)) for i in range(len(batch))), len(batch)
+    with path.open("r", encoding="utf-8") as fh:
+        return _render(json.load(fh)), 1
+
+
+def _stat(path: Path) -> List[int]:
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _load_manifest(base: Path) -> Tuple[Dict[str, Any], str]:
+    """Return the manifest and the index text its spans point into."""
+
+    try:
+        with (base / MANIFEST_FILE).open("r", encoding="utf-8") as fh:
+            manifest = json.load(fh)
+        if (
+            manifest.get("version") == MANIFEST_VERSION
+            and manifest.get("keys") == SUMMARY_KEYS
+            and manifest.get("index") == _stat(base / "index.json")
+        ):
+            return manifest, (base / "index.json").read_text(encoding="utf-8")
+    except (OSError, ValueError):
+        pass
+    return {"files": {}, "log": None}, ""
+
+
+def _run_files(base: Path) -> Tuple[List[Tuple[str, int, int]], List[Tuple[str, int, int]]]:
+    """Return ``(name, size, mtime)`` of the JSON and batch files of ``base``."""
+
+    runs, batches = [], []
+    with os.scandir(base) as it:
+        for item in it:
+            name = item.name
+            if name.startswith("run_") and name.endswith(".json"):
+                target = runs
+            elif name.endswith(SUFFIX):
+                target = batches
+            else:
+                continue
+            stat = item.stat()
+            target.append((name, stat.st_size, stat.st_mtime_ns))
+    return sorted(runs), sorted(batches)
+
+
+def _log_blocks(base: Path, previous: Dict[str, Any] | None, text: str) -> Tuple[List[str], List[str], int]:
+    """Return ``runIds``, index entries and consumed size of the run log.
+
+    Entries known from ``previous`` are sliced out of the old index ``text``
+    and only index lines appended since are read.
+    """
+
+    index = base / LOG_DIR / INDEX_FILE
+    if not index.exists():
+        return [], [], 0
+    size = index.stat().st_size
+    if previous is None or size < previous["size"]:
+        log = open_log(base)
+        assert log is not None
+        blocks = [_render(summary) for summary in log.summaries()]
+        return log.run_ids(), blocks, index.stat().st_size
+
+    run_ids = list(previous["runIds"])
+    blocks = [text[offset : offset + length] for offset, length in previous["spans"]]
+    if size == previous["size"]:
+        return run_ids, blocks, size
+
+    with index.open("rb") as fh:
+        fh.seek(previous["size"])
+        tail = fh.read(size - previous["size"])
+    # A torn last line is left for the next refresh, after recovery.
+    complete = tail[: tail.rfind(b"\n") + 1]
+    positions = {run_id: i for i, run_id in enumerate(run_ids)}
+    for line in complete.splitlines():
+        entry = LogEntry.from_line(line)
+        block = _render(entry.summary)
+        if entry.run_id in positions:
+            blocks[positions[entry.run_id]] = block
+        else:
+            positions[entry.run_id] = len(run_ids)
+            run_ids.append(entry.run_id)
+            blocks.append(block)
+    return run_ids, blocks, previous["size"] + len(complete)
+
+
+def refresh_index(results_dir: Path | None = None) -> int:
+    """Bring ``index.json`` up to date and return the number of runs listed.
+
+    Only files that are new or whose size or modification time changed since
+    the last refresh are parsed; the entries of the others are copied from
+    the previous index text.  Runs are listed with the ``run_*.json`` files
+    first in name order, then the runs of every batch file, summarised from
+    the batch header alone, then the runs of the directory's run log.
     """
 
-    base = results_dir or Path(__file__).resolve().parents[2] / "data" / "test_results"
-    runs: List[Dict[str, Any]] = []
+    base = results_dir or _default_results_dir()
     if not base.exists():
-        return runs
+        return 0
 
-    for file in sorted(base.glob("run_*.json")):
-        with file.open("r", encoding="utf-8") as fh:
-            data = json.load(fh)
-        summary = {key: data.get(key) for key in SUMMARY_KEYS}
-        runs.append(summary)
+    manifest, text = _load_manifest(base)
+    # name -> [size, mtime, offset, length, runs] of its block in ``text``
+    known: Dict[str, List[int]] = manifest["files"]
+    files: Dict[str, List[int]] = {}
+    parts: List[str] = []
+    count = 0
+    offset = 2  # after "[\n"
+    runs, batches = _run_files(base)
+    for name, size, mtime in runs + batches:
+        record = known.get(name)
+        if record is not None and record[:2] == [size, mtime]:
+            block, n = text[record[2] : record[2] + record[3]], record[4]
+        else:
+            block, n = _file_block(base / name)
+        files[name] = [size, mtime, offset, len(block), n]
+        count += n
+        if block:
+            parts.append(block)
+            offset += len(block) + 2
+
+    log_ids, log_blocks, log_size = _log_blocks(base, manifest["log"], text)
+    count += len(log_ids)
+    spans: List[List[int]] = []
+    for block in log_blocks:
+        spans.append([offset, len(block)])
+        parts.append(block)
+        offset += len(block) + 2
+    log = {"size": log_size, "runIds": log_ids, "spans": spans} if log_ids or log_size else None
+    if text and files == known and log == manifest["log"]:
+        return count
 
     index_file = base / "index.json"
     with index_file.open("w", encoding="utf-8") as fh:
-        json.dump(runs, fh, indent=2)
+        fh.write("[\n" + ",\n".join(parts) + "\n]" if parts else "[]")
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "keys": SUMMARY_KEYS,
+        "index": _stat(index_file),
+        "files": files,
+        "log": log,
+    }
+    tmp = base / (MANIFEST_FILE + ".tmp")
+    with tmp.open("w", encoding="utf-8") as fh:
+        # One dumps call uses the C encoder; json.dump encodes in Python.
+        fh.write(json.dumps(manifest, separators=(",", ":")))
+    tmp.replace(base / MANIFEST_FILE)
+    return count
+
+
+def build_index(results_dir: Path | None = None) -> List[Dict[str, Any]]:
+    """Rebuild the run summary index and return its entries.
+
+    Parameters
+    ----------
+    results_dir:
+        Directory containing ``run_*.json`` files, batch files and a run
+        log. Defaults to ``data/test_results`` under the repository root.
 
-    return runs
+    See :func:`refresh_index`, which writes the same file without reading
+    the entries back.
+    """
 
+    base = results_dir or _default_results_dir()
+    if not base.exists():
+        return []
+    refresh_index(base)
+    with (base / "index.json").open("r", encoding="utf-8") as fh:
+        return json.load(fh)
 
-__all__ = ["build_index"]
 
+__all__ = ["build_index", "refresh_index", "SUMMARY_KEYS"]
@@ -0,0 +1,186 @@
+"""Re-simulate stored runs whose scenario content has changed."""
+
+from __future__ import annotations
+
+import json
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from analytics.choice_histogram import HISTOGRAM_FILE, ChoiceHistogram, update_histogram
+from analytics.ingest_runs import update_csv
+from analytics.run_log import LOG_DIR, RunLog, open_log
+from testing.content import ScenarioBundle, load_bundle
+
+from .build_index import refresh_index
+from .run_writer import collect_counted_batch, write_batch, write_counted_batch
+
+
+def is_stale(data: Dict[str, Any], bundle: ScenarioBundle) -> bool:
+    """Return ``True`` if a stored run could differ under ``bundle``.
+
+    The runner visits scenes in content order, so a run is reproduced
+    exactly when the scenes it would visit now carry the same hashes, in the
+    same order, as the scenes it visited then.  Artifacts written before
+    scene hashes were recorded are always stale.
+    """
+
+    if data.get("contentDigest") == bundle.digest:
+        return False
+    hashes = data.get("sceneHashes")
+    if hashes is None:
+        return True
+    max_steps = data.get("maxSteps") or 100
+    return hashes != [scene.digest for scene in bundle.scenes[:max_steps]]
+
+
+def _stored_runs(results_dir: Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ``(format, run)`` for the ``run_*.json`` files and the run log."""
+
+    for file in sorted(results_dir.glob("run_*.json")):
+        with file.open("r", encoding="utf-8") as fh:
+            yield "json", json.load(fh)
+    log = open_log(results_dir)
+    if log is not None:
+        for data in log:
+            yield "log", data
+
+
+def _find_stale(
+    results_dir: Path, bundle: ScenarioBundle
+) -> Tuple[List[Tuple[str, Dict[str, Any]]], int]:
+    stale: List[Tuple[str, Dict[str, Any]]] = []
+    reused = 0
+    for format, data in _stored_runs(results_dir):
+        if not all(key in data for key in ("runId", "policy", "seed")):
+            continue
+        if is_stale(data, bundle):
+            stale.append((format, data))
+        else:
+            reused += 1
+    return stale, reused
+
+
+def find_stale(results_dir: Path, bundle: ScenarioBundle) -> Tuple[List[Dict[str, Any]], int]:
+    """Return the stale run artifacts in ``results_dir`` and the reused count.
+
+    ``run_*.json`` files and the runs of the directory's run log are
+    checked.  Only ``testrig`` artifacts (with ``runId``, ``policy`` and
+    ``seed``) are considered; other runs are left alone.
+    """
+
+    stale, reused = _find_stale(results_dir, bundle)
+    return [data for _, data in stale], reused
+
+
+def resimulate(
+    results_dir: Path,
+    csv_path: Path | None = None,
+    workers: int = 1,
+    bundle: ScenarioBundle | None = None,
+) -> Tuple[List[str], int]:
+    """Re-run every stale artifact in ``results_dir`` with the current content.
+
+    Stale runs are rewritten with their original policy, seed, step limit,
+    dominance threshold and calibration.  The index is then refreshed,
+    which re-reads only the rewritten runs, and when ``csv_path`` exists
+    their rows in the derived CSV are replaced in place.  An existing choice
+    histogram is updated from the old and new decisions of the re-simulated
+    runs.  ``bundle`` defaults to the cached content; worker processes
+    always use the default content.
+
+    Stale runs of the run log are appended to it again, superseding the old
+    lines; workers hand those runs back and only this process appends them.
+    Runs stored in batch files are not re-simulated.
+
+    Returns
+    -------
+    tuple
+        The ``runId`` of every re-simulated run and the number of runs
+        reused unchanged.
+    """
+
+    bundle = bundle or load_bundle()
+    stale, reused = _find_stale(results_dir, bundle)
+
+    groups: Dict[Tuple[str, str, int, int, str], List[int]] = {}
+    for format, data in stale:
+        key = (
+            format,
+            data["policy"],
+            data.get("maxSteps") or 100,
+            data.get("dominance_threshold", 80),
+            json.dumps(data.get("calibration"), sort_keys=True),
+        )
+        groups.setdefault(key, []).append(data["seed"])
+
+    timestamp = datetime.utcnow().isoformat()
+    run_ids: List[str] = []
+    logged: List[str] = []
+    histogram = ChoiceHistogram()
+    log = RunLog(results_dir / LOG_DIR, mode="a") if any(key[0] == "log" for key in groups) else None
+    try:
+        if workers > 1 and len(groups) > 0:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = []
+                for (format, policy, max_steps, threshold, calibration), seeds in groups.items():
+                    options = dict(
+                        max_steps=max_steps,
+                        dominance_threshold=threshold,
+                        timestamp=timestamp,
+                        calibration=json.loads(calibration),
+                    )
+                    if format == "log":
+                        future = pool.submit(collect_counted_batch, policy, seeds, **options)
+                    else:
+                        future = pool.submit(
+                            write_counted_batch, policy, seeds, output_dir=results_dir, **options
+                        )
+                    futures.append((format, future))
+                for format, future in futures:
+                    result, counts = future.result()
+                    if format == "log":
+                        assert log is not None
+                        ids = [entry.run_id for entry in log.extend(result)]
+                        logged.extend(ids)
+                    else:
+                        ids = result
+                    run_ids.extend(ids)
+                    histogram.merge(counts)
+        else:
+            for (format, policy, max_steps, threshold, calibration), seeds in groups.items():
+                ids = write_batch(
+                    policy,
+                    seeds,
+                    max_steps,
+                    threshold,
+                    results_dir,
+                    bundle,
+                    timestamp,
+                    json.loads(calibration),
+                    histogram,
+                    format=format,
+                    run_log=log,
+                )
+                run_ids.extend(ids)
+                if format == "log":
+                    logged.extend(ids)
+    finally:
+        if log is not None:
+            log.close()
+
+    if run_ids:
+        refresh_index(results_dir)
+        if (results_dir / HISTOGRAM_FILE).exists():
+            update_histogram(results_dir, histogram, [data for _, data in stale])
+        if csv_path is not None and csv_path.exists():
+            written = set(logged)
+            paths = [results_dir / f"run_{run_id}.json" for run_id in run_ids if run_id not in written]
+            reader = open_log(results_dir) if logged else None
+            runs = [(reader.directory, reader.get(run_id)) for run_id in logged] if reader else []
+            update_csv(csv_path, paths, runs)
+    return run_ids, reused
+
+
+__all__ = ["is_stale", "find_stale", "resimulate"]
@@ -3,50 +3,62 @@
 from __future__ import annotations
 
 import json
+import re
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
-from testing.runner import run
+from analytics.batch_store import SUFFIX, load_runs, save_runs
+from analytics.choice_histogram import ChoiceHistogram
+from analytics.run_log import LOG_DIR, RunLog
+from testing.content import ScenarioBundle, load_bundle
+from testing.runner import run, run_batch
 from testing.policies import POLICIES
 
 
-def write_run(
+# Artifacts need each step's choice and totals; replaying totals from the
+# choices is cheaper than storing a snapshot per step.
+RECORD = "deltas"
+
+# Artifact formats: one indented JSON file per run, one columnar
+# :mod:`analytics.batch_store` file per batch, or one line per run appended
+# to the :mod:`analytics.run_log` of the output directory.
+FORMATS = ("json", "batch", "log")
+
+
+def _default_output_dir() -> Path:
+    return Path(__file__).resolve().parents[2] / "data" / "test_results"
+
+
+def build_run_data(
     policy_name: str,
     seed: int,
-    max_steps: int = 100,
+    result: Dict[str, Any],
     dominance_threshold: int = 80,
-    output_dir: Path | None = None,
+    timestamp: str | None = None,
+    max_steps: int | None = None,
+    bundle: ScenarioBundle | None = None,
+    calibration: Dict[str, Any] | None = None,
 ) -> Dict[str, Any]:
-    """Execute a run and write the detail JSON file.
+    """Convert a runner result into the run artifact layout.
 
-    Parameters
-    ----------
-    policy_name:
-        Name of the policy to execute.
-    seed:
-        Seed for deterministic execution.
-    max_steps:
-        Maximum number of steps to execute.
-    dominance_threshold:
-        Threshold used for trait dominance classification.
-    output_dir:
-        Base directory for results. Defaults to repository root.
+    ``timestamp`` defaults to the current UTC time; batch writers pass a
+    single value so every artifact of one invocation is reproducible.
+
+    When ``bundle`` is given the artifact also records ``maxSteps``, the
+    bundle's ``contentDigest`` and the ``sceneHashes`` of the visited scenes
+    in step order, which ``testrig resim`` uses to find stale runs.  The
+    ``calibration`` config of a calibrated run is stored with it.
     """
 
-    policy_cls = POLICIES[policy_name]
-    policy = policy_cls()
-    result = run(policy, seed, max_steps)
     trace = result["trace"]
     final = result["final"]
 
     run_id = f"{policy_name}_{seed}"
-    steps = len([t for t in trace if not t.get("end")])
-    timeline = [
-        {"step": t["step"], "totals": t["totals"]}
-        for t in trace
-        if not t.get("end")
-    ]
+    # Columnar traces rebuild step dicts on every pass; materialise once.
+    records = [t for t in trace if not t.get("end")]
+    steps = len(records)
+    timeline = [{"step": t["step"], "totals": t["totals"]} for t in records]
     decisions = [
         {
             "step": t["step"],
@@ -58,11 +70,10 @@ def write_run(
             "secondary": t.get("secondary"),
             "sw": t.get("sw", 0.0),
         }
-        for t in trace
-        if not t.get("end")
+        for t in records
     ]
 
-    run_data: Dict[str, Any] = {
+    run_data = {
         "runId": run_id,
         "policy": policy_name,
         "seed": seed,
@@ -74,18 +85,273 @@ def write_run(
         "timeline": timeline,
         "decisions": decisions,
         "revealText": final.get("revealText", ""),
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": timestamp or datetime.utcnow().isoformat(),
         "dominance_threshold": dominance_threshold,
     }
+    if bundle is not None:
+        run_data["maxSteps"] = max_steps
+        run_data["contentDigest"] = bundle.digest
+        if hasattr(trace, "scene"):
+            run_data["sceneHashes"] = [trace.scene(i).digest for i in range(trace.steps)]
+        else:
+            run_data["sceneHashes"] = [s.digest for s in bundle.scenes[:steps]]
+    if calibration is not None:
+        # Applied weights differ from pw/sw, so keep them per decision.
+        for decision, t in zip(decisions, records):
+            decision["delta"] = t.get("delta", {})
+        run_data["calibration"] = calibration
+    return run_data
 
-    out_dir = output_dir or Path(__file__).resolve().parents[2] / "data" / "test_results"
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_file = out_dir / f"run_{run_id}.json"
+
+def _write_run_data(run_data: Dict[str, Any], out_dir: Path) -> None:
+    out_file = out_dir / f"run_{run_data['runId']}.json"
     with out_file.open("w", encoding="utf-8") as fh:
         json.dump(run_data, fh, indent=2)
 
+
+def batch_path(out_dir: Path, policy_name: str, seeds: List[int]) -> Path:
+    """Return the batch file written for ``seeds`` of ``policy_name``."""
+
+    return out_dir / f"batch_{policy_name}_{seeds[0]}-{seeds[-1]}{SUFFIX}"
+
+
+def supersede_batches(out_dir: Path, policy_name: str, seeds: Iterable[int]) -> List[Dict[str, Any]]:
+    """Take the runs of ``seeds`` out of the existing batch files of a policy.
+
+    Every file named by :func:`batch_path` for ``policy_name`` that holds one
+    of ``seeds`` is removed, and its other runs are written back to a batch
+    file named after their own seeds, so each seed stays in exactly one
+    file whatever ranges earlier invocations used.  Returns the runs taken
+    out, for callers that subtract them from the choice histogram.
+    """
+
+    wanted = set(seeds)
+    if not wanted:
+        return []
+    lo, hi = min(wanted), max(wanted)
+    pattern = re.compile(rf"batch_{re.escape(policy_name)}_(\d+)-(\d+){re.escape(SUFFIX)}")
+    removed: List[Dict[str, Any]] = []
+    for path in sorted(out_dir.glob(f"batch_{policy_name}_*{SUFFIX}")):
+        match = pattern.fullmatch(path.name)
+        if match is None or int(match.group(2)) < lo or int(match.group(1)) > hi:
+            continue
+        runs = load_runs(path)
+        superseded = [data for data in runs if data.get("seed") in wanted]
+        if not superseded:
+            continue
+        kept = [data for data in runs if data.get("seed") not in wanted]
+        path.unlink()
+        if kept:
+            save_runs(batch_path(out_dir, policy_name, [data["seed"] for data in kept]), kept)
+        removed.extend(superseded)
+    return removed
+
+
+def _check_format(format: str) -> None:
+    if format not in FORMATS:
+        raise ValueError(f"Unknown artifact format: {format!r}")
+
+
+def write_run(
+    policy_name: str,
+    seed: int,
+    max_steps: int = 100,
+    dominance_threshold: int = 80,
+    output_dir: Path | None = None,
+    bundle: ScenarioBundle | None = None,
+    calibration: Dict[str, Any] | None = None,
+    format: str = "json",
+) -> Dict[str, Any]:
+    """Execute a run and write the detail JSON file.
+
+    Parameters
+    ----------
+    policy_name:
+        Name of the policy to execute.
+    seed:
+        Seed for deterministic execution.
+    max_steps:
+        Maximum number of steps to execute.
+    dominance_threshold:
+        Threshold used for trait dominance classification.
+    output_dir:
+        Base directory for results. Defaults to repository root.
+    bundle:
+        Compiled scenario content. Defaults to the process-wide cached bundle.
+    calibration:
+        Optional calibrator config applied to the run.
+    format:
+        ``"json"`` for ``run_<runId>.json``, ``"batch"`` for a one-run
+        batch file named by :func:`batch_path` or ``"log"`` to append to
+        the output directory's run log.
+    """
+
+    _check_format(format)
+    bundle = bundle or load_bundle()
+    policy_cls = POLICIES[policy_name]
+    policy = policy_cls()
+    result = run(policy, seed, max_steps, bundle=bundle, record=RECORD, calibrator=calibration)
+    run_data = build_run_data(
+        policy_name,
+        seed,
+        result,
+        dominance_threshold,
+        max_steps=max_steps,
+        bundle=bundle,
+        calibration=calibration,
+    )
+
+    out_dir = output_dir or _default_output_dir()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if format == "batch":
+        supersede_batches(out_dir, policy_name, [seed])
+        save_runs(batch_path(out_dir, policy_name, [seed]), [run_data])
+    elif format == "log":
+        with RunLog(out_dir / LOG_DIR, mode="a") as log:
+            log.append(run_data)
+    else:
+        _write_run_data(run_data, out_dir)
+
     return run_data
 
 
-__all__ = ["write_run"]
+def _iter_run_data(
+    policy_name: str,
+    seeds: List[int],
+    max_steps: int,
+    dominance_threshold: int,
+    bundle: ScenarioBundle | None,
+    timestamp: str | None,
+    calibration: Dict[str, Any] | None,
+    histogram: ChoiceHistogram | None,
+) -> Iterator[Dict[str, Any]]:
+    bundle = bundle or load_bundle()
+    results = run_batch(
+        POLICIES[policy_name],
+        seeds,
+        max_steps,
+        bundle=bundle,
+        record=RECORD,
+        calibrator=calibration,
+    )
+    for seed, result in zip(seeds, results):
+        yield build_run_data(
+            policy_name,
+            seed,
+            result,
+            dominance_threshold,
+            timestamp=timestamp,
+            max_steps=max_steps,
+            bundle=bundle,
+            calibration=calibration,
+        )
+        if histogram is not None:
+            histogram.add_trace(policy_name, result["trace"])
+
+
+def write_batch(
+    policy_name: str,
+    seeds: Iterable[int],
+    max_steps: int = 100,
+    dominance_threshold: int = 80,
+    output_dir: Path | None = None,
+    bundle: ScenarioBundle | None = None,
+    timestamp: str | None = None,
+    calibration: Dict[str, Any] | None = None,
+    histogram: ChoiceHistogram | None = None,
+    format: str = "json",
+    run_log: RunLog | None = None,
+) -> List[str]:
+    """Execute runs for many seeds via :func:`run_batch` and write each file.
+
+    Produces the same files as calling :func:`write_run` once per seed but
+    shares the runner's per-scene setup across the whole batch.  With
+    ``format="batch"`` all runs go to a single batch file named by
+    :func:`batch_path` instead, after :func:`supersede_batches` took these
+    seeds out of earlier batch files, and with ``format="log"`` they are
+    appended to ``run_log``, by default the output directory's log.  When
+    ``timestamp`` is given it is stamped on every artifact instead of the
+    time each run finished.  ``calibration`` is an optional calibrator
+    config applied to every run.  The choices of every run are counted into
+    ``histogram`` when one is given.
+
+    Returns
+    -------
+    list of str
+        The ``runId`` of every run written, in seed order.
+    """
+
+    _check_format(format)
+    out_dir = output_dir or _default_output_dir()
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    seeds = list(seeds)
+    run_ids: List[str] = []
+    batch: List[Dict[str, Any]] = []
+    log = run_log if run_log is not None or format != "log" else RunLog(out_dir / LOG_DIR, mode="a")
+    try:
+        for run_data in _iter_run_data(
+            policy_name, seeds, max_steps, dominance_threshold, bundle, timestamp, calibration, histogram
+        ):
+            if format == "batch":
+                batch.append(run_data)
+            elif format == "log":
+                log.append(run_data)
+            else:
+                _write_run_data(run_data, out_dir)
+            run_ids.append(run_data["runId"])
+    finally:
+        if log is not None and run_log is None:
+            log.close()
+    if batch:
+        supersede_batches(out_dir, policy_name, seeds)
+        save_runs(batch_path(out_dir, policy_name, seeds), batch)
+    return run_ids
+
+
+def write_counted_batch(
+    policy_name: str, seeds: Iterable[int], **options: Any
+) -> Tuple[List[str], ChoiceHistogram]:
+    """Run :func:`write_batch` and also return the batch's choice histogram.
+
+    Meant for worker processes, whose histograms are merged by the caller.
+    """
+
+    histogram = ChoiceHistogram()
+    run_ids = write_batch(policy_name, seeds, histogram=histogram, **options)
+    return run_ids, histogram
+
+
+def collect_counted_batch(
+    policy_name: str,
+    seeds: Iterable[int],
+    max_steps: int = 100,
+    dominance_threshold: int = 80,
+    timestamp: str | None = None,
+    calibration: Dict[str, Any] | None = None,
+) -> Tuple[List[Dict[str, Any]], ChoiceHistogram]:
+    """Return the artifacts and choice histogram of a batch without writing.
+
+    Meant for worker processes whose runs the caller appends to a run log,
+    which only one process may write.
+    """
+
+    histogram = ChoiceHistogram()
+    runs = list(
+        _iter_run_data(
+            policy_name, list(seeds), max_steps, dominance_threshold, None, timestamp, calibration, histogram
+        )
+    )
+    return runs, histogram
+
 
+__all__ = [
+    "build_run_data",
+    "batch_path",
+    "supersede_batches",
+    "write_run",
+    "write_batch",
+    "write_counted_batch",
+    "collect_counted_batch",
+    "FORMATS",
+]
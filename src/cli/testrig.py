@@ -3,41 +3,210 @@
 from __future__ import annotations
 
 import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, Iterator, List, Tuple
 
+from ..analytics.choice_histogram import HISTOGRAM_FILE, ChoiceHistogram, update_histogram
+from ..analytics.run_log import LOG_DIR, RunLog, open_log
 from ..testing.policies import POLICIES
-from .run_writer import write_run
-from .build_index import build_index
+from ..testing.search import search
+from ..testing.sequential import estimate
+from .resim import resimulate
+from .run_writer import (
+    FORMATS,
+    collect_counted_batch,
+    supersede_batches,
+    write_batch,
+    write_counted_batch,
+)
+from .build_index import refresh_index
 
+# Upper bound on seeds per worker task; keeps memory per task small while
+# amortising process start-up and pickling.  Batch files cover the seeds of
+# one ``MAX_CHUNK``-aligned range each.
+MAX_CHUNK = 1000
 
-def cmd_run(args: argparse.Namespace) -> None:
-    for i in range(args.runs):
-        seed = args.seed + i if args.seed is not None else i
-        write_run(
-            policy_name=args.policy,
-            seed=seed,
-            max_steps=args.max_steps,
-            dominance_threshold=args.dominance_threshold,
-            output_dir=Path(args.output),
-        )
 
-    build_index(Path(args.output))
-    print(f"Completed {args.runs} runs for policy '{args.policy}'.")
+def _seed_chunks(start: int, runs: int, workers: int, format: str = "json") -> Iterator[range]:
+    """Split ``runs`` seeds from ``start`` into contiguous ranges.
+
+    With the ``batch`` format every chunk is the part of one
+    ``MAX_CHUNK``-aligned seed range that is requested, so the same seeds
+    are written to the same batch files whatever the number of workers.
+    """
+
+    end = start + runs
+    if format == "batch":
+        lo = start
+        while lo < end:
+            hi = min((lo // MAX_CHUNK + 1) * MAX_CHUNK, end)
+            yield range(lo, hi)
+            lo = hi
+        return
+    size = max(1, min(MAX_CHUNK, -(-runs // (workers * 4))))
+    for lo in range(start, end, size):
+        yield range(lo, min(lo + size, end))
+
+
+def _load_calibration(path: str | None) -> Dict[str, Any] | None:
+    """Read a calibrator config file, as in ``configs/calibrator_v1.json``."""
+
+    if not path:
+        return None
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _previous_artifacts(
+    output: Path, tasks: List[Tuple[str, range]], format: str = "json"
+) -> List[Dict[str, Any]]:
+    """Load the artifacts ``tasks`` will overwrite, if they are counted already.
+
+    With the ``batch`` format the seeds are taken out of every earlier batch
+    file holding them, whatever its seed range, and those runs are returned
+    even without a histogram so no stale file is left behind.
+    """
+
+    if format == "batch":
+        seeds: Dict[str, List[int]] = {}
+        for name, chunk in tasks:
+            seeds.setdefault(name, []).extend(chunk)
+        previous = []
+        for name, wanted in seeds.items():
+            previous.extend(supersede_batches(output, name, wanted))
+        return previous if (output / HISTOGRAM_FILE).exists() else []
+    if not (output / HISTOGRAM_FILE).exists():
+        return []
+    previous = []
+    log = open_log(output) if format == "log" else None
+    for name, seeds in tasks:
+        if format == "log":
+            if log is not None:
+                runs = (log.get(f"{name}_{seed}") for seed in seeds)
+                previous.extend(run for run in runs if run is not None)
+            continue
+        for seed in seeds:
+            file = output / f"run_{name}_{seed}.json"
+            if file.exists():
+                with file.open("r", encoding="utf-8") as fh:
+                    previous.append(json.load(fh))
+    return previous
+
+
+def _execute(policy_names: List[str], args: argparse.Namespace) -> None:
+    """Write runs for every policy, serially or across a process pool.
+
+    All artifacts of one invocation share a single timestamp, so a parallel
+    execution writes exactly the same bytes as a serial one.  The choices of
+    every run are counted while simulating and merged into the output's
+    choice histogram.  With the ``log`` format, workers return their runs
+    and only this process appends them to the run log, in task order.
+    """
+
+    start = args.seed if args.seed is not None else 0
+    workers = getattr(args, "workers", 1) or 1
+    format = getattr(args, "format", "json")
+    output = Path(args.output)
+    timestamp = datetime.utcnow().isoformat()
+
+    tasks: List[Tuple[str, range]] = [
+        (name, chunk)
+        for name in policy_names
+        for chunk in _seed_chunks(start, args.runs, workers, format)
+    ]
+    options = dict(
+        max_steps=args.max_steps,
+        dominance_threshold=args.dominance_threshold,
+        output_dir=output,
+        timestamp=timestamp,
+        calibration=_load_calibration(getattr(args, "calibration", None)),
+        format=format,
+    )
+
+    previous = _previous_artifacts(output, tasks, format)
+    histogram = ChoiceHistogram()
+    log = RunLog(output / LOG_DIR, mode="a") if format == "log" else None
+    try:
+        if workers <= 1:
+            for name, seeds in tasks:
+                write_batch(name, seeds, histogram=histogram, run_log=log, **options)
+        elif log is not None:
+            collect = {k: v for k, v in options.items() if k not in ("output_dir", "format")}
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(collect_counted_batch, name, seeds, **collect) for name, seeds in tasks
+                ]
+                for future in futures:
+                    runs, counts = future.result()
+                    log.extend(runs)
+                    histogram.merge(counts)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(write_counted_batch, name, seeds, **options) for name, seeds in tasks
+                ]
+                for future in futures:
+                    histogram.merge(future.result()[1])
+    finally:
+        if log is not None:
+            log.close()
+
+    refresh_index(output)
+    update_histogram(output, histogram, previous)
+    for name in policy_names:
+        print(f"Completed {args.runs} runs for policy '{name}'.")
+
+
+def cmd_run(args: argparse.Namespace) -> None:
+    _execute([args.policy], args)
 
 
 def cmd_suite(args: argparse.Namespace) -> None:
     policies = POLICIES if args.all else {args.policy: POLICIES[args.policy]}
-    for name, _ in policies.items():
-        run_args = argparse.Namespace(
-            policy=name,
-            seed=args.seed,
-            runs=args.runs,
-            max_steps=args.max_steps,
-            dominance_threshold=args.dominance_threshold,
-            output=args.output,
-        )
-        cmd_run(run_args)
+    _execute(list(policies), args)
+
+
+def cmd_adaptive(args: argparse.Namespace) -> None:
+    result = estimate(
+        POLICIES[args.policy],
+        args.target,
+        tolerance=args.tolerance,
+        confidence=args.confidence,
+        batch=args.batch,
+        min_runs=args.min_runs,
+        max_runs=args.max_runs,
+        seed=args.seed,
+        max_steps=args.max_steps,
+        workers=args.workers,
+    )
+    for name, (mean, half) in result.intervals().items():
+        print(f"{name}: {mean:.4f} ± {half:.4f}")
+    status = "converged" if result.converged else "stopped at --max-runs"
+    print(f"Used {result.runs} runs for policy '{args.policy}' ({status}).")
+
+    if args.output:
+        args.runs = result.runs
+        _execute([args.policy], args)
+
+
+def cmd_search(args: argparse.Namespace) -> None:
+    for objective in args.objective:
+        result = search(objective, max_steps=args.max_steps)
+        print(f"{objective}: {result.value:g}")
+        for step, (scene_id, choice_id) in enumerate(result.choices(), start=1):
+            print(f"  {step:3d} {scene_id} -> {choice_id}")
+        counts = ", ".join(f"{k}={v}" for k, v in sorted(result.flag_counts().items()))
+        print(f"  flags: {counts or 'none'}")
+
+
+def cmd_resim(args: argparse.Namespace) -> None:
+    output = Path(args.output)
+    csv_path = Path(args.csv) if args.csv else None
+    run_ids, reused = resimulate(output, csv_path, workers=args.workers)
+    print(f"Re-simulated {len(run_ids)} runs; reused {reused} unchanged runs.")
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -51,6 +220,9 @@ def build_parser() -> argparse.ArgumentParser:
     run_p.add_argument("--max-steps", type=int, default=100)
     run_p.add_argument("--dominance-threshold", type=int, default=80)
     run_p.add_argument("--output", default="data/test_results")
+    run_p.add_argument("--workers", type=int, default=1, help="worker processes")
+    run_p.add_argument("--calibration", help="calibrator config JSON applied to every run")
+    run_p.add_argument("--format", choices=FORMATS, default="json", help="artifact format")
     run_p.set_defaults(func=cmd_run)
 
     suite_p = sub.add_parser("suite", help="run a suite of policies")
@@ -61,8 +233,54 @@ def build_parser() -> argparse.ArgumentParser:
     suite_p.add_argument("--max-steps", type=int, default=100)
     suite_p.add_argument("--dominance-threshold", type=int, default=80)
     suite_p.add_argument("--output", default="data/test_results")
+    suite_p.add_argument("--workers", type=int, default=1, help="worker processes")
+    suite_p.add_argument("--calibration", help="calibrator config JSON applied to every run")
+    suite_p.add_argument("--format", choices=FORMATS, default="json", help="artifact format")
     suite_p.set_defaults(func=cmd_suite)
 
+    adapt_p = sub.add_parser(
+        "adaptive", help="run a policy until target metrics reach a tolerance"
+    )
+    adapt_p.add_argument("--policy", choices=POLICIES.keys(), required=True)
+    adapt_p.add_argument(
+        "--target",
+        action="append",
+        required=True,
+        help="metric to estimate, e.g. reveal:Hubris or share:Fear (repeatable)",
+    )
+    adapt_p.add_argument("--tolerance", type=float, default=0.02)
+    adapt_p.add_argument("--confidence", type=float, default=0.95)
+    adapt_p.add_argument("--batch", type=int, default=200)
+    adapt_p.add_argument("--min-runs", type=int, default=200)
+    adapt_p.add_argument("--max-runs", type=int, default=100_000)
+    adapt_p.add_argument("--seed", type=int, default=0)
+    adapt_p.add_argument("--max-steps", type=int, default=100)
+    adapt_p.add_argument("--dominance-threshold", type=int, default=80)
+    adapt_p.add_argument(
+        "--output", default=None, help="also write artifacts for the seeds used"
+    )
+    adapt_p.add_argument("--workers", type=int, default=1, help="worker processes")
+    adapt_p.add_argument("--format", choices=FORMATS, default="json", help="artifact format")
+    adapt_p.set_defaults(func=cmd_adaptive)
+
+    search_p = sub.add_parser("search", help="find worst-case choice paths")
+    search_p.add_argument(
+        "--objective",
+        action="append",
+        required=True,
+        help="trait:<Trait> or flag:scene_cap|major_spacing|trait_cap (repeatable)",
+    )
+    search_p.add_argument("--max-steps", type=int, default=100)
+    search_p.set_defaults(func=cmd_search)
+
+    resim_p = sub.add_parser(
+        "resim", help="re-run stored runs affected by scenario changes"
+    )
+    resim_p.add_argument("--output", default="data/test_results")
+    resim_p.add_argument("--csv", default=None, help="derived CSV to update in place")
+    resim_p.add_argument("--workers", type=int, default=1, help="worker processes")
+    resim_p.set_defaults(func=cmd_resim)
+
     return parser
 
 
@@ -74,4 +292,3 @@ def main(argv: List[str] | None = None) -> None:
 
 if __name__ == "__main__":
     main()
-
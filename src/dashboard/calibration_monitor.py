@@ -77,10 +77,13 @@ layout = html.Div([
 
         ], className="master-panel"),
     ], className="calibration-monitor-content"),
-    # This dcc.Store is the critical component that holds the live state of the mixer
-    dcc.Store(id='calibration-config-store', data={})
 ])
 
+# This dcc.Store holds the live state of the mixer.  It must be placed in the
+# application's top-level layout: the tab content above is re-created on every
+# tab switch and the simulation callback reads the store from other tabs.
+config_store = dcc.Store(id='calibration-config-store', data={})
+
 def register_callbacks(app):
     """Register all callbacks for the calibration monitor to make it interactive."""
 
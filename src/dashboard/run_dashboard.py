@@ -29,7 +29,10 @@ import plotly.graph_objects as go
 ROOT = Path(__file__).resolve().parents[2]
 sys.path.append(str(ROOT / "src"))
 
+from analytics.batch_store import RunBatch, batch_files, run_order
+from analytics.run_log import LOG_DIR, RunLog, open_log
 from testing import runner
+from testing.quantiles import TrajectoryBands, collect_bands
 from testing.policies import (
     random_policy, hubris_forward, control_fear,
     deception_avarice, reckless_chaotic, balanced_human
@@ -38,6 +41,14 @@ from dashboard import calibration_monitor
 
 DATA_DIR = ROOT / "data" / "test_results"
 
+# The dashboard's own run log inside DATA_DIR, so it never appends to the
+# log a testrig run may be writing.
+DASHBOARD_LOG = "dashboard_log"
+
+# Runs summarised by the "Trait Bands" tab, and its per-policy cache.
+BAND_RUNS = 1000
+_BAND_CACHE: Dict[str, TrajectoryBands] = {}
+
 POLICIES = {
     "Seeded Random": {
         "class": random_policy.SeededRandomPolicy,
@@ -144,22 +155,31 @@ def create_metric_card(title, value, subtitle="", trend=None):
 
 
 def _load_history():
-    """Load saved simulation runs from disk."""
+    """Load saved simulation runs from disk.
+
+    JSON and batch files are read in full; runs in the testrig and
+    dashboard run logs are listed from their offset indexes.
+    """
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     history = []
-    for path in sorted(
-        DATA_DIR.glob("run_*.json"),
-        key=lambda p: int(p.stem.split("_")[1]),
-    ):
+    paths = list(DATA_DIR.glob("run_*.json")) + batch_files(DATA_DIR)
+    for path in sorted(paths, key=run_order):
         try:
-            with path.open("r", encoding="utf-8") as fh:
-                run = json.load(fh)
-            run.setdefault(
-                "timestamp", datetime.fromtimestamp(path.stat().st_mtime).isoformat()
-            )
-            history.append(run)
+            if path.suffix == ".json":
+                with path.open("r", encoding="utf-8") as fh:
+                    runs = [json.load(fh)]
+            else:
+                runs = list(RunBatch.load(path))
+            modified = datetime.fromtimestamp(path.stat().st_mtime).isoformat()
+            for run in runs:
+                run.setdefault("timestamp", modified)
+            history.extend(runs)
         except Exception:
             continue
+    for name in (LOG_DIR, DASHBOARD_LOG):
+        log = open_log(DATA_DIR, name)
+        if log is not None:
+            history.extend(log.summaries())
     return history
 
 
@@ -281,6 +301,8 @@ app.layout = html.Div([
                         className="custom-tabs-container", children=[
                     dcc.Tab(label="Trait Progression", value="progression",
                            className="custom-tab", selected_className="custom-tab--selected"),
+                    dcc.Tab(label="Trait Bands", value="bands",
+                           className="custom-tab", selected_className="custom-tab--selected"),
                     dcc.Tab(label="Final Scores", value="final",
                            className="custom-tab", selected_className="custom-tab--selected"),
                     dcc.Tab(label="Decision Flow", value="decisions",
@@ -309,29 +331,26 @@ app.layout = html.Div([
     # Hidden data stores
     dcc.Store(id="selected-policy", data="Seeded Random"),
     dcc.Store(id="simulation-data", data={}),
-    dcc.Store(id="simulation-history", data=INITIAL_HISTORY)
+    dcc.Store(id="simulation-history", data=INITIAL_HISTORY),
+    calibration_monitor.config_store,
 ], className="app-container")
 
 def _save_run(result: Dict[str, Any], policy_name: str) -> None:
-    """Save run result with enhanced metadata."""
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    existing = sorted(DATA_DIR.glob("run_*.json"))
-    fname = DATA_DIR / f"run_{len(existing) + 1}.json"
-
-    data = {
-        "timestamp": datetime.now().isoformat(),
-        "policy": policy_name,
-        "decisions_made": sum(1 for e in result["trace"] if not e.get("end")),
-        "trace": result["trace"],
-        "final": result["final"],
-        "metadata": {
-            "total_steps": len(result["trace"]),
-            "completion_status": "success" if result.get("final") else "incomplete"
+    """Append run result with enhanced metadata to the dashboard run log."""
+    with RunLog(DATA_DIR / DASHBOARD_LOG, mode="a") as log:
+        data = {
+            "runId": f"dashboard_{len(log) + 1}",
+            "timestamp": datetime.now().isoformat(),
+            "policy": policy_name,
+            "decisions_made": sum(1 for e in result["trace"] if not e.get("end")),
+            "trace": result["trace"],
+            "final": result["final"],
+            "metadata": {
+                "total_steps": len(result["trace"]),
+                "completion_status": "success" if result.get("final") else "incomplete"
+            }
         }
-    }
-
-    with fname.open("w", encoding="utf-8") as fh:
-        json.dump(data, fh, indent=2)
+        log.append(data)
 
     return data
 
@@ -370,6 +389,46 @@ def create_enhanced_line_chart(result: Dict[str, Any]):
     )
     return fig
 
+def _policy_bands(policy_name: str, calibration_config=None) -> TrajectoryBands:
+    """Return p5/p50/p95 trajectory bands over ``BAND_RUNS`` seeds, cached."""
+    key = json.dumps([policy_name, calibration_config or None], sort_keys=True)
+    if key not in _BAND_CACHE:
+        _BAND_CACHE[key] = collect_bands(
+            POLICIES[policy_name]["class"], range(BAND_RUNS), calibrator=calibration_config or None
+        )
+    return _BAND_CACHE[key]
+
+def create_band_chart(bands: TrajectoryBands):
+    """Chart the p5-p95 band and median of each trait's total per step."""
+    quantiles = bands.bands((0.05, 0.5, 0.95))
+    ranked = sorted(quantiles, key=lambda t: quantiles[t][0.5][-1] if bands.steps else 0, reverse=True)
+    traits = [t for t in ranked if bands.steps and quantiles[t][0.95][-1] > 0][:6]
+    if not traits: return get_initial_charts()[0]
+
+    colors = ['#3B82F6', '#10B981', '#F59E0B', '#EF4444', '#8B5CF6', '#EC4899']
+    steps = list(range(1, bands.steps + 1))
+    fig = go.Figure()
+    for i, trait in enumerate(traits):
+        color = colors[i % len(colors)]
+        fill = f"rgba({int(color[1:3], 16)},{int(color[3:5], 16)},{int(color[5:7], 16)},0.15)"
+        fig.add_trace(go.Scatter(x=steps, y=quantiles[trait][0.95], mode='lines', line=dict(width=0),
+                                 legendgroup=trait, showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=steps, y=quantiles[trait][0.05], mode='lines', line=dict(width=0),
+                                 fill='tonexty', fillcolor=fill, legendgroup=trait, showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=steps, y=quantiles[trait][0.5], mode='lines', name=trait,
+                                 legendgroup=trait, line=dict(color=color, width=3)))
+
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#E2E8F0', family="Inter"),
+        title=dict(text=f"<b>Trait Bands (p5–p95, median) over {bands.runs} runs</b>", font=dict(size=20), x=0.5),
+        legend=dict(bgcolor='rgba(30,41,59,0.8)', bordercolor='rgba(255,255,255,0.1)', font=dict(color='#E2E8F0')),
+        hovermode='x unified', margin=dict(l=60, r=60, t=80, b=60), height=500,
+        xaxis=dict(gridcolor='rgba(255,255,255,0.1)', title_font=dict(color='#CBD5E1')),
+        yaxis=dict(gridcolor='rgba(255,255,255,0.1)', title_font=dict(color='#CBD5E1'))
+    )
+    return fig
+
 def create_decision_tree_chart(result: Dict[str, Any]):
     """
     Create an enhanced, ascending decision flow timeline with automatic text wrapping
@@ -506,10 +565,11 @@ def update_policy_selection(n_clicks):
     [Output("main-chart", "figure"), Output("status-banner", "children"), Output("status-banner", "className"),
      Output("simulation-data", "data"), Output("results-summary", "children"), Output("quick-stats", "children")],
     Input("run-btn", "n_clicks"),
-    [State("selected-policy", "data"), State("seed-input", "value"), State("simulation-history", "data"), State("chart-tabs", "value")],
+    [State("selected-policy", "data"), State("seed-input", "value"), State("simulation-history", "data"), State("chart-tabs", "value"),
+     State("calibration-config-store", "data")],
     prevent_initial_call=True,
 )
-def run_simulation(n_clicks, policy_name, seed_value, history, active_tab):
+def run_simulation(n_clicks, policy_name, seed_value, history, active_tab, calibration_config):
     if not n_clicks: raise PreventUpdate
 
     try:
@@ -517,7 +577,10 @@ def run_simulation(n_clicks, policy_name, seed_value, history, active_tab):
         policy_cls = POLICIES[policy_name]["class"]
         seed = seed_value if seed_value is not None else random.randint(0, 1_000_000)
 
-        result = runner.run(policy_cls(), seed=seed)
+        # An empty store means the mixer was never touched: run uncalibrated.
+        result = next(runner.run_batch(policy_cls, [seed], calibrator=calibration_config or None))
+        # The columnar trace is expanded once so it can be stored as JSON.
+        result = {"trace": result["trace"].as_dicts(), "final": result["final"]}
         saved_data = _save_run(result, policy_name)
         history = (history or []) + [saved_data]
 
@@ -525,6 +588,7 @@ def run_simulation(n_clicks, policy_name, seed_value, history, active_tab):
         if active_tab == 'progression': fig = create_enhanced_line_chart(result)
         elif active_tab == 'final': fig = create_enhanced_bar_chart(result)
         elif active_tab == 'decisions': fig = create_decision_tree_chart(result)
+        elif active_tab == 'bands': fig = create_band_chart(_policy_bands(policy_name, calibration_config))
         else: fig = create_enhanced_line_chart(result) # Default case
 
         status_content = html.Div([html.Span("✅", className="status-icon"), html.Span(f"Simulation completed! Policy: {policy_name}", className="status-text"), html.Span(f"Seed: {seed}", className="status-detail")])
@@ -554,12 +618,24 @@ def run_simulation(n_clicks, policy_name, seed_value, history, active_tab):
 @app.callback(
     Output("chart-content", "children"),
     [Input("chart-tabs", "value"), Input("simulation-data", "data")],
+    [State("selected-policy", "data"), State("calibration-config-store", "data")],
     prevent_initial_call=True
 )
-def update_chart_content(active_tab, simulation_data):
+def update_chart_content(active_tab, simulation_data, policy_name=None, calibration_config=None):
     if active_tab == "calibration":
         return [calibration_monitor.layout]
 
+    if active_tab == "bands" and policy_name in POLICIES:
+        # Bands summarise many runs of the selected policy, not the last run.
+        return [
+            dcc.Graph(
+                id="main-chart",
+                figure=create_band_chart(_policy_bands(policy_name, calibration_config)),
+                className="main-chart",
+                config={'displayModeBar': False},
+            )
+        ]
+
     if not simulation_data:
         return [
             dcc.Graph(
@@ -2,20 +2,9 @@
 from __future__ import annotations
 from typing import Dict, List, Optional
 
-TRAITS = {
-    "Hubris",
-    "Avarice",
-    "Deception",
-    "Control",
-    "Wrath",
-    "Fear",
-    "Impulsivity",
-    "Envy",
-    "Apathy",
-    "Cynicism",
-    "Moodiness",
-    "Rigidity",
-}
+from .trait_registry import TRAIT_REGISTRY
+
+TRAITS = set(TRAIT_REGISTRY.names)
 
 
 def tag(choice: Dict[str, any],
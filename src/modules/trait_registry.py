@@ -0,0 +1,151 @@
+"""Integer codes for trait names.
+
+Trait labels appear in several spellings across the project: the scenario
+content uses short names (``"Control"``), the testing harness reports the
+long design labels (``"Control & Perfectionism"``) and analytics merges both
+under the short canonical name.  A :class:`TraitRegistry` assigns every
+canonical trait a small integer code and resolves all known aliases to it
+with a single dictionary lookup, so callers can resolve labels once when
+content is loaded and keep per-run totals in fixed-size lists indexed by
+code.
+
+:data:`TRAIT_REGISTRY` covers the twelve design traits used by the
+content, tagging, analytics and the testing harness.  The lowercase
+behavioural axes of :mod:`modules.symbols` and the combination archetypes in
+:mod:`modules.scoring` are a separate vocabulary, looked up by name in small
+text tables, and are not registered.
+"""
+
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+
+
+class TraitRegistry:
+    """Bidirectional mapping between trait labels and integer codes.
+
+    Parameters
+    ----------
+    names:
+        Canonical trait names in code order.
+    aliases:
+        Additional labels mapped to the canonical name they stand for.
+    """
+
+    __slots__ = ("names", "_codes")
+
+    def __init__(self, names: Sequence[str], aliases: Mapping[str, str] | None = None) -> None:
+        self.names: Tuple[str, ...] = tuple(names)
+        codes: Dict[str, int] = {name: code for code, name in enumerate(self.names)}
+        if len(codes) != len(self.names):
+            raise ValueError("Duplicate canonical trait name")
+        for alias, name in (aliases or {}).items():
+            if name not in codes:
+                raise ValueError(f"Alias {alias!r} refers to unknown trait {name!r}")
+            codes.setdefault(alias, codes[name])
+        self._codes: Mapping[str, int] = MappingProxyType(codes)
+
+    # ------------------------------------------------------------------
+    def code(self, label: str) -> int:
+        """Return the code for ``label`` or raise :class:`ValueError`."""
+
+        try:
+            return self._codes[label]
+        except (KeyError, TypeError):
+            raise ValueError(f"Unknown trait: {label}") from None
+
+    def get(self, label: str, default: int | None = None) -> int | None:
+        """Return the code for ``label`` or ``default`` if it is unknown."""
+
+        return self._codes.get(label, default)
+
+    def name(self, code: int) -> str:
+        """Return the canonical name for ``code``."""
+
+        return self.names[code]
+
+    def canonical(self, label: str) -> str:
+        """Return the canonical name for ``label``."""
+
+        return self.names[self.code(label)]
+
+    # ------------------------------------------------------------------
+    def to_array(self, mapping: Mapping[str, float]) -> List[float]:
+        """Return ``mapping`` as a list indexed by code.
+
+        Labels resolving to the same trait are summed in mapping order.
+        """
+
+        values = [0.0] * len(self.names)
+        for label, value in mapping.items():
+            values[self.code(label)] += value
+        return values
+
+    def from_array(self, values: Iterable[float], skip_zero: bool = False) -> Dict[str, float]:
+        """Return a canonical name -> value mapping for a code-indexed list."""
+
+        return {
+            name: value
+            for name, value in zip(self.names, values)
+            if value or not skip_zero
+        }
+
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, label: object) -> bool:
+        return label in self._codes
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __repr__(self) -> str:
+        return f"TraitRegistry({list(self.names)!r})"
+
+
+# Canonical design traits in code order.  The order matches the long labels
+# reported by the testing harness.
+TRAIT_REGISTRY = TraitRegistry(
+    (
+        "Hubris",
+        "Avarice",
+        "Deception",
+        "Control",
+        "Wrath",
+        "Fear",
+        "Impulsivity",
+        "Envy",
+        "Apathy",
+        "Cynicism",
+        "Moodiness",
+        "Rigidity",
+    ),
+    aliases={
+        "Control & Perfectionism": "Control",
+        "Fear & Insecurity": "Fear",
+        "Apathy & Sloth": "Apathy",
+        "Pessimism & Cynicism": "Cynicism",
+        "Moodiness & Indirectness": "Moodiness",
+    },
+)
+
+# Long design labels in code order, as reported by the testing harness.
+TRAIT_LABELS: Tuple[str, ...] = (
+    "Hubris",
+    "Avarice",
+    "Deception",
+    "Control & Perfectionism",
+    "Wrath",
+    "Fear & Insecurity",
+    "Impulsivity",
+    "Envy",
+    "Apathy & Sloth",
+    "Pessimism & Cynicism",
+    "Moodiness & Indirectness",
+    "Rigidity",
+)
+
+
+__all__ = ["TraitRegistry", "TRAIT_REGISTRY", "TRAIT_LABELS"]
@@ -0,0 +1,181 @@
+"""Online, mergeable accumulators for run metrics.
+
+The helpers in :mod:`testing.metrics` take every trace or final summary at
+once.  The accumulators here are updated one run at a time instead, hold a
+constant amount of state regardless of the number of runs and can be
+merged, so partial results from worker processes or separate machines
+combine into the result of one large batch:
+
+>>> left, right = FinalAccumulator(), FinalAccumulator()
+>>> # ... left.add(final) in one process, right.add(final) in another ...
+>>> left.merge(right)  # doctest: +SKIP
+
+Every accumulator is a plain dataclass, so it pickles and can be returned
+from a :class:`concurrent.futures.ProcessPoolExecutor` task.  Merging is
+associative and commutative up to floating point rounding.
+
+Variances use Welford's online update, and merges use Chan et al.'s
+pairwise combination, so they stay accurate over millions of samples.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Mapping, Sequence, TypeVar
+
+_A = TypeVar("_A", "RunningStats", "TraitDistribution", "RevealCounter", "FinalAccumulator")
+
+
+@dataclass
+class RunningStats:
+    """Count, mean and variance of a stream of values."""
+
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def add(self, value: float) -> None:
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """Fold ``other`` into this accumulator and return it."""
+
+        if other.n == 0:
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        return self
+
+    @property
+    def variance(self) -> float:
+        """Sample variance, ``nan`` for fewer than two values."""
+
+        return self.m2 / (self.n - 1) if self.n > 1 else math.nan
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+@dataclass
+class TraitDistribution:
+    """Per-trait statistics of the final normalized shares.
+
+    A trait missing from a run counts as a zero share for that run, like in
+    :func:`testing.metrics.trait_distribution`.  Means are kept as plain
+    sums divided by the run count, so they match that function exactly.
+    """
+
+    runs: int = 0
+    sums: Dict[str, float] = field(default_factory=dict)
+    stats: Dict[str, RunningStats] = field(default_factory=dict)
+
+    def add(self, normalized: Mapping[str, float]) -> None:
+        """Add the ``normalized`` shares of one run."""
+
+        for trait in normalized:
+            if trait not in self.stats:
+                # Earlier runs did not have the trait: n zero samples.
+                self.stats[trait] = RunningStats(n=self.runs)
+                self.sums[trait] = 0.0
+        self.runs += 1
+        for trait, stats in self.stats.items():
+            value = normalized.get(trait, 0.0)
+            self.sums[trait] += value
+            stats.add(value)
+
+    def merge(self, other: "TraitDistribution") -> "TraitDistribution":
+        for trait in other.stats.keys() - self.stats.keys():
+            self.stats[trait] = RunningStats(n=self.runs)
+            self.sums[trait] = 0.0
+        for trait, stats in self.stats.items():
+            theirs = other.stats.get(trait) or RunningStats(n=other.runs)
+            stats.merge(theirs)
+            self.sums[trait] += other.sums.get(trait, 0.0)
+        self.runs += other.runs
+        return self
+
+    def means(self) -> Dict[str, float]:
+        """Return the mean share per trait, ``{}`` before the first run."""
+
+        if self.runs == 0:
+            return {}
+        return {trait: value / self.runs for trait, value in self.sums.items()}
+
+
+@dataclass
+class RevealCounter:
+    """Number of runs revealing each trait in their top three."""
+
+    runs: int = 0
+    hits: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, top3: Sequence[str]) -> None:
+        self.runs += 1
+        for trait in set(top3):
+            self.hits[trait] = self.hits.get(trait, 0) + 1
+
+    def merge(self, other: "RevealCounter") -> "RevealCounter":
+        self.runs += other.runs
+        for trait, count in other.hits.items():
+            self.hits[trait] = self.hits.get(trait, 0) + count
+        return self
+
+    def rate(self, trait: str) -> float:
+        """Fraction of runs with ``trait`` in the top three."""
+
+        if self.runs == 0:
+            return 0.0
+        return self.hits.get(trait, 0) / self.runs
+
+
+@dataclass
+class FinalAccumulator:
+    """Distribution and reveal statistics over ``final`` summaries."""
+
+    distribution: TraitDistribution = field(default_factory=TraitDistribution)
+    reveals: RevealCounter = field(default_factory=RevealCounter)
+
+    @property
+    def runs(self) -> int:
+        return self.reveals.runs
+
+    def add(self, final: Mapping[str, Any]) -> None:
+        """Add one run's ``final`` summary."""
+
+        self.distribution.add(final.get("normalized", {}))
+        self.reveals.add(final.get("top3", []))
+
+    def merge(self, other: "FinalAccumulator") -> "FinalAccumulator":
+        self.distribution.merge(other.distribution)
+        self.reveals.merge(other.reveals)
+        return self
+
+
+def merge_all(accumulators: Iterable[_A]) -> _A:
+    """Merge ``accumulators`` left to right into the first one and return it."""
+
+    items = iter(accumulators)
+    try:
+        result = next(items)
+    except StopIteration:
+        raise ValueError("merge_all() needs at least one accumulator") from None
+    for item in items:
+        result.merge(item)
+    return result
+
+
+__all__ = [
+    "RunningStats",
+    "TraitDistribution",
+    "RevealCounter",
+    "FinalAccumulator",
+    "merge_all",
+]
@@ -0,0 +1,229 @@
+"""Single-pass analysis of simulation traces.
+
+The assertion helpers in :mod:`testing.assertions` and the metrics in
+:mod:`testing.metrics` each walk every trace on their own, so checking a
+batch with all of them expands each columnar trace into step dictionaries
+seven times.  :class:`TraceAnalyzer` computes the same results in one walk
+per trace:
+
+* the four step checks (scene caps, trait caps, major spacing and tag
+  integrity) per trace;
+* path and choice coverage across traces;
+* the mean final trait distribution across traces.
+
+Traces can be fed one at a time, e.g. straight from
+:func:`testing.runner.iter_run`, so a large batch never needs to be held in
+memory.  Columnar :class:`~testing.trace.Trace` objects are read from their
+columns without building step dictionaries; plain lists of step
+dictionaries are walked as they are.  Both give exactly the values of the
+individual helpers.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from .accumulators import TraitDistribution
+from .runner import SCENE_WEIGHT_CAP, TRAIT_CAP_PER_ACT
+from .trace import Trace, require_record
+
+# Names of the per-trace checks, as keys of :attr:`AnalysisReport.errors`.
+CHECKS = ("scene_caps", "trait_caps", "major_spacing", "tag_integrity")
+
+
+@dataclass
+class AnalysisReport:
+    """Combined result of :class:`TraceAnalyzer`.
+
+    Attributes
+    ----------
+    runs:
+        Number of traces analysed.
+    errors:
+        Per check name in :data:`CHECKS`, one error list per trace, equal
+        to the matching ``check_*`` helper of :mod:`testing.assertions`.
+        Empty when the analyzer was created with ``keep_errors=False``.
+    error_counts:
+        Total number of errors per check name across all traces.
+    path_coverage:
+        As :func:`testing.metrics.path_coverage`.
+    choice_coverage:
+        As :func:`testing.metrics.choice_coverage`.
+    trait_distribution:
+        As :func:`testing.metrics.trait_distribution`.
+    """
+
+    runs: int = 0
+    errors: Dict[str, List[List[str]]] = field(default_factory=dict)
+    error_counts: Dict[str, int] = field(default_factory=dict)
+    path_coverage: Set[str] = field(default_factory=set)
+    choice_coverage: Set[str] = field(default_factory=set)
+    trait_distribution: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        """``True`` if no check reported an error."""
+
+        return not any(self.error_counts.values())
+
+
+class TraceAnalyzer:
+    """Accumulate checks and metrics over traces in a single pass each.
+
+    Parameters
+    ----------
+    keep_errors:
+        Keep every trace's error lists for :attr:`AnalysisReport.errors`.
+        Turn off for large batches where only the counts are needed.
+    """
+
+    def __init__(self, keep_errors: bool = True) -> None:
+        self.keep_errors = keep_errors
+        self.runs = 0
+        self._errors: Dict[str, List[List[str]]] = {name: [] for name in CHECKS}
+        self._counts: Dict[str, int] = {name: 0 for name in CHECKS}
+        self._scenes: Set[str] = set()
+        self._choices: Set[str] = set()
+        self._distribution = TraitDistribution()
+
+    def feed(self, trace: Any) -> Dict[str, List[str]]:
+        """Analyse one trace and return its errors per check name.
+
+        Raises
+        ------
+        ValueError
+            If ``trace`` was recorded below the ``"deltas"`` level.
+        """
+
+        require_record(trace, "deltas")
+        if isinstance(trace, Trace):
+            result = self._walk_columns(trace)
+            final = trace.final
+        else:
+            result, final = self._walk_steps(trace)
+
+        self.runs += 1
+        self._distribution.add(final.get("normalized", {}))
+        for name in CHECKS:
+            self._counts[name] += len(result[name])
+            if self.keep_errors:
+                self._errors[name].append(result[name])
+        return result
+
+    def feed_all(self, traces: Iterable[Any]) -> "TraceAnalyzer":
+        """Feed every trace in ``traces`` and return the analyzer."""
+
+        for trace in traces:
+            self.feed(trace)
+        return self
+
+    def report(self) -> AnalysisReport:
+        """Return the combined report for the traces fed so far."""
+
+        return AnalysisReport(
+            runs=self.runs,
+            errors={name: list(lists) for name, lists in self._errors.items()} if self.keep_errors else {},
+            error_counts=dict(self._counts),
+            path_coverage=set(self._scenes),
+            choice_coverage=set(self._choices),
+            trait_distribution=self._distribution.means(),
+        )
+
+    # ------------------------------------------------------------------
+
+    def _walk_columns(self, trace: Trace) -> Dict[str, List[str]]:
+        scene_caps: List[str] = []
+        trait_caps: List[str] = []
+        spacing: List[str] = []
+        tags: List[str] = []
+        trait_cap = TRAIT_CAP_PER_ACT * 1.2
+        columns = trace.columns
+        introductions = trace.introductions
+        present: List[int] = []
+        prev_major = False
+        for step, row in enumerate(trace.rows()):
+            scene_id = trace.scene(step).scene_id
+            self._scenes.add(scene_id)
+            self._choices.add(trace.outcome(step).option.choice_id)
+
+            delta = trace.delta(step)
+            if sum(delta.values()) > SCENE_WEIGHT_CAP:
+                scene_caps.append(f"scene_cap_exceeded:{scene_id}")
+            is_major = any(weight >= 0.8 for weight in delta.values())
+            if is_major and prev_major:
+                spacing.append(f"major_spacing:{scene_id}")
+            prev_major = is_major
+            if not delta:
+                tags.append(f"missing_tags:{scene_id}")
+
+            while len(present) < len(introductions) and introductions[len(present)][1] <= step:
+                present.append(introductions[len(present)][0])
+            for code in present:
+                if row[code] > trait_cap:
+                    trait_caps.append(f"trait_cap_exceeded:{columns[code]}")
+        return {
+            "scene_caps": scene_caps,
+            "trait_caps": trait_caps,
+            "major_spacing": spacing,
+            "tag_integrity": tags,
+        }
+
+    def _walk_steps(
+        self, trace: Iterable[Dict[str, Any]]
+    ) -> Tuple[Dict[str, List[str]], Dict[str, Any]]:
+        """Walk step records once; also return the last one, the summary.
+
+        ``trace`` may be a one-shot iterator such as :func:`iter_run`, so the
+        final record is kept while walking and coverage is only merged once
+        the walk completed.
+        """
+
+        scene_caps: List[str] = []
+        trait_caps: List[str] = []
+        spacing: List[str] = []
+        tags: List[str] = []
+        scenes: Set[str] = set()
+        choices: Set[str] = set()
+        trait_cap = TRAIT_CAP_PER_ACT * 1.2
+        prev_major = False
+        final: Dict[str, Any] = {}
+        for step in trace:
+            final = step
+            if step.get("end"):
+                continue
+            scene_id = step["scene_id"]
+            scenes.add(scene_id)
+            choices.add(step["choice_id"])
+
+            delta = step.get("delta", {})
+            if sum(delta.values()) > SCENE_WEIGHT_CAP:
+                scene_caps.append(f"scene_cap_exceeded:{scene_id}")
+            is_major = any(weight >= 0.8 for weight in delta.values())
+            if is_major and prev_major:
+                spacing.append(f"major_spacing:{scene_id}")
+            prev_major = is_major
+            if not delta:
+                tags.append(f"missing_tags:{scene_id}")
+
+            for trait, total in step.get("totals", {}).items():
+                if total > trait_cap:
+                    trait_caps.append(f"trait_cap_exceeded:{trait}")
+        self._scenes |= scenes
+        self._choices |= choices
+        result = {
+            "scene_caps": scene_caps,
+            "trait_caps": trait_caps,
+            "major_spacing": spacing,
+            "tag_integrity": tags,
+        }
+        return result, final
+
+
+def analyze(traces: Iterable[Any], keep_errors: bool = True) -> AnalysisReport:
+    """Analyse ``traces`` in one pass each and return the combined report."""
+
+    return TraceAnalyzer(keep_errors).feed_all(traces).report()
+
+
+__all__ = ["TraceAnalyzer", "AnalysisReport", "analyze", "CHECKS"]
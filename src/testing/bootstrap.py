@@ -0,0 +1,130 @@
+"""Vectorised bootstrap confidence intervals over simulation runs.
+
+Every statistic we report is either a mean over runs (reveal rates,
+normalized trait shares) or a function of such means (the entropy of the
+aggregate trait distribution).  A bootstrap replicate of a mean is a
+weighted sum of the per-run samples, with weights counting how often each
+run was drawn, so all replicates are computed as one matrix product of a
+``(resamples, runs)`` count matrix with the ``(runs, columns)`` sample
+matrix.  The count matrix is built with a single :func:`numpy.bincount` and
+processed in chunks to bound memory.
+
+Intervals are percentile intervals.  Replicates are reproducible for a
+given ``seed``.  Requires NumPy.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+# Upper bound on the number of count-matrix cells built at once.
+CHUNK_CELLS = 1 << 22
+
+
+@dataclass(frozen=True)
+class Interval:
+    """Point estimate with a bootstrap confidence interval."""
+
+    estimate: float
+    low: float
+    high: float
+
+
+def resample_means(samples: np.ndarray, resamples: int = 2000, seed: int = 0) -> np.ndarray:
+    """Return the column means of ``resamples`` bootstrap resamples.
+
+    Parameters
+    ----------
+    samples:
+        ``(runs,)`` or ``(runs, columns)`` array with one row per run.
+    resamples:
+        Number of bootstrap replicates.
+    seed:
+        Seed of the NumPy generator drawing the resamples.
+
+    Returns
+    -------
+    numpy.ndarray
+        ``(resamples, columns)`` array of replicate means; ``(resamples,)``
+        for one-dimensional ``samples``.
+    """
+
+    samples = np.asarray(samples, dtype=float)
+    flat = samples.ndim == 1
+    matrix = samples.reshape(len(samples), -1)
+    n = len(matrix)
+    if n == 0:
+        raise ValueError("Cannot bootstrap an empty sample")
+    if resamples <= 0:
+        raise ValueError("resamples must be positive")
+
+    rng = np.random.default_rng(seed)
+    out = np.empty((resamples, matrix.shape[1]))
+    chunk = max(1, CHUNK_CELLS // n)
+    for start in range(0, resamples, chunk):
+        size = min(chunk, resamples - start)
+        draws = rng.integers(0, n, size=(size, n))
+        draws += np.arange(size)[:, None] * n
+        counts = np.bincount(draws.ravel(), minlength=size * n).reshape(size, n)
+        out[start : start + size] = counts @ matrix / n
+    return out[:, 0] if flat else out
+
+
+def entropy(distribution: np.ndarray) -> np.ndarray:
+    """Shannon entropy in bits along the last axis of non-negative weights.
+
+    Rows summing to zero have zero entropy, like
+    :func:`analytics.baseline_metrics._entropy`.
+    """
+
+    weights = np.clip(np.asarray(distribution, dtype=float), 0.0, None)
+    total = weights.sum(axis=-1, keepdims=True)
+    p = np.divide(weights, total, out=np.zeros_like(weights), where=total > 0)
+    logs = np.log2(p, out=np.zeros_like(p), where=p > 0)
+    return -(p * logs).sum(axis=-1)
+
+
+def percentile_interval(estimate: float, replicates: np.ndarray, confidence: float = 0.95) -> Interval:
+    """Return ``estimate`` with the percentile interval of ``replicates``."""
+
+    alpha = (1.0 - confidence) / 2
+    low, high = np.quantile(replicates, [alpha, 1.0 - alpha])
+    return Interval(float(estimate), float(low), float(high))
+
+
+def mean_intervals(
+    samples: np.ndarray, resamples: int = 2000, confidence: float = 0.95, seed: int = 0
+) -> List[Interval]:
+    """Return the bootstrap interval of every column mean of ``samples``."""
+
+    matrix = np.asarray(samples, dtype=float).reshape(len(samples), -1)
+    replicates = resample_means(matrix, resamples, seed)
+    estimates = matrix.mean(axis=0)
+    return [
+        percentile_interval(estimates[j], replicates[:, j], confidence)
+        for j in range(matrix.shape[1])
+    ]
+
+
+def entropy_interval(
+    samples: np.ndarray, resamples: int = 2000, confidence: float = 0.95, seed: int = 0
+) -> Interval:
+    """Return the interval of the entropy of the summed per-run distributions."""
+
+    matrix = np.asarray(samples, dtype=float).reshape(len(samples), -1)
+    replicates = entropy(resample_means(matrix, resamples, seed))
+    return percentile_interval(float(entropy(matrix.sum(axis=0))), replicates, confidence)
+
+
+__all__ = [
+    "Interval",
+    "resample_means",
+    "entropy",
+    "percentile_interval",
+    "mean_intervals",
+    "entropy_interval",
+    "CHUNK_CELLS",
+]
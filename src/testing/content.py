@@ -0,0 +1,299 @@
+"""Compiled scenario content shared by the simulation tools.
+
+Parsing the act files is by far the most expensive part of a short run, so
+the content is compiled once into an immutable :class:`ScenarioBundle` and
+cached for the lifetime of the process.  The cache is keyed by the size and
+modification time of every act file; when either changes the files are
+re-read and the bundle is only rebuilt if their content hash differs.
+
+Scenes, choices and the option records handed to policies are all read-only
+so a single bundle can safely be shared by every run, batch and thread.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+
+# ---------------------------------------------------------------------------
+# Constants
+
+# Act number -> scenario file name, in play order.
+SCENARIO_FILES: Dict[int, str] = {
+    1: "act1_mirrors.json",
+    2: "act2_beasts.json",
+    3: "act3_whispers.json",
+}
+
+
+def data_path() -> Path:
+    """Return the repository scenario directory."""
+
+    return Path(__file__).resolve().parents[2] / "data" / "scenarios"
+
+
+# ---------------------------------------------------------------------------
+# Compiled records
+
+
+@dataclass(frozen=True)
+class Option:
+    """A single compiled choice.
+
+    ``index`` is unique across the whole bundle and ``position`` is the
+    option's offset within its scene.  ``record`` is the read-only mapping
+    passed to policies in the runner snapshot.
+    """
+
+    index: int
+    position: int
+    scene_index: int
+    scene_id: str
+    choice_id: str
+    text: str
+    primary: Optional[str]
+    pw: float
+    secondary: Optional[str]
+    sw: float
+    is_decoy: bool
+    record: Mapping[str, Any]
+
+
+@dataclass(frozen=True)
+class Scene:
+    """A compiled scene with its options in content order.
+
+    ``digest`` identifies the scene's content, including its act, so stored
+    runs can tell which scenes changed since they were simulated.
+    """
+
+    index: int
+    scene_id: str
+    act: int
+    options: Tuple[Option, ...]
+    records: Tuple[Mapping[str, Any], ...]
+    data: Mapping[str, Any]
+    digest: str
+
+
+@dataclass(frozen=True)
+class ScenarioBundle:
+    """Immutable, process-wide view of all scenario content.
+
+    Attributes
+    ----------
+    scenes:
+        Every scene across all acts in play order.
+    options:
+        Every option across all scenes, indexed by :attr:`Option.index`.
+    acts:
+        Mapping of act number to the indices of its scenes.
+    digest:
+        SHA-256 over the raw bytes of the act files.
+    """
+
+    scenes: Tuple[Scene, ...]
+    options: Tuple[Option, ...]
+    acts: Mapping[int, Tuple[int, ...]]
+    digest: str
+
+    def scene_dicts(self) -> List[Dict[str, Any]]:
+        """Return mutable copies of the raw scenes with an ``act`` field."""
+
+        return [_thaw(scene.data) for scene in self.scenes]
+
+
+# ---------------------------------------------------------------------------
+# Compilation
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+def content_digest(raw: Mapping[int, bytes]) -> str:
+    """Return the SHA-256 digest identifying a set of act files."""
+
+    digest = hashlib.sha256()
+    for act in sorted(raw):
+        payload = raw[act]
+        digest.update(f"{act}:{len(payload)}:".encode("ascii"))
+        digest.update(payload)
+    return digest.hexdigest()
+
+
+def scene_digest(entry: Mapping[str, Any]) -> str:
+    """Return a short hash of a raw scene entry, independent of formatting."""
+
+    payload = json.dumps(entry, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def compile_bundle(raw: Mapping[int, bytes]) -> ScenarioBundle:
+    """Compile raw act file contents into a :class:`ScenarioBundle`.
+
+    Parameters
+    ----------
+    raw:
+        Mapping of act number to the bytes of its scenario file.  Acts are
+        compiled in ascending order.
+    """
+
+    scenes: List[Scene] = []
+    options: List[Option] = []
+    acts: Dict[int, List[int]] = {}
+
+    for act in sorted(raw):
+        data = json.loads(raw[act].decode("utf-8"))
+        for entry in data.get("scenes", []):
+            entry = dict(entry)
+            entry["act"] = act
+            scene_index = len(scenes)
+            scene_id = entry.get("scene_id")
+
+            scene_options: List[Option] = []
+            for position, choice in enumerate(entry.get("choices", [])):
+                pw = float(choice.get("primary_weight", 0.0))
+                sw = float(choice.get("secondary_weight", 0.0))
+                record = _freeze(
+                    {
+                        "choice_id": choice.get("choice_id"),
+                        "scene_id": scene_id,
+                        "text": choice.get("text", ""),
+                        "tags": {
+                            "primary": choice.get("primary_trait"),
+                            "pw": pw,
+                            "secondary": choice.get("secondary_trait"),
+                            "sw": sw,
+                        },
+                        "is_decoy": pw == 0.0 and sw == 0.0,
+                    }
+                )
+                option = Option(
+                    index=len(options),
+                    position=position,
+                    scene_index=scene_index,
+                    scene_id=scene_id,
+                    choice_id=choice.get("choice_id"),
+                    text=choice.get("text", ""),
+                    primary=choice.get("primary_trait"),
+                    pw=pw,
+                    secondary=choice.get("secondary_trait"),
+                    sw=sw,
+                    is_decoy=record["is_decoy"],
+                    record=record,
+                )
+                options.append(option)
+                scene_options.append(option)
+
+            scenes.append(
+                Scene(
+                    index=scene_index,
+                    scene_id=scene_id,
+                    act=act,
+                    options=tuple(scene_options),
+                    records=tuple(o.record for o in scene_options),
+                    data=_freeze(entry),
+                    digest=scene_digest(entry),
+                )
+            )
+            acts.setdefault(act, []).append(scene_index)
+
+    return ScenarioBundle(
+        scenes=tuple(scenes),
+        options=tuple(options),
+        acts=MappingProxyType({act: tuple(idx) for act, idx in acts.items()}),
+        digest=content_digest(raw),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Process-wide cache
+
+_LOCK = threading.Lock()
+_CACHE: Dict[Path, Tuple[Tuple[Any, ...], ScenarioBundle]] = {}
+
+
+def _stat_key(base: Path) -> Tuple[Any, ...]:
+    key = []
+    for act, fname in sorted(SCENARIO_FILES.items()):
+        file = base / fname
+        try:
+            st = file.stat()
+        except FileNotFoundError:
+            key.append((act, None, None))
+        else:
+            key.append((act, st.st_mtime_ns, st.st_size))
+    return tuple(key)
+
+
+def _read_raw(base: Path) -> Dict[int, bytes]:
+    raw: Dict[int, bytes] = {}
+    for act, fname in SCENARIO_FILES.items():
+        file = base / fname
+        if file.exists():
+            raw[act] = file.read_bytes()
+    return raw
+
+
+def load_bundle(base: Path | None = None) -> ScenarioBundle:
+    """Return the compiled bundle for ``base``, reusing the cached copy.
+
+    The act files are only re-read when their size or modification time
+    changes, and only recompiled when their content hash differs from the
+    cached bundle.
+    """
+
+    base = (base or data_path()).resolve()
+    key = _stat_key(base)
+    with _LOCK:
+        cached = _CACHE.get(base)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        raw = _read_raw(base)
+        if cached is not None and cached[1].digest == content_digest(raw):
+            bundle = cached[1]
+        else:
+            bundle = compile_bundle(raw)
+        _CACHE[base] = (key, bundle)
+        return bundle
+
+
+def clear_cache() -> None:
+    """Drop all cached bundles."""
+
+    with _LOCK:
+        _CACHE.clear()
+
+
+__all__ = [
+    "Option",
+    "Scene",
+    "ScenarioBundle",
+    "SCENARIO_FILES",
+    "compile_bundle",
+    "content_digest",
+    "scene_digest",
+    "load_bundle",
+    "clear_cache",
+    "data_path",
+]
@@ -0,0 +1,227 @@
+"""Bitset coverage of the compiled scenario content.
+
+:func:`testing.metrics.path_coverage` and
+:func:`~testing.metrics.choice_coverage` collect string identifiers into
+sets.  A :class:`CoverageBitmap` tracks the same information as two Python
+integers used as bitsets over :attr:`Scene.index <testing.content.Scene.index>`
+and :attr:`Option.index <testing.content.Option.index>`, so recording a
+trace is a handful of bit operations and merging the coverage of two
+workers is a bitwise OR.
+
+Bitmaps are small plain dataclasses, so they pickle cheaply.  They record
+the digest of the content they index and refuse to merge with a bitmap, or
+record a trace, over different content.  Names are only resolved when reporting, e.g. with
+:meth:`CoverageBitmap.uncovered_choices`.
+
+The coverable universe is every scene a run of ``max_steps`` can reach and
+every option in those scenes except duplicate ``choice_id`` entries, which
+the runner always resolves to the first option with that id.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Tuple
+
+from .content import ScenarioBundle, load_bundle
+from .runner import PolicyFactory, run_batch
+from .trace import Trace, require_record
+
+# (scene_id, choice_id) -> option index, kept for the most recently used
+# content digests only so edited content does not pile up old tables.
+_LOOKUP_DIGESTS = 2
+_LOOKUPS: OrderedDict[str, Dict[Tuple[str, str], int]] = OrderedDict()
+
+
+def _lookup(bundle: ScenarioBundle) -> Dict[Tuple[str, str], int]:
+    table = _LOOKUPS.get(bundle.digest)
+    if table is None:
+        table = {}
+        for option in bundle.options:
+            table.setdefault((option.scene_id, option.choice_id), option.index)
+        _LOOKUPS[bundle.digest] = table
+        while len(_LOOKUPS) > _LOOKUP_DIGESTS:
+            _LOOKUPS.popitem(last=False)
+    else:
+        _LOOKUPS.move_to_end(bundle.digest)
+    return table
+
+
+@dataclass
+class CoverageBitmap:
+    """Scenes and options exercised by a set of runs.
+
+    Attributes
+    ----------
+    digest:
+        Digest of the content the bit positions refer to.
+    scene_mask, option_mask:
+        Bits of every coverable scene and option.
+    scenes, options:
+        Bits of the scenes and options covered so far.
+    runs:
+        Number of traces recorded.
+    """
+
+    digest: str
+    scene_mask: int
+    option_mask: int
+    scenes: int = 0
+    options: int = 0
+    runs: int = 0
+
+    @classmethod
+    def for_bundle(
+        cls, bundle: ScenarioBundle | None = None, max_steps: int | None = None
+    ) -> "CoverageBitmap":
+        """Return an empty bitmap over ``bundle`` for runs of ``max_steps``."""
+
+        bundle = bundle or load_bundle()
+        scenes = bundle.scenes if max_steps is None else bundle.scenes[:max_steps]
+        scene_mask = 0
+        option_mask = 0
+        for scene in scenes:
+            scene_mask |= 1 << scene.index
+            seen = set()
+            for option in scene.options:
+                if option.choice_id not in seen:
+                    seen.add(option.choice_id)
+                    option_mask |= 1 << option.index
+        return cls(bundle.digest, scene_mask, option_mask)
+
+    # ------------------------------------------------------------------
+    # Recording
+
+    def add(self, trace: Any, bundle: ScenarioBundle | None = None) -> None:
+        """Record the scenes and options visited by ``trace``.
+
+        Columnar traces are read directly.  Plain lists of step dictionaries
+        are resolved by id through ``bundle``, which defaults to the cached
+        content.
+
+        Raises
+        ------
+        ValueError
+            If ``trace`` was recorded below the ``"deltas"`` level or over
+            different content than the bitmap.
+        """
+
+        require_record(trace, "deltas")
+        scenes = self.scenes
+        options = self.options
+        if isinstance(trace, Trace):
+            if trace.digest is not None:
+                self._check(trace.digest)
+            for step, scene_index in enumerate(trace.scene_indices):
+                scenes |= 1 << scene_index
+                options |= 1 << trace.outcome(step).option.index
+        else:
+            bundle = bundle or load_bundle()
+            self._check(bundle.digest)
+            lookup = _lookup(bundle)
+            for step in trace:
+                if step.get("end"):
+                    continue
+                index = lookup[(step["scene_id"], step["choice_id"])]
+                scenes |= 1 << bundle.options[index].scene_index
+                options |= 1 << index
+        self.scenes = scenes
+        self.options = options
+        self.runs += 1
+
+    def merge(self, other: "CoverageBitmap") -> "CoverageBitmap":
+        """OR ``other`` into this bitmap and return it."""
+
+        self._check(other.digest)
+        self.scene_mask |= other.scene_mask
+        self.option_mask |= other.option_mask
+        self.scenes |= other.scenes
+        self.options |= other.options
+        self.runs += other.runs
+        return self
+
+    def _check(self, digest: str) -> None:
+        if digest != self.digest:
+            raise ValueError("Coverage bitmaps refer to different scenario content")
+
+    # ------------------------------------------------------------------
+    # Reporting
+
+    @property
+    def saturated(self) -> bool:
+        """``True`` once every coverable scene and option was covered."""
+
+        return (
+            self.scenes & self.scene_mask == self.scene_mask
+            and self.options & self.option_mask == self.option_mask
+        )
+
+    def scene_ratio(self) -> float:
+        """Fraction of coverable scenes covered."""
+
+        total = bin(self.scene_mask).count("1")
+        return bin(self.scenes & self.scene_mask).count("1") / total if total else 1.0
+
+    def choice_ratio(self) -> float:
+        """Fraction of coverable options covered."""
+
+        total = bin(self.option_mask).count("1")
+        return bin(self.options & self.option_mask).count("1") / total if total else 1.0
+
+    def scene_ids(self, bundle: ScenarioBundle | None = None) -> List[str]:
+        """Return the covered scene ids in play order."""
+
+        bundle = self._bundle(bundle)
+        return [s.scene_id for s in bundle.scenes if self.scenes >> s.index & 1]
+
+    def choice_ids(self, bundle: ScenarioBundle | None = None) -> List[str]:
+        """Return the covered choice ids in content order."""
+
+        bundle = self._bundle(bundle)
+        return [o.choice_id for o in bundle.options if self.options >> o.index & 1]
+
+    def uncovered_scenes(self, bundle: ScenarioBundle | None = None) -> List[str]:
+        """Return the coverable scene ids no run visited."""
+
+        bundle = self._bundle(bundle)
+        missing = self.scene_mask & ~self.scenes
+        return [s.scene_id for s in bundle.scenes if missing >> s.index & 1]
+
+    def uncovered_choices(self, bundle: ScenarioBundle | None = None) -> List[Tuple[str, str]]:
+        """Return ``(scene_id, choice_id)`` of every coverable option never chosen."""
+
+        bundle = self._bundle(bundle)
+        missing = self.option_mask & ~self.options
+        return [(o.scene_id, o.choice_id) for o in bundle.options if missing >> o.index & 1]
+
+    def _bundle(self, bundle: ScenarioBundle | None) -> ScenarioBundle:
+        bundle = bundle or load_bundle()
+        self._check(bundle.digest)
+        return bundle
+
+
+def measure(
+    policy_factory: PolicyFactory,
+    seeds: Iterable[int],
+    max_steps: int = 100,
+    bundle: ScenarioBundle | None = None,
+    stop_when_saturated: bool = True,
+) -> CoverageBitmap:
+    """Run ``seeds`` and return their coverage.
+
+    With ``stop_when_saturated`` the remaining seeds are skipped as soon as
+    every coverable scene and option has been covered; :attr:`CoverageBitmap.runs`
+    tells how many seeds were needed.
+    """
+
+    bundle = bundle or load_bundle()
+    coverage = CoverageBitmap.for_bundle(bundle, max_steps)
+    for result in run_batch(policy_factory, seeds, max_steps, bundle, record="deltas"):
+        coverage.add(result["trace"])
+        if stop_when_saturated and coverage.saturated:
+            break
+    return coverage
+
+
+__all__ = ["CoverageBitmap", "measure"]
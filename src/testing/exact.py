@@ -0,0 +1,242 @@
+"""Exact outcome distributions for random play, without Monte Carlo.
+
+Under a random policy the runner's final reveal depends only on the totals
+accumulated over the scene sequence.  :func:`solve` walks the scenes once,
+keeping a map from distinct run states to the probability of reaching them
+and merging every path that lands in the same state.  States hold the
+runner's own floating point totals, so merged paths are indistinguishable
+to the runner and the resulting probabilities are exact for it.
+
+Probabilities are tracked as integer path weights over a common
+denominator and reported as :class:`fractions.Fraction` values.
+
+:func:`solve` answers for a prefix of the game: the reveal a run would
+show if it stopped after ``max_steps`` scenes, as ``run(..., max_steps)``
+does.  The number of distinct states grows with the content and the final
+reveal depends on every total, so no state can be dropped: with the current
+acts there are 169,344 states after the first 20 scenes (about 6 seconds),
+1.4 million after 22 and more than 5 million after 24, so the whole game is
+out of reach.  Distributions of different prefixes cannot be combined into
+that of a longer one.  :func:`solve` therefore defaults to
+``DEFAULT_MAX_STEPS`` scenes and aborts as soon as a scene would need more
+than ``max_states`` states, before storing them.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from fractions import Fraction
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+from modules.reveal import load_reveals, pick_reveal
+from modules.scoring import ARCHETYPES, COMBO_ARCHETYPES, DEFAULT_ARCHETYPE, top_archetype
+
+from .content import ScenarioBundle, load_bundle
+from .runner import TRAITS, _compile_tables, _final_summary
+
+# Choice models supported by :func:`solve`.
+MODELS = ("random", "uniform")
+
+# Longest prefix of the current content solved by default.
+DEFAULT_MAX_STEPS = 20
+
+DEFAULT_MAX_STATES = 500_000
+
+
+def _reveals_path() -> Path:
+    return Path(__file__).resolve().parents[2] / "data" / "payoffs" / "endgame_reveals.json"
+
+
+@dataclass
+class OutcomeDistribution:
+    """Exact probabilities of final reveal outcomes.
+
+    Attributes
+    ----------
+    top3:
+        Probability of each ``top3`` list, keyed by tuple.
+    archetypes:
+        Probability of each archetype name returned by
+        :func:`modules.scoring.top_archetype` on the normalized reveal.  Every
+        entry of ``COMBO_ARCHETYPES``, ``ARCHETYPES`` and the default is
+        present, possibly with probability zero.
+    reveals:
+        Probability of each ``endgame_reveals.json`` template id, including
+        the neutral fallback.
+    states:
+        Number of distinct states at the end of the walk.
+    steps:
+        Number of scenes walked; the outcomes are those of this prefix.
+    """
+
+    top3: Dict[Tuple[str, ...], Fraction] = field(default_factory=dict)
+    archetypes: Dict[str, Fraction] = field(default_factory=dict)
+    reveals: Dict[str, Fraction] = field(default_factory=dict)
+    states: int = 0
+    steps: int = 0
+
+
+# State: (totals by column, content-only codes in insertion order,
+# consecutive major choices capped at 2, recurring choice ids already seen).
+_State = Tuple[Tuple[float, ...], Tuple[int, ...], int, FrozenSet[str]]
+
+
+def _candidates(table, model: str, streak: int, seen: FrozenSet[str]) -> List[int]:
+    """Return the option positions the policy picks from uniformly.
+
+    ``"random"`` mirrors :class:`~testing.policies.random_policy.SeededRandomPolicy`;
+    ``"uniform"`` picks any option.
+    """
+
+    outcomes = table.outcomes
+    candidates = list(range(len(outcomes)))
+    if model == "uniform":
+        return candidates
+
+    if streak >= 2:
+        non_major = [
+            i for i in candidates
+            if outcomes[i].option.pw < 0.8 and outcomes[i].option.sw < 0.8
+        ]
+        if non_major:
+            candidates = non_major
+    unseen = [i for i in candidates if outcomes[i].option.choice_id not in seen]
+    return unseen or candidates
+
+
+def solve(
+    model: str = "random",
+    max_steps: int = DEFAULT_MAX_STEPS,
+    bundle: ScenarioBundle | None = None,
+    reveals: Dict[str, Any] | None = None,
+    max_states: int = DEFAULT_MAX_STATES,
+) -> OutcomeDistribution:
+    """Compute the exact distribution of final outcomes after ``max_steps`` scenes.
+
+    Parameters
+    ----------
+    model:
+        ``"random"`` to model :class:`SeededRandomPolicy` exactly (unseen
+        options first, no third consecutive major) or ``"uniform"`` for a
+        plain uniform choice at every scene.
+    max_steps:
+        Number of scenes in the prefix, as for :func:`testing.runner.run`.
+    bundle:
+        Compiled scenario content.  Defaults to the cached bundle.
+    reveals:
+        Reveal definitions; defaults to ``data/payoffs/endgame_reveals.json``.
+    max_states:
+        Abort with :class:`RuntimeError` as soon as one scene would reach
+        more distinct states than this.
+    """
+
+    if model not in MODELS:
+        raise ValueError(f"Unknown model: {model!r}")
+
+    program = _compile_tables(bundle or load_bundle(), max_steps)
+    reveals = reveals if reveals is not None else load_reveals(_reveals_path())
+    fixed = len(TRAITS)
+
+    # Choice ids shared by several scenes are the only ones whose "seen"
+    # status can change a later decision.
+    scene_ids: Dict[str, set] = {}
+    for table in program.tables:
+        for outcome in table.outcomes:
+            scene_ids.setdefault(outcome.option.choice_id, set()).add(table.scene.index)
+    recurring = {cid for cid, scenes in scene_ids.items() if len(scenes) > 1}
+
+    start: _State = ((0.0,) * len(program.columns), (), 0, frozenset())
+    states: Dict[_State, int] = {start: 1}
+    denominator = 1
+
+    for table in program.tables:
+        scale = math.lcm(*range(1, len(table.outcomes) + 1))
+        denominator *= scale
+
+        # Transitions only depend on the streak and seen set; resolve each
+        # distinct combination once per scene.
+        moves: Dict[Tuple[bool, FrozenSet[str]], List[Tuple[Any, ...]]] = {}
+        merged: Dict[_State, int] = {}
+        for (values, extras, streak, seen), weight in states.items():
+            key = (streak >= 2, seen)
+            if key not in moves:
+                resolved = []
+                for pick in _candidates(table, model, streak, seen):
+                    option = table.outcomes[pick].option
+                    outcome = table.outcomes[table.lookup.get(option.choice_id, 0)]
+                    if outcome.error:
+                        raise ValueError(outcome.error)
+                    resolved.append(
+                        (
+                            outcome.codes,
+                            tuple(code for code, _ in outcome.codes if code >= fixed),
+                            option.pw >= 0.8 or option.sw >= 0.8,
+                            seen | {option.choice_id} if option.choice_id in recurring else seen,
+                        )
+                    )
+                moves[key] = resolved
+
+            picks = moves[key]
+            share = weight * scale // len(picks)
+            for codes, extra_codes, major, new_seen in picks:
+                new_values = list(values)
+                for code, amount in codes:
+                    new_values[code] += amount
+                new_extras = extras
+                for code in extra_codes:
+                    if code not in new_extras:
+                        new_extras += (code,)
+
+                state = (tuple(new_values), new_extras, min(streak + 1, 2) if major else 0, new_seen)
+                total = merged.get(state)
+                if total is None and len(merged) >= max_states:
+                    raise RuntimeError(
+                        f"More than {max_states} states reachable at scene "
+                        f"{table.scene.scene_id!r}; lower max_steps or raise max_states"
+                    )
+                merged[state] = share if total is None else total + share
+        states = merged
+
+    # Many states share a reveal; evaluate each normalized reveal only once
+    # and convert the integer path weights to probabilities at the end.
+    columns = program.columns
+    by_reveal: Dict[Tuple[Tuple[str, int], ...], int] = {}
+    for (values, extras, _, _), weight in states.items():
+        final = _final_summary("", columns, values, list(range(fixed)) + list(extras))
+        key = tuple(final["normalized"].items())
+        by_reveal[key] = by_reveal.get(key, 0) + weight
+
+    top3_weights: Dict[Tuple[str, ...], int] = {}
+    archetype_weights: Dict[str, int] = {
+        name: 0
+        for name, _ in [*COMBO_ARCHETYPES.values(), *ARCHETYPES.values(), DEFAULT_ARCHETYPE]
+    }
+    reveal_weights: Dict[str, int] = {t["id"]: 0 for t in reveals["reveal_templates"]}
+    reveal_weights[reveals["neutral_fallback"]["id"]] = 0
+
+    for items, weight in by_reveal.items():
+        normalized = dict(items)
+        top3 = tuple(sorted(normalized, key=normalized.get, reverse=True)[:3])
+        top3_weights[top3] = top3_weights.get(top3, 0) + weight
+
+        name, _ = top_archetype(normalized)
+        archetype_weights[name] = archetype_weights.get(name, 0) + weight
+
+        reveal_id = pick_reveal(normalized, reveals)["id"]
+        reveal_weights[reveal_id] = reveal_weights.get(reveal_id, 0) + weight
+
+    def _probabilities(weights: Dict[Any, int]) -> Dict[Any, Fraction]:
+        return {key: Fraction(weight, denominator) for key, weight in weights.items()}
+
+    return OutcomeDistribution(
+        top3=_probabilities(top3_weights),
+        archetypes=_probabilities(archetype_weights),
+        reveals=_probabilities(reveal_weights),
+        states=len(states),
+        steps=len(program.tables),
+    )
+
+
+__all__ = ["OutcomeDistribution", "solve", "MODELS", "DEFAULT_MAX_STATES", "DEFAULT_MAX_STEPS"]
@@ -0,0 +1,143 @@
+"""Vectorised lockstep simulation for rule based policies.
+
+:class:`~testing.policies.base.RuleBasedPolicy` scores every option from the
+static scene content alone, so its decision at a scene is the same for every
+run up to the RNG tie-break.  This module exploits that to advance many seeds
+together: trait totals live in a single ``(runs, traits)`` array and each
+scene applies the chosen options' weights to all runs with one indexed
+update.
+
+Each run still owns a :class:`random.Random` seeded exactly as in
+:func:`testing.runner.run` and draws its tie-breaks in the same order, so the
+``final`` summaries are identical to the ones produced by the scalar runner.
+Requires NumPy.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from .content import ScenarioBundle, load_bundle
+from .policies.base import RuleBasedPolicy
+from .runner import TRAITS, _compile_tables, _final_summary
+
+
+def _check_policy(policy: Any) -> RuleBasedPolicy:
+    cls = type(policy)
+    if not isinstance(policy, RuleBasedPolicy) or (
+        cls.__call__ is not RuleBasedPolicy.__call__
+        or cls.score_option is not RuleBasedPolicy.score_option
+    ):
+        raise TypeError(f"{cls.__name__} is not a plain RuleBasedPolicy")
+    return policy
+
+
+def _option_scores(policy: RuleBasedPolicy, codes: Dict[str, int], tables) -> List[np.ndarray]:
+    """Score every option of every scene in one vectorised pass.
+
+    The arithmetic mirrors :meth:`RuleBasedPolicy.score_option` operation
+    for operation so tie detection is exact.
+    """
+
+    width = len(codes) + 1  # trailing column for untagged slots
+    prefer = np.zeros(width)
+    avoid = np.zeros(width)
+    for trait, weight in policy.prefer.items():
+        if trait in codes:
+            prefer[codes[trait]] = weight
+    for trait, weight in policy.avoid.items():
+        if trait in codes:
+            avoid[codes[trait]] = weight
+
+    options = [o.option for t in tables for o in t.outcomes]
+    trash = width - 1
+    pcol = np.array([codes.get(o.primary, trash) for o in options], dtype=np.intp)
+    scol = np.array([codes.get(o.secondary, trash) for o in options], dtype=np.intp)
+    pw = np.array([o.pw for o in options])
+    sw = np.array([o.sw for o in options])
+
+    scores = ((pw * prefer[pcol]) - pw * avoid[pcol]) + sw * prefer[scol] - sw * avoid[scol]
+
+    split: List[np.ndarray] = []
+    offset = 0
+    for table in tables:
+        count = len(table.outcomes)
+        split.append(scores[offset : offset + count])
+        offset += count
+    return split
+
+
+def run_lockstep(
+    policy_factory: Callable[[], RuleBasedPolicy],
+    seeds: Iterable[int],
+    max_steps: int = 100,
+    bundle: ScenarioBundle | None = None,
+) -> List[Dict[str, Any]]:
+    """Simulate all ``seeds`` in lockstep and return their final summaries.
+
+    Parameters
+    ----------
+    policy_factory:
+        Zero-argument callable returning a :class:`RuleBasedPolicy` that
+        does not override ``__call__`` or ``score_option``.
+    seeds:
+        Seeds to execute.
+    max_steps:
+        Maximum number of steps per run.
+    bundle:
+        Compiled scenario content.  Defaults to the cached bundle.
+
+    Returns
+    -------
+    list of dict
+        ``final`` dictionaries in seed order, equal to
+        ``runner.run(policy_factory(), seed, max_steps)["final"]``.
+    """
+
+    policy = _check_policy(policy_factory())
+    seeds = list(seeds)
+    program = _compile_tables(bundle or load_bundle(), max_steps)
+    tables = program.tables
+    columns = program.columns
+    codes = program.codes
+    trash = len(columns)
+    fixed = len(TRAITS)
+
+    runs = len(seeds)
+    rows = np.arange(runs)
+    totals = np.zeros((runs, trash + 1))
+    # Order in which content-only traits first appear; mirrors dict insertion.
+    unseen = np.iinfo(np.int64).max
+    first_seen = np.full((runs, trash + 1), unseen, dtype=np.int64)
+    rngs = [random.Random(seed) for seed in seeds]
+
+    for step, (table, scores) in enumerate(zip(tables, _option_scores(policy, codes, tables))):
+        ties: Tuple[int, ...] = tuple(np.flatnonzero(scores == scores.max()).tolist())
+        picks = np.array([rng.choice(ties) for rng in rngs], dtype=np.intp)
+
+        for position in set(picks.tolist()):
+            if table.outcomes[position].error:
+                raise ValueError(table.outcomes[position].error)
+
+        # Columns receiving the primary and secondary weight of each option;
+        # slots that do not add anything point at the trailing trash column.
+        adds = [o.codes + ((trash, 0.0),) * (2 - len(o.codes)) for o in table.outcomes]
+        for slot in (0, 1):
+            col = np.array([a[slot][0] for a in adds], dtype=np.intp)[picks]
+            weight = np.array([a[slot][1] for a in adds])[picks]
+            totals[rows, col] += weight
+            first_seen[rows, col] = np.minimum(first_seen[rows, col], 2 * step + slot)
+
+    finals: List[Dict[str, Any]] = []
+    for i, seed in enumerate(seeds):
+        extras = [c for c in range(fixed, trash) if first_seen[i, c] != unseen]
+        extras.sort(key=lambda c: first_seen[i, c])
+        order = list(range(fixed)) + extras
+        finals.append(_final_summary(f"run_{seed}", columns, totals[i].tolist(), order))
+    return finals
+
+
+__all__ = ["run_lockstep"]
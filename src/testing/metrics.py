@@ -1,9 +1,24 @@
-"""Metrics helpers for simulation suites."""
+"""Metrics helpers for simulation suites.
+
+Coverage helpers walk the steps of each trace and need runs recorded at the
+``"deltas"`` level or above; distribution and reveal helpers only read the
+``final`` summary and accept traces recorded at any level.
+
+The distribution and reveal helpers are thin wrappers over the online
+accumulators in :mod:`testing.accumulators`; use those directly to report
+on more runs than fit in memory.  The ``*_interval`` variants add bootstrap
+confidence intervals from :mod:`testing.bootstrap` and require NumPy.
+"""
 
 from __future__ import annotations
 
-from collections import defaultdict
-from typing import Dict, Iterable, List, Set
+from typing import TYPE_CHECKING, Dict, Iterable, List, Set, Tuple
+
+from .accumulators import RevealCounter, TraitDistribution
+from .trace import require_record
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .bootstrap import Interval
 
 
 def path_coverage(traces: Iterable[List[Dict]]) -> Set[str]:
@@ -11,6 +26,7 @@ def path_coverage(traces: Iterable[List[Dict]]) -> Set[str]:
 
     scenes: Set[str] = set()
     for trace in traces:
+        require_record(trace, "deltas")
         for step in trace:
             if step.get("end"):
                 continue
@@ -23,6 +39,7 @@ def choice_coverage(traces: Iterable[List[Dict]]) -> Set[str]:
 
     choices: Set[str] = set()
     for trace in traces:
+        require_record(trace, "deltas")
         for step in trace:
             if step.get("end"):
                 continue
@@ -33,27 +50,80 @@ def choice_coverage(traces: Iterable[List[Dict]]) -> Set[str]:
 def trait_distribution(traces: Iterable[List[Dict]]) -> Dict[str, float]:
     """Compute mean trait totals across runs."""
 
-    totals: Dict[str, float] = defaultdict(float)
-    runs = 0
+    distribution = TraitDistribution()
     for trace in traces:
-        runs += 1
-        final = trace[-1]
-        for trait, value in final.get("normalized", {}).items():
-            totals[trait] += value
-
-    if runs == 0:
-        return {}
-    return {trait: value / runs for trait, value in totals.items()}
+        distribution.add(trace[-1].get("normalized", {}))
+    return distribution.means()
 
 
 def reveal_accuracy_rate(finals: Iterable[Dict], trait: str) -> float:
     """Return fraction of runs where ``trait`` appears in top3."""
 
-    finals = list(finals)
-    if not finals:
-        return 0.0
-    hits = sum(1 for f in finals if trait in f.get("top3", []))
-    return hits / len(finals)
+    reveals = RevealCounter()
+    for final in finals:
+        reveals.add(final.get("top3", []))
+    return reveals.rate(trait)
+
+
+def _share_matrix(traces: Iterable[List[Dict]]) -> Tuple[List[str], List[List[float]]]:
+    """Return trait names in first-seen order and one share row per run."""
+
+    finals = [trace[-1].get("normalized", {}) for trace in traces]
+    traits: Dict[str, int] = {}
+    for normalized in finals:
+        for trait in normalized:
+            traits.setdefault(trait, len(traits))
+    rows = [[normalized.get(trait, 0.0) for trait in traits] for normalized in finals]
+    return list(traits), rows
+
+
+def reveal_accuracy_interval(
+    finals: Iterable[Dict],
+    trait: str,
+    resamples: int = 2000,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> "Interval":
+    """Return :func:`reveal_accuracy_rate` with a bootstrap interval."""
+
+    from .bootstrap import Interval, mean_intervals
+
+    hits = [float(trait in f.get("top3", [])) for f in finals]
+    if not hits:
+        return Interval(0.0, 0.0, 0.0)
+    return mean_intervals(hits, resamples, confidence, seed)[0]
+
+
+def trait_distribution_interval(
+    traces: Iterable[List[Dict]],
+    resamples: int = 2000,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> Dict[str, "Interval"]:
+    """Return :func:`trait_distribution` with a bootstrap interval per trait."""
+
+    from .bootstrap import mean_intervals
+
+    traits, rows = _share_matrix(traces)
+    if not rows or not traits:
+        return {}
+    return dict(zip(traits, mean_intervals(rows, resamples, confidence, seed)))
+
+
+def entropy_interval(
+    traces: Iterable[List[Dict]],
+    resamples: int = 2000,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> "Interval":
+    """Return the entropy (bits) of the mean final distribution with a bootstrap interval."""
+
+    from .bootstrap import Interval, entropy_interval as _entropy_interval
+
+    traits, rows = _share_matrix(traces)
+    if not rows or not traits:
+        return Interval(0.0, 0.0, 0.0)
+    return _entropy_interval(rows, resamples, confidence, seed)
 
 
 __all__ = [
@@ -61,5 +131,8 @@ __all__ = [
     "choice_coverage",
     "trait_distribution",
     "reveal_accuracy_rate",
+    "reveal_accuracy_interval",
+    "trait_distribution_interval",
+    "entropy_interval",
 ]
 
@@ -2,9 +2,18 @@
 
 from __future__ import annotations
 
-from typing import Dict, List
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, Tuple
 import random
 
+# Compiled tie lists shared by every policy instance with the same scoring,
+# kept for the most recently compiled content digests only so edited content
+# does not pile up old tables:
+# digest -> {scoring key -> {scene_id: (option records, best options)}}.
+_COMPILED_DIGESTS = 2
+_Tables = Dict[str, Tuple[Any, List[Mapping[str, Any]]]]
+_COMPILED: OrderedDict[str, Dict[Tuple[Any, ...], _Tables]] = OrderedDict()
+
 
 class RuleBasedPolicy:
     """Base class implementing simple trait based scoring.
@@ -12,6 +21,10 @@ class RuleBasedPolicy:
     Subclasses define ``prefer`` and ``avoid`` dictionaries mapping trait
     names to weight multipliers.  During decision making each option is scored
     by multiplying the option's trait weights with these multipliers.
+
+    Scores only depend on the static scene content, so :meth:`compile` can
+    precompute the best options of every scene once; the runner calls it
+    before each run.
     """
 
     prefer: Dict[str, float]
@@ -20,6 +33,7 @@ class RuleBasedPolicy:
     def __init__(self, prefer: Dict[str, float], avoid: Dict[str, float] | None = None):
         self.prefer = prefer
         self.avoid = avoid or {}
+        self._compiled: Dict[str, Tuple[Any, List[Mapping[str, Any]]]] = {}
 
     # ------------------------------------------------------------------
     def score_option(self, option: Dict[str, any]) -> float:
@@ -37,18 +51,65 @@ class RuleBasedPolicy:
         return score
 
     # ------------------------------------------------------------------
-    def __call__(self, state: Dict, rng: random.Random) -> str:
-        """Return the ``choice_id`` for the best scoring option."""
+    def best_options(self, options) -> List[Dict]:
+        """Return the highest scoring options in content order."""
 
         best_score: float | None = None
         best_options: List[Dict] = []
-        for opt in state["options"]:
+        for opt in options:
             score = self.score_option(opt)
             if best_score is None or score > best_score:
                 best_score = score
                 best_options = [opt]
             elif score == best_score:
                 best_options.append(opt)
+        return best_options
+
+    def compile(self, bundle: Any) -> "RuleBasedPolicy":
+        """Precompute the best options of every scene in ``bundle``.
+
+        ``bundle`` is a :class:`~testing.content.ScenarioBundle`.  Tables are
+        shared by all policies with the same class and weights, and are
+        only used for snapshots whose ``options`` are the bundle's own
+        records, so decisions stay seed-for-seed identical to uncompiled
+        scoring.  Changing ``prefer`` or ``avoid`` afterwards requires
+        compiling again.
+        """
+
+        tables = _COMPILED.get(bundle.digest)
+        if tables is None:
+            tables = _COMPILED[bundle.digest] = {}
+            while len(_COMPILED) > _COMPILED_DIGESTS:
+                _COMPILED.popitem(last=False)
+        else:
+            _COMPILED.move_to_end(bundle.digest)
+
+        key = (
+            type(self).score_option,
+            tuple(sorted(self.prefer.items())),
+            tuple(sorted(self.avoid.items())),
+        )
+        compiled = tables.get(key)
+        first = bundle.scenes[0] if bundle.scenes else None
+        if compiled is None or (
+            first is not None and compiled[first.scene_id][0] is not first.records
+        ):
+            compiled = {}
+            for scene in bundle.scenes:
+                compiled.setdefault(scene.scene_id, (scene.records, self.best_options(scene.records)))
+            tables[key] = compiled
+        self._compiled = compiled
+        return self
+
+    def __call__(self, state: Dict, rng: random.Random) -> str:
+        """Return the ``choice_id`` for the best scoring option."""
+
+        options = state["options"]
+        compiled = self._compiled.get(state.get("scene_id"))
+        if compiled is not None and compiled[0] is options:
+            best_options = compiled[1]
+        else:
+            best_options = self.best_options(options)
 
         chosen = rng.choice(best_options)
         return chosen["choice_id"]
@@ -0,0 +1,334 @@
+"""Streaming quantiles of trait trajectories.
+
+:class:`QuantileSketch` is a relative-error quantile sketch in the style of
+DDSketch: every value falls into a logarithmic bucket
+``ceil(log(|x|) / log(gamma))`` with ``gamma = (1 + alpha) / (1 - alpha)``,
+and a quantile is answered from the bucket counts to within a relative
+error of ``alpha``.  The sketch keeps one counter per occupied bucket, so
+its size depends on the spread of the values and not on how many were
+added, and two sketches merge exactly by adding their counters.  Merging
+is therefore associative, commutative and independent of how runs were
+split across processes.
+
+:class:`TrajectoryBands` keeps one sketch per ``(step, trait)`` of the
+cumulative trait totals and answers percentile bands such as p5/p50/p95
+per step, updated one run at a time.
+"""
+
+from __future__ import annotations
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Mapping, Sequence
+
+from modules.trait_registry import TRAIT_REGISTRY
+
+from .content import ScenarioBundle, load_bundle
+from .runner import PolicyFactory, run_batch
+from .trace import Trace
+
+# Relative accuracy of new sketches.
+DEFAULT_ALPHA = 0.01
+
+# Values at or below this magnitude are counted as zero.
+MIN_MAGNITUDE = 1e-9
+
+# Quantiles shown as bands by default.
+BAND_QUANTILES = (0.05, 0.5, 0.95)
+
+
+class QuantileSketch:
+    """Mergeable relative-error quantile sketch.
+
+    Parameters
+    ----------
+    alpha:
+        Relative accuracy: a reported quantile ``v`` of a true value ``x``
+        satisfies ``|v - x| <= alpha * |x|``.
+    """
+
+    __slots__ = ("alpha", "_log_gamma", "positive", "negative", "zeros", "count", "min", "max")
+
+    def __init__(self, alpha: float = DEFAULT_ALPHA) -> None:
+        if not 0 < alpha < 1:
+            raise ValueError("alpha must be between 0 and 1")
+        self.alpha = alpha
+        self._log_gamma = math.log((1 + alpha) / (1 - alpha))
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _key(self, magnitude: float) -> int:
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        gamma = math.exp(self._log_gamma)
+        return 2 * gamma**key / (gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Add ``value`` ``count`` times."""
+
+        if value > MIN_MAGNITUDE:
+            key = self._key(value)
+            self.positive[key] = self.positive.get(key, 0) + count
+        elif value < -MIN_MAGNITUDE:
+            key = self._key(-value)
+            self.negative[key] = self.negative.get(key, 0) + count
+        else:
+            self.zeros += count
+        self.count += count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Add the counts of ``other`` and return this sketch."""
+
+        if other.alpha != self.alpha:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, count in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + count
+        for key, count in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q: float) -> float:
+        """Return the ``q`` quantile, ``nan`` for an empty sketch."""
+
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        if rank == 0:
+            return self.min
+        if rank >= self.count - 1:
+            return self.max
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return max(-self._value(key), self.min)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return min(self._value(key), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serialisable form, read back by :meth:`from_dict`."""
+
+        return {
+            "alpha": self.alpha,
+            "positive": {str(k): v for k, v in self.positive.items()},
+            "negative": {str(k): v for k, v in self.negative.items()},
+            "zeros": self.zeros,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "QuantileSketch":
+        sketch = cls(data["alpha"])
+        sketch.positive = {int(k): v for k, v in data["positive"].items()}
+        sketch.negative = {int(k): v for k, v in data["negative"].items()}
+        sketch.zeros = data["zeros"]
+        sketch.count = data["count"]
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return self.to_dict()
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        other = QuantileSketch.from_dict(state)
+        for name in self.__slots__:
+            setattr(self, name, getattr(other, name))
+
+    def __repr__(self) -> str:
+        return f"QuantileSketch(count={self.count}, buckets={len(self.positive) + len(self.negative)})"
+
+
+class TrajectoryBands:
+    """Quantile sketches of cumulative trait totals per step.
+
+    Bands are keyed by canonical trait name, with the totals of every alias
+    of a trait (the runner's long labels and the content's short names)
+    summed, as in :meth:`~testing.trace.Trace.trait_row`.
+
+    Parameters
+    ----------
+    traits:
+        Traits to track, by any registered label.  Defaults to every trait
+        of :data:`~modules.trait_registry.TRAIT_REGISTRY`; a trait a run has
+        not touched yet counts as a total of zero.
+    alpha:
+        Relative accuracy of every sketch.
+    """
+
+    def __init__(self, traits: Sequence[str] | None = None, alpha: float = DEFAULT_ALPHA) -> None:
+        labels = TRAIT_REGISTRY.names if traits is None else traits
+        self.traits = [TRAIT_REGISTRY.canonical(label) for label in labels]
+        self.alpha = alpha
+        self.runs = 0
+        self._codes = [TRAIT_REGISTRY.code(trait) for trait in self.traits]
+        # trait -> one sketch per step
+        self._sketches: Dict[str, List[QuantileSketch]] = {t: [] for t in self.traits}
+
+    @property
+    def steps(self) -> int:
+        """Number of steps covered by at least one run."""
+
+        return max((len(s) for s in self._sketches.values()), default=0)
+
+    def _at(self, trait: str, step: int) -> QuantileSketch:
+        sketches = self._sketches[trait]
+        while len(sketches) <= step:
+            sketches.append(QuantileSketch(self.alpha))
+        return sketches[step]
+
+    def add(self, trace: Any) -> None:
+        """Add the trajectory of one run.
+
+        ``trace`` is a columnar :class:`~testing.trace.Trace` recorded at
+        ``"deltas"`` level or above, or a list of step dictionaries.
+        """
+
+        if isinstance(trace, Trace):
+            rows: Iterable[Sequence[float]] = trace.trait_rows()
+        else:
+            rows = (
+                self._trait_row(record.get("totals", {}))
+                for record in trace
+                if not record.get("end")
+            )
+        for step, row in enumerate(rows):
+            for trait, code in zip(self.traits, self._codes):
+                self._at(trait, step).add(row[code])
+        self.runs += 1
+
+    @staticmethod
+    def _trait_row(totals: Mapping[str, float]) -> List[float]:
+        values = [0.0] * len(TRAIT_REGISTRY)
+        for label, total in totals.items():
+            code = TRAIT_REGISTRY.get(label)
+            if code is not None:
+                values[code] += total
+        return values
+
+    def merge(self, other: "TrajectoryBands") -> "TrajectoryBands":
+        """Add the sketches of ``other`` and return these bands."""
+
+        if other.traits != self.traits:
+            raise ValueError("Cannot merge bands over different traits")
+        for trait, sketches in other._sketches.items():
+            for step, sketch in enumerate(sketches):
+                self._at(trait, step).merge(sketch)
+        self.runs += other.runs
+        return self
+
+    def sketch(self, trait: str, step: int) -> QuantileSketch:
+        """Return the sketch of ``trait`` after ``step`` (0-based)."""
+
+        return self._sketches[trait][step]
+
+    def bands(self, quantiles: Iterable[float] = BAND_QUANTILES) -> Dict[str, Dict[float, List[float]]]:
+        """Return ``trait -> quantile -> value per step``."""
+
+        quantiles = list(quantiles)
+        return {
+            trait: {q: [s.quantile(q) for s in sketches] for q in quantiles}
+            for trait, sketches in self._sketches.items()
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traits": self.traits,
+            "alpha": self.alpha,
+            "runs": self.runs,
+            "sketches": {t: [s.to_dict() for s in sk] for t, sk in self._sketches.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "TrajectoryBands":
+        bands = cls(data["traits"], data["alpha"])
+        bands.runs = data["runs"]
+        bands._sketches = {
+            TRAIT_REGISTRY.canonical(t): [QuantileSketch.from_dict(s) for s in sk]
+            for t, sk in data["sketches"].items()
+        }
+        return bands
+
+
+def _collect(
+    policy_factory: PolicyFactory,
+    seeds: Sequence[int],
+    max_steps: int,
+    bundle: ScenarioBundle | None,
+    traits: Sequence[str] | None,
+    alpha: float,
+    calibrator: Any,
+) -> TrajectoryBands:
+    bands = TrajectoryBands(traits, alpha)
+    for result in run_batch(
+        policy_factory, seeds, max_steps, bundle, record="deltas", calibrator=calibrator
+    ):
+        bands.add(result["trace"])
+    return bands
+
+
+def collect_bands(
+    policy_factory: PolicyFactory,
+    seeds: Iterable[int],
+    max_steps: int = 100,
+    bundle: ScenarioBundle | None = None,
+    traits: Sequence[str] | None = None,
+    alpha: float = DEFAULT_ALPHA,
+    calibrator: Any = None,
+    workers: int = 1,
+) -> TrajectoryBands:
+    """Run ``seeds`` and return the trajectory bands of their totals.
+
+    Runs are fed to the sketches as they complete, so no trace outlives its
+    run.  With ``workers`` above one the seeds are split across processes
+    and the partial bands merged; ``policy_factory`` must then be picklable
+    and workers use the default content.
+    """
+
+    seeds = list(seeds)
+    if workers <= 1:
+        return _collect(policy_factory, seeds, max_steps, bundle or load_bundle(), traits, alpha, calibrator)
+
+    step = max(1, -(-len(seeds) // workers))
+    bands = TrajectoryBands(traits, alpha)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_collect, policy_factory, seeds[i : i + step], max_steps, None, traits, alpha, calibrator)
+            for i in range(0, len(seeds), step)
+        ]
+        for future in futures:
+            bands.merge(future.result())
+    return bands
+
+
+__all__ = [
+    "QuantileSketch",
+    "TrajectoryBands",
+    "collect_bands",
+    "BAND_QUANTILES",
+    "DEFAULT_ALPHA",
+]
@@ -3,7 +3,9 @@
 This module exposes a :func:`run` function that executes scripted play
 policies against the current scenario content.  It performs minimal rule
 enforcement (scene caps, trait caps, major spacing) and returns a complete
-trace suitable for further analysis.
+trace suitable for further analysis.  :func:`run_batch` executes many seeds
+while building the per-scene option tables only once, and :func:`iter_run`
+streams the step records of a single run as they are produced.
 
 The implementation here is intentionally lightweight – it does not attempt
 to emulate the full game engine.  It simply iterates through the scenario
@@ -13,32 +15,33 @@ to take next.
 
 from __future__ import annotations
 
-import json
 import random
 from dataclasses import dataclass
-from pathlib import Path
-from typing import Callable, Dict, List, Any, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+from calibrator.calibrator import Calibrator
+from modules.trait_registry import TRAIT_LABELS, TRAIT_REGISTRY
+
+from .content import Option, ScenarioBundle, Scene, load_bundle
+from .snapshot import StateView, TotalsView
+from .trace import (
+    FLAG_MAJOR_SPACING_FAIL,
+    FLAG_SCENE_CAP_FAIL,
+    FLAG_TRAIT_CAP_FAIL,
+    RECORD_LEVELS,
+    Trace,
+    check_record,
+    step_record,
+)
 
 
 # ---------------------------------------------------------------------------
 # Constants
 
 # Trait names referenced in content.  They are used only for book keeping and
-# do not represent an exhaustive list of psychological features.
-TRAITS: List[str] = [
-    "Hubris",
-    "Avarice",
-    "Deception",
-    "Control & Perfectionism",
-    "Wrath",
-    "Fear & Insecurity",
-    "Impulsivity",
-    "Envy",
-    "Apathy & Sloth",
-    "Pessimism & Cynicism",
-    "Moodiness & Indirectness",
-    "Rigidity",
-]
+# do not represent an exhaustive list of psychological features.  Their
+# canonical codes come from :data:`modules.trait_registry.TRAIT_REGISTRY`.
+TRAITS: List[str] = list(TRAIT_LABELS)
 
 # Rule constants – deliberately kept simple so that the harness can operate in
 # isolation from the main game engine.
@@ -49,180 +52,138 @@ TRAIT_CAP_PER_ACT = 2.0
 # ---------------------------------------------------------------------------
 # Helpers
 
-def _data_path() -> Path:
-    """Return the repository data directory."""
-
-    return Path(__file__).resolve().parents[2] / "data" / "scenarios"
-
-
 def load_scenarios() -> List[Dict[str, Any]]:
     """Load all scenes across acts.
 
     Each returned element is a dictionary describing a single scene with an
-    additional ``act`` field.
+    additional ``act`` field.  The dictionaries are fresh copies of the cached
+    :class:`~testing.content.ScenarioBundle` content and may be modified
+    freely.
     """
 
-    mapping = {
-        1: "act1_mirrors.json",
-        2: "act2_beasts.json",
-        3: "act3_whispers.json",
-    }
-
-    scenes: List[Dict[str, Any]] = []
-    for act, fname in mapping.items():
-        file = _data_path() / fname
-        if not file.exists():
-            continue
-        with file.open("r", encoding="utf-8") as fh:
-            data = json.load(fh)
-            for scene in data.get("scenes", []):
-                scene = dict(scene)
-                scene["act"] = act
-                scenes.append(scene)
-    return scenes
+    return load_bundle().scene_dicts()
 
 
 # ---------------------------------------------------------------------------
-# Runner
+# Option tables
 
-StateSnapshot = Dict[str, Any]
+StateSnapshot = Mapping[str, Any]
 Policy = Callable[[StateSnapshot, random.Random], str]
+PolicyFactory = Callable[[], Policy]
 
 
-def run(play_policy: Policy, seed: int, max_steps: int = 100) -> Dict[str, Any]:
-    """Execute a simulation run.
+@dataclass(frozen=True)
+class _Outcome:
+    """Precomputed effect of taking a single option."""
 
-    Parameters
-    ----------
-    play_policy:
-        Callable that selects a ``choice_id``.  It receives the current state
-        snapshot and a :class:`random.Random` instance for deterministic
-        behaviour.
-    seed:
-        Seed used to initialise the RNG.
-    max_steps:
-        Maximum number of steps to execute.
+    option: Option
+    adds: Tuple[Tuple[str, float], ...]
+    codes: Tuple[Tuple[int, float], ...]
+    delta: Dict[str, float]
+    scene_total: float
+    is_major: bool
+    error: str | None
 
-    Returns
-    -------
-    dict
-        Mapping containing the full trace under ``"trace"`` and the final
-        summary under ``"final"``.
-    """
 
-    rng = random.Random(seed)
-    scenarios = load_scenarios()
+@dataclass(frozen=True)
+class _SceneTable:
+    scene: Scene
+    lookup: Dict[str, int]
+    outcomes: Tuple[_Outcome, ...]
 
-    totals: Dict[str, float] = {t: 0.0 for t in TRAITS}
-    act_step: Dict[int, int] = {1: 0, 2: 0, 3: 0}
-    trace: List[Dict[str, Any]] = []
-    last_major_step = -99
 
-    for idx, scene in enumerate(scenarios, start=1):
-        if idx > max_steps:
-            break
+@dataclass(frozen=True)
+class _Program:
+    """Option tables and trait columns compiled for one batch of runs.
 
-        act = scene["act"]
-        act_step[act] += 1
-        options: List[Dict[str, Any]] = []
-
-        for choice in scene.get("choices", []):
-            option = {
-                "choice_id": choice.get("choice_id"),
-                "scene_id": scene.get("scene_id"),
-                "text": choice.get("text", ""),
-                "tags": {
-                    "primary": choice.get("primary_trait"),
-                    "pw": float(choice.get("primary_weight", 0.0)),
-                    "secondary": choice.get("secondary_trait"),
-                    "sw": float(choice.get("secondary_weight", 0.0)),
-                },
-                "is_decoy": (
-                    float(choice.get("primary_weight", 0.0)) == 0.0
-                    and float(choice.get("secondary_weight", 0.0)) == 0.0
-                ),
-            }
-            options.append(option)
-
-        snapshot: StateSnapshot = {
-            "act": act,
-            "scene_id": scene.get("scene_id"),
-            "options": options,
-            "totals": totals.copy(),
-            "step": idx - 1,
-            "act_step": act_step[act] - 1,
-        }
-
-        choice_id = play_policy(snapshot, rng)
-        chosen = next((o for o in options if o["choice_id"] == choice_id), options[0])
-        tags = chosen["tags"]
+    ``columns`` lists ``TRAITS`` followed by any other trait used in the
+    content, in order of first appearance; totals are tracked as a list
+    indexed by column code.  ``traits`` maps every column to its canonical
+    :data:`~modules.trait_registry.TRAIT_REGISTRY` code, resolved once here,
+    or ``-1`` for labels the registry does not know.
+    """
 
-        # Tag integrity checks
-        if not tags.get("primary"):
-            raise ValueError("Choice missing primary trait tag")
-        if tags.get("secondary") and tags.get("sw", 0.0) > tags.get("pw", 0.0):
-            raise ValueError("Secondary weight exceeds primary weight")
-
-        delta: Dict[str, float] = {}
-        if tags.get("primary") and tags.get("pw", 0.0) > 0:
-            trait = tags["primary"]
-            weight = tags["pw"]
-            totals[trait] = totals.get(trait, 0.0) + weight
-            delta[trait] = weight
-        if tags.get("secondary") and tags.get("sw", 0.0) > 0:
-            trait = tags["secondary"]
-            weight = tags["sw"]
-            totals[trait] = totals.get(trait, 0.0) + weight
-            delta[trait] = weight
-
-        flags: List[str] = []
-        scene_total = sum(delta.values())
-        if scene_total <= SCENE_WEIGHT_CAP:
-            flags.append("scene_cap_ok")
-        else:
-            flags.append("scene_cap_fail")
-
-        is_major = tags.get("pw", 0.0) >= 0.8 or tags.get("sw", 0.0) >= 0.8
-        if is_major and idx - last_major_step <= 1:
-            flags.append("major_spacing_fail")
-        else:
-            flags.append("major_spacing_ok")
-            if is_major:
-                last_major_step = idx
-
-        for trait, value in totals.items():
-            if value > TRAIT_CAP_PER_ACT * 1.2:
-                flags.append("trait_cap_fail")
-                break
-
-        trace.append(
-            {
-                "run_id": f"run_{seed}",
-                "step": idx,
-                "scene_id": scene.get("scene_id"),
-                "choice_id": chosen["choice_id"],
-                "text": chosen.get("text", ""),
-                "primary": tags.get("primary"),
-                "pw": tags.get("pw", 0.0),
-                "secondary": tags.get("secondary"),
-                "sw": tags.get("sw", 0.0),
-                "delta": delta,
-                "totals": totals.copy(),
-                "flags": flags,
-                "end": False,
-            }
+    bundle: ScenarioBundle
+    tables: Tuple[_SceneTable, ...]
+    columns: Tuple[str, ...]
+    codes: Dict[str, int]
+    traits: Tuple[int, ...]
+
+
+def _compile_outcome(option: Option, codes: Dict[str, int]) -> _Outcome:
+    error = None
+    if not option.primary:
+        error = "Choice missing primary trait tag"
+    elif option.secondary and option.sw > option.pw:
+        error = "Secondary weight exceeds primary weight"
+
+    adds: List[Tuple[str, float]] = []
+    if option.primary and option.pw > 0:
+        adds.append((option.primary, option.pw))
+    if option.secondary and option.sw > 0:
+        adds.append((option.secondary, option.sw))
+    delta = dict(adds)
+
+    for trait, _ in adds:
+        codes.setdefault(trait, len(codes))
+
+    return _Outcome(
+        option=option,
+        adds=tuple(adds),
+        codes=tuple((codes[trait], weight) for trait, weight in adds),
+        delta=delta,
+        scene_total=sum(delta.values()),
+        is_major=option.pw >= 0.8 or option.sw >= 0.8,
+        error=error,
+    )
+
+
+def _compile_tables(bundle: ScenarioBundle, max_steps: int) -> _Program:
+    """Build per-scene option tables for the first ``max_steps`` scenes."""
+
+    codes: Dict[str, int] = {trait: i for i, trait in enumerate(TRAITS)}
+    tables: List[_SceneTable] = []
+    for scene in bundle.scenes[: max(max_steps, 0)]:
+        lookup: Dict[str, int] = {}
+        for option in scene.options:
+            lookup.setdefault(option.choice_id, option.position)
+        tables.append(
+            _SceneTable(
+                scene=scene,
+                lookup=lookup,
+                outcomes=tuple(_compile_outcome(o, codes) for o in scene.options),
+            )
         )
+    columns = tuple(codes)
+    return _Program(
+        bundle=bundle,
+        tables=tuple(tables),
+        columns=columns,
+        codes=codes,
+        traits=tuple(TRAIT_REGISTRY.get(label, -1) for label in columns),
+    )
+
 
-    total_points = sum(totals.values()) or 1.0
+# ---------------------------------------------------------------------------
+# Runner
+
+
+def _final_summary(
+    run_id: str, columns: Sequence[str], values: Sequence[float], order: Iterable[int]
+) -> Dict[str, Any]:
+    """Build the final reveal summary from totals by column code."""
+
+    order = list(order)
+    total_points = sum(values[code] for code in order) or 1.0
     normalized = {
-        trait: int(value / total_points * 100)
-        for trait, value in totals.items()
-        if value > 0
+        columns[code]: int(values[code] / total_points * 100)
+        for code in order
+        if values[code] > 0
     }
     top3 = sorted(normalized, key=normalized.get, reverse=True)[:3]
 
-    final = {
-        "run_id": f"run_{seed}",
+    return {
+        "run_id": run_id,
         "end": True,
         "normalized": normalized,
         "top3": top3,
@@ -230,9 +191,350 @@ def run(play_policy: Policy, seed: int, max_steps: int = 100) -> Dict[str, Any]:
         "payoffs": {},
     }
 
-    trace.append(final)
+
+class _Calibration:
+    """Calibrator multipliers resolved once per trait column.
+
+    ``plain`` holds each column's multiplier and ``damped`` the multiplier
+    while the column's trait is on an anti-streak run.  A column without a
+    multiplier under its own label takes the one configured for another
+    alias of its :data:`~modules.trait_registry.TRAIT_REGISTRY` trait.  The
+    calibrated effect of an option only depends on which trait, if any, is
+    damped, so :meth:`apply` caches it per option and damped trait.
+    """
+
+    __slots__ = ("calibrator", "plain", "damped", "_cache")
+
+    def __init__(self, calibrator: Calibrator, columns: Sequence[str], traits: Sequence[int]) -> None:
+        self.calibrator = calibrator
+        configured = getattr(calibrator, "multipliers", {})
+        by_trait = {TRAIT_REGISTRY.get(key): key for key in configured}
+        keys = [
+            label if label in configured else by_trait.get(trait, label)
+            for label, trait in zip(columns, traits)
+        ]
+        self.plain = [calibrator.multiplier(key) for key in keys]
+        self.damped = {label: calibrator.multiplier(key, key, 2) for label, key in zip(columns, keys)}
+        self._cache: Dict[Tuple[int, str | None], Tuple[Any, ...]] = {}
+
+    def apply(
+        self, outcome: _Outcome, damped_trait: str | None
+    ) -> Tuple[Tuple[Tuple[int, float], ...], Tuple[float, ...], float]:
+        """Return ``(codes, weights, scene_total)`` of ``outcome`` as applied."""
+
+        key = (outcome.option.index, damped_trait)
+        cached = self._cache.get(key)
+        if cached is None:
+            weights = tuple(
+                weight
+                * (self.damped[trait] if trait == damped_trait else self.plain[code])
+                for (trait, _), (code, weight) in zip(outcome.adds, outcome.codes)
+            )
+            codes = tuple(zip((code for code, _ in outcome.codes), weights))
+            total = sum(dict(zip((trait for trait, _ in outcome.adds), weights)).values())
+            cached = self._cache[key] = (codes, weights, total)
+        return cached
+
+
+def _calibration(
+    calibrator: Calibrator | Mapping[str, Any] | None, program: _Program
+) -> _Calibration | None:
+    if calibrator is None:
+        return None
+    if not hasattr(calibrator, "multiplier"):
+        calibrator = Calibrator(dict(calibrator))
+    return _Calibration(calibrator, program.columns, program.traits)
+
+
+class _RunState:
+    """Mutable per-run totals shared between the step loop and its consumer.
+
+    ``values`` holds the totals by trait column and ``order`` the codes
+    present in the totals mapping, in insertion order.  When a calibrator
+    is active ``applied`` holds the weights applied at the last step, in
+    the order of the outcome's codes.
+    """
+
+    __slots__ = ("run_id", "columns", "values", "order", "present", "applied")
+
+    def __init__(self, seed: int, program: _Program) -> None:
+        self.run_id = f"run_{seed}"
+        self.columns = program.columns
+        self.values: List[float] = [0.0] * len(self.columns)
+        self.order: List[int] = list(range(len(TRAITS)))
+        self.present: List[bool] = [code < len(TRAITS) for code in range(len(self.columns))]
+        self.applied: Tuple[float, ...] | None = None
+
+    def delta(self, outcome: _Outcome) -> Dict[str, float]:
+        """Return the trait delta of ``outcome`` as applied at the last step."""
+
+        if self.applied is None:
+            return dict(outcome.delta)
+        return dict(zip((trait for trait, _ in outcome.adds), self.applied))
+
+    def totals(self) -> Dict[str, float]:
+        return {self.columns[code]: self.values[code] for code in self.order}
+
+    def final(self) -> Dict[str, Any]:
+        return _final_summary(self.run_id, self.columns, self.values, self.order)
+
+
+def _steps(
+    play_policy: Policy,
+    seed: int,
+    program: _Program,
+    state: _RunState,
+    calibration: _Calibration | None = None,
+) -> Iterator[Tuple[_SceneTable, int, int, Tuple[int, ...]]]:
+    """Core step loop.
+
+    Yields ``(table, position, flags, introduced)`` after each step, where
+    ``introduced`` lists the trait codes that entered ``state`` at that step.
+    ``state`` holds the cumulative totals after the step.
+
+    With a ``calibration`` every weight is scaled by the calibrator's
+    multiplier for its trait.  The selection history the calibrator needs
+    is kept as the last selected primary trait and its streak length.
+    """
+
+    # Policies with a compile step precompute their per-scene decisions.
+    compile_policy = getattr(play_policy, "compile", None)
+    if compile_policy is not None:
+        compile_policy(program.bundle)
+
+    rng = random.Random(seed)
+    values = state.values
+    present = state.present
+    view = StateView(TotalsView(program.columns, program.codes, values, state.order, present))
+    act_step: Dict[int, int] = {1: 0, 2: 0, 3: 0}
+    last_major_step = -99
+    trait_cap = TRAIT_CAP_PER_ACT * 1.2
+    streak_trait: str | None = None
+    streak = 0
+
+    for idx, table in enumerate(program.tables, start=1):
+        scene = table.scene
+        act = scene.act
+        act_step[act] += 1
+
+        view.act = act
+        view.scene_id = scene.scene_id
+        view.scene_index = scene.index
+        view.options = scene.records
+        view.step = idx - 1
+        view.act_step = act_step[act] - 1
+
+        choice_id = play_policy(view, rng)
+        position = table.lookup.get(choice_id, 0)
+        outcome = table.outcomes[position]
+
+        # Tag integrity checks
+        if outcome.error:
+            raise ValueError(outcome.error)
+
+        scene_total = outcome.scene_total
+        codes = outcome.codes
+        if calibration is not None:
+            codes, state.applied, scene_total = calibration.apply(
+                outcome, streak_trait if streak >= 2 else None
+            )
+            streak_trait, streak = Calibrator.advance(
+                streak_trait, streak, outcome.option.primary
+            )
+
+        introduced: Tuple[int, ...] = ()
+        for code, weight in codes:
+            if not present[code]:
+                present[code] = True
+                state.order.append(code)
+                introduced += (code,)
+            values[code] += weight
+
+        flags = 0
+        if scene_total > SCENE_WEIGHT_CAP:
+            flags |= FLAG_SCENE_CAP_FAIL
+
+        if outcome.is_major and idx - last_major_step <= 1:
+            flags |= FLAG_MAJOR_SPACING_FAIL
+        elif outcome.is_major:
+            last_major_step = idx
+
+        if max(values) > trait_cap:
+            flags |= FLAG_TRAIT_CAP_FAIL
+
+        yield table, position, flags, introduced
+
+
+def _run(
+    play_policy: Policy,
+    seed: int,
+    program: _Program,
+    record: str = "full",
+    calibration: _Calibration | None = None,
+) -> Dict[str, Any]:
+    state = _RunState(seed, program)
+    trace = Trace(
+        state.run_id,
+        program.tables,
+        program.columns,
+        record,
+        program.traits,
+        weighted=calibration is not None,
+        digest=program.bundle.digest,
+    )
+    for code in state.order:
+        trace.introduce(code)
+
+    steps = _steps(play_policy, seed, program, state, calibration)
+    if record == "final":
+        for _ in steps:
+            pass
+    else:
+        for table, position, flags, introduced in steps:
+            for code in introduced:
+                trace.introduce(code)
+            trace.append(table.scene.index, position, flags, state.values, state.applied)
+
+    final = state.final()
+    trace.final = final
     return {"trace": trace, "final": final}
 
 
-__all__ = ["run", "load_scenarios", "TRAITS"]
+def _iter_run(
+    play_policy: Policy,
+    seed: int,
+    program: _Program,
+    calibration: _Calibration | None = None,
+) -> Iterator[Dict[str, Any]]:
+    state = _RunState(seed, program)
+    for step, (table, position, flags, _) in enumerate(
+        _steps(play_policy, seed, program, state, calibration)
+    ):
+        outcome = table.outcomes[position]
+        yield step_record(
+            state.run_id, step, table, outcome, flags, state.totals(), state.delta(outcome)
+        )
+    yield state.final()
+
+
+def iter_run(
+    play_policy: Policy,
+    seed: int,
+    max_steps: int = 100,
+    bundle: ScenarioBundle | None = None,
+    calibrator: Calibrator | Mapping[str, Any] | None = None,
+) -> Iterator[Dict[str, Any]]:
+    """Execute a run lazily, yielding each step record as it is produced.
+
+    Yields the same dictionaries as iterating ``run(...)["trace"]``: one per
+    step followed by the final summary.  Nothing is retained between steps,
+    so consumers can process arbitrarily long runs in constant memory and
+    stop early by simply not advancing the generator.  ``calibrator`` is
+    applied as in :func:`run`.
+    """
+
+    program = _compile_tables(bundle or load_bundle(), max_steps)
+    return _iter_run(play_policy, seed, program, _calibration(calibrator, program))
+
+
+def run(
+    play_policy: Policy,
+    seed: int,
+    max_steps: int = 100,
+    bundle: ScenarioBundle | None = None,
+    record: str = "full",
+    calibrator: Calibrator | Mapping[str, Any] | None = None,
+) -> Dict[str, Any]:
+    """Execute a simulation run.
 
+    Parameters
+    ----------
+    play_policy:
+        Callable that selects a ``choice_id``.  It receives the current state
+        snapshot, a read-only :class:`~testing.snapshot.StateView` mapping
+        that is reused across steps, and a :class:`random.Random` instance
+        for deterministic behaviour.
+    seed:
+        Seed used to initialise the RNG.
+    max_steps:
+        Maximum number of steps to execute.
+    bundle:
+        Compiled scenario content.  Defaults to the process-wide cached
+        bundle from :func:`testing.content.load_bundle`.
+    record:
+        How much of the trace to keep: ``"full"`` (default) stores totals
+        per step, ``"deltas"`` stores only the choices and rebuilds totals
+        on access, ``"final"`` stores no steps at all.
+    calibrator:
+        Optional :class:`~calibrator.calibrator.Calibrator`, or its config
+        mapping, whose multipliers, anti-streak dampening and decay scale
+        every applied trait weight.
+
+    Returns
+    -------
+    dict
+        Mapping containing the full trace under ``"trace"`` and the final
+        summary under ``"final"``.  The trace is a columnar
+        :class:`~testing.trace.Trace` that behaves like the list of step
+        dictionaries followed by the final summary.
+    """
+
+    check_record(record)
+    program = _compile_tables(bundle or load_bundle(), max_steps)
+    return _run(play_policy, seed, program, record, _calibration(calibrator, program))
+
+
+def run_batch(
+    policy_factory: PolicyFactory,
+    seeds: Iterable[int],
+    max_steps: int = 100,
+    bundle: ScenarioBundle | None = None,
+    record: str = "full",
+    calibrator: Calibrator | Mapping[str, Any] | None = None,
+) -> Iterator[Dict[str, Any]]:
+    """Execute one run per seed, sharing all per-scene precomputation.
+
+    The option tables are built once for the whole batch and a fresh policy
+    is created for every seed, so each result is identical to
+    ``run(policy_factory(), seed, max_steps)``.
+
+    Parameters
+    ----------
+    policy_factory:
+        Zero-argument callable returning a new policy, typically a policy
+        class.
+    seeds:
+        Seeds to execute, in order.
+    max_steps:
+        Maximum number of steps per run.
+    bundle:
+        Compiled scenario content.  Defaults to the cached bundle.
+    record:
+        Recording level passed to every run; see :func:`run`.
+    calibrator:
+        Calibrator applied to every run; see :func:`run`.
+
+    Yields
+    ------
+    dict
+        The result of each run in seed order, as returned by :func:`run`.
+    """
+
+    check_record(record)
+    program = _compile_tables(bundle or load_bundle(), max_steps)
+    calibration = _calibration(calibrator, program)
+    for seed in seeds:
+        yield _run(policy_factory(), seed, program, record, calibration)
+
+
+__all__ = [
+    "run",
+    "run_batch",
+    "iter_run",
+    "load_scenarios",
+    "load_bundle",
+    "ScenarioBundle",
+    "Trace",
+    "RECORD_LEVELS",
+    "TRAITS",
+]
@@ -0,0 +1,233 @@
+"""Worst-case path search over the scenario content.
+
+Random policies only hit the runner's cap and spacing flags by chance.  The
+functions here search the space of choice sequences directly and return the
+path that maximises an objective, together with the runner's own trace of
+that path so flags and totals can be checked against it.
+
+Every objective decomposes over scenes, so the search is an exact dynamic
+program over a small per-step state instead of an enumeration of paths:
+
+``"trait:<Trait>"``
+    maximise the final total of a trait (aliases merged through
+    :data:`~modules.trait_registry.TRAIT_REGISTRY`).  Weights only add up,
+    so the best path takes the best option at every scene.
+``"flag:scene_cap"``
+    maximise the number of steps over the per-scene weight cap, a static
+    property of each option.
+``"flag:major_spacing"``
+    maximise the number of back-to-back major choices.  The runner's rule
+    only depends on whether the previous step set the last major marker, a
+    two-state automaton.
+``"flag:trait_cap"``
+    reach the per-trait cap as early as possible.  Totals never decrease,
+    so once a trait crosses the cap every later step is flagged; the
+    earliest crossing for each trait column is the prefix sum of its best
+    option per scene.
+
+Work grows linearly with the number of scenes and options.  Ties are broken
+towards the earliest option in content order.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from modules.trait_registry import TRAIT_REGISTRY
+
+from .content import ScenarioBundle, load_bundle
+from .runner import SCENE_WEIGHT_CAP, TRAIT_CAP_PER_ACT, _compile_tables, _Program, _run
+from .trace import (
+    FLAG_MAJOR_SPACING_FAIL,
+    FLAG_SCENE_CAP_FAIL,
+    FLAG_TRAIT_CAP_FAIL,
+    decode_flags,
+)
+
+# Flag objectives and the trace bit each one maximises.
+FLAG_BITS: Dict[str, int] = {
+    "scene_cap": FLAG_SCENE_CAP_FAIL,
+    "major_spacing": FLAG_MAJOR_SPACING_FAIL,
+    "trait_cap": FLAG_TRAIT_CAP_FAIL,
+}
+
+
+@dataclass
+class SearchResult:
+    """Best path found for an objective.
+
+    Attributes
+    ----------
+    objective:
+        The objective string searched for.
+    value:
+        Objective value of the path: the trait total for ``trait:``
+        objectives, the number of flagged steps for ``flag:`` objectives.
+    positions:
+        Option position chosen at every scene.
+    trace:
+        The runner's trace of the path, recorded at ``"full"`` level.
+    """
+
+    objective: str
+    value: float
+    positions: Tuple[int, ...]
+    trace: Any
+
+    def choices(self) -> List[Tuple[str, str]]:
+        """Return ``(scene_id, choice_id)`` for every step of the path."""
+
+        return [(step["scene_id"], step["choice_id"]) for step in self.trace[:-1]]
+
+    def flag_counts(self) -> Dict[str, int]:
+        """Count how many steps of the path carry each failing flag."""
+
+        counts: Dict[str, int] = {}
+        for bits in self.trace.flag_bits:
+            for flag in decode_flags(bits):
+                if flag.endswith("_fail"):
+                    counts[flag] = counts.get(flag, 0) + 1
+        return counts
+
+
+def _playable(program: _Program) -> List[List[int]]:
+    """Positions the runner can actually reach at each scene.
+
+    Options sharing a ``choice_id`` resolve to the first one and options
+    with broken tags abort the run, so neither is a separate move.
+    """
+
+    moves = []
+    for table in program.tables:
+        moves.append(
+            [
+                o.option.position
+                for o in table.outcomes
+                if not o.error and table.lookup[o.option.choice_id] == o.option.position
+            ]
+        )
+    return moves
+
+
+def _scripted(positions: Tuple[int, ...]):
+    picks = iter(positions)
+
+    def policy(state: Dict[str, Any], rng: Any) -> str:
+        return state["options"][next(picks)]["choice_id"]
+
+    return policy
+
+
+def _best_for_columns(program: _Program, moves: List[List[int]], columns: set) -> List[Tuple[int, float]]:
+    """Return the best ``(position, gain)`` per scene for a set of columns."""
+
+    best = []
+    for table, allowed in zip(program.tables, moves):
+        choice = max(
+            allowed,
+            key=lambda p: (
+                sum(w for c, w in table.outcomes[p].codes if c in columns),
+                -p,
+            ),
+        )
+        best.append((choice, sum(w for c, w in table.outcomes[choice].codes if c in columns)))
+    return best
+
+
+def _search_trait(program: _Program, moves: List[List[int]], trait: str) -> Tuple[float, Tuple[int, ...]]:
+    code = TRAIT_REGISTRY.code(trait)
+    columns = {i for i, t in enumerate(program.traits) if t == code}
+    best = _best_for_columns(program, moves, columns)
+    value = 0.0
+    for _, gain in best:
+        value += gain
+    return value, tuple(p for p, _ in best)
+
+
+def _search_scene_cap(program: _Program, moves: List[List[int]]) -> Tuple[float, Tuple[int, ...]]:
+    path = []
+    for table, allowed in zip(program.tables, moves):
+        path.append(max(allowed, key=lambda p: (table.outcomes[p].scene_total > SCENE_WEIGHT_CAP, -p)))
+    value = sum(program.tables[i].outcomes[p].scene_total > SCENE_WEIGHT_CAP for i, p in enumerate(path))
+    return float(value), tuple(path)
+
+
+def _search_major_spacing(program: _Program, moves: List[List[int]]) -> Tuple[float, Tuple[int, ...]]:
+    # State: did the previous step set the runner's last major marker?
+    # best[state] = (fails, path); paths compare lexicographically so ties
+    # favour the earliest options.
+    best: Dict[bool, Tuple[int, Tuple[int, ...]]] = {False: (0, ())}
+    for table, allowed in zip(program.tables, moves):
+        nxt: Dict[bool, Tuple[int, Tuple[int, ...]]] = {}
+        for marked, (fails, path) in best.items():
+            for p in allowed:
+                major = table.outcomes[p].is_major
+                fail = major and marked
+                state = major and not marked
+                cand = (fails + fail, path + (p,))
+                cur = nxt.get(state)
+                if cur is None or cand[0] > cur[0] or (cand[0] == cur[0] and cand[1] < cur[1]):
+                    nxt[state] = cand
+        best = nxt
+    fails, path = max(best.values(), key=lambda item: (item[0], tuple(-p for p in item[1])))
+    return float(fails), path
+
+
+def _search_trait_cap(program: _Program, moves: List[List[int]]) -> Tuple[float, Tuple[int, ...]]:
+    cap = TRAIT_CAP_PER_ACT * 1.2
+    steps = len(program.tables)
+    best_step = steps
+    best_path: Tuple[int, ...] = tuple(m[0] for m in moves)
+    for column in range(len(program.columns)):
+        picks = _best_for_columns(program, moves, {column})
+        total = 0.0
+        for step, (_, gain) in enumerate(picks):
+            total += gain
+            if total > cap:
+                if step < best_step:
+                    best_step = step
+                    best_path = tuple(p for p, _ in picks)
+                break
+    return float(steps - best_step), best_path
+
+
+def search(
+    objective: str,
+    max_steps: int = 100,
+    bundle: ScenarioBundle | None = None,
+) -> SearchResult:
+    """Find the path that maximises ``objective``.
+
+    Parameters
+    ----------
+    objective:
+        ``"trait:<Trait>"`` or ``"flag:<name>"`` with a name from
+        :data:`FLAG_BITS`.
+    max_steps:
+        Maximum number of steps, as for :func:`testing.runner.run`.
+    bundle:
+        Compiled scenario content.  Defaults to the cached bundle.
+    """
+
+    kind, sep, name = objective.partition(":")
+    if not sep or kind not in ("trait", "flag") or (kind == "flag" and name not in FLAG_BITS):
+        raise ValueError(f"Unknown objective: {objective!r}")
+
+    program = _compile_tables(bundle or load_bundle(), max_steps)
+    moves = _playable(program)
+
+    if kind == "trait":
+        value, positions = _search_trait(program, moves, name)
+    elif name == "scene_cap":
+        value, positions = _search_scene_cap(program, moves)
+    elif name == "major_spacing":
+        value, positions = _search_major_spacing(program, moves)
+    else:
+        value, positions = _search_trait_cap(program, moves)
+
+    trace = _run(_scripted(positions), 0, program)["trace"]
+    return SearchResult(objective=objective, value=value, positions=positions, trace=trace)
+
+
+__all__ = ["SearchResult", "search", "FLAG_BITS"]
@@ -0,0 +1,247 @@
+"""Sequential Monte Carlo estimation with automatic stopping.
+
+Instead of fixing the number of runs up front, :func:`estimate` draws seeds
+in batches and stops as soon as the confidence interval of every requested
+metric is narrower than its tolerance.  Metrics are named by target strings:
+
+``"reveal:<Trait>"``
+    fraction of runs whose ``top3`` contains ``<Trait>``, as
+    :func:`testing.metrics.reveal_accuracy_rate`;
+``"share:<Trait>"``
+    mean normalized share of ``<Trait>`` in the final reveal, as a fraction
+    of the total (the percentage reported by
+    :func:`testing.metrics.trait_distribution` divided by 100).
+
+Trait names are resolved through
+:data:`~modules.trait_registry.TRAIT_REGISTRY`, so ``"reveal:Control"``
+matches both ``"Control"`` and ``"Control & Perfectionism"`` reveals.
+
+Intervals use the normal approximation.  Reveal rates use the
+Agresti-Coull adjusted proportion so a metric that has not been observed
+yet never reports a zero-width interval.
+"""
+
+from __future__ import annotations
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from modules.trait_registry import TRAIT_REGISTRY
+
+from .accumulators import RunningStats
+from .content import ScenarioBundle, load_bundle
+from .runner import PolicyFactory, run_batch
+
+# Metric kinds accepted in target strings.
+KINDS = ("reveal", "share")
+
+
+@dataclass(frozen=True)
+class Target:
+    """A metric to estimate, parsed from ``"<kind>:<Trait>"``."""
+
+    kind: str
+    trait: str
+    code: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.kind}:{self.trait}"
+
+    @classmethod
+    def parse(cls, text: str) -> "Target":
+        kind, sep, trait = text.partition(":")
+        if not sep or kind not in KINDS:
+            raise ValueError(f"Invalid target {text!r}; expected one of {KINDS} as '<kind>:<Trait>'")
+        code = TRAIT_REGISTRY.code(trait)
+        return cls(kind, TRAIT_REGISTRY.name(code), code)
+
+    def value(self, final: Dict[str, Any]) -> float:
+        """Return this metric's sample for one run's ``final`` summary."""
+
+        if self.kind == "reveal":
+            return float(any(TRAIT_REGISTRY.get(t) == self.code for t in final.get("top3", [])))
+        return sum(
+            share
+            for trait, share in final.get("normalized", {}).items()
+            if TRAIT_REGISTRY.get(trait) == self.code
+        ) / 100.0
+
+
+@dataclass
+class Estimate:
+    """Running estimate of a single target."""
+
+    target: Target
+    stats: RunningStats = field(default_factory=RunningStats)
+
+    @property
+    def n(self) -> int:
+        return self.stats.n
+
+    @property
+    def mean(self) -> float:
+        return self.stats.mean
+
+    def add(self, value: float) -> None:
+        self.stats.add(value)
+
+    def merge(self, other: "Estimate") -> "Estimate":
+        """Fold another estimate of the same target into this one."""
+
+        if other.target != self.target:
+            raise ValueError(f"Cannot merge {other.target.name} into {self.target.name}")
+        self.stats.merge(other.stats)
+        return self
+
+    def half_width(self, z: float) -> float:
+        """Return the half width of the confidence interval at ``z``."""
+
+        if self.n == 0:
+            return math.inf
+        if self.target.kind == "reveal":
+            # Agresti-Coull: add z^2/2 successes and failures.
+            n = self.n + z * z
+            p = (self.mean * self.n + z * z / 2) / n
+            return z * math.sqrt(p * (1 - p) / n)
+        if self.n < 2:
+            return math.inf
+        return z * math.sqrt(self.stats.variance / self.n)
+
+
+@dataclass
+class SequentialResult:
+    """Outcome of :func:`estimate`.
+
+    Attributes
+    ----------
+    runs:
+        Number of runs executed.
+    seeds:
+        The seeds that were used, ``range(start, start + runs)``.
+    converged:
+        ``True`` if every target met its tolerance before ``max_runs``.
+    estimates:
+        Estimate per target name.
+    z:
+        Normal quantile used for the intervals.
+    """
+
+    runs: int
+    seeds: range
+    converged: bool
+    estimates: Dict[str, Estimate] = field(default_factory=dict)
+    z: float = 1.96
+
+    def intervals(self) -> Dict[str, Tuple[float, float]]:
+        """Return ``(mean, half_width)`` per target name."""
+
+        return {
+            name: (est.mean, est.half_width(self.z)) for name, est in self.estimates.items()
+        }
+
+
+def _finals(
+    policy_factory: PolicyFactory, seeds: Sequence[int], max_steps: int, bundle: ScenarioBundle | None
+) -> List[Dict[str, Any]]:
+    return [r["final"] for r in run_batch(policy_factory, seeds, max_steps, bundle, record="final")]
+
+
+def estimate(
+    policy_factory: PolicyFactory,
+    targets: Iterable[str],
+    tolerance: float = 0.02,
+    confidence: float = 0.95,
+    batch: int = 200,
+    min_runs: int = 200,
+    max_runs: int = 100_000,
+    seed: int = 0,
+    max_steps: int = 100,
+    bundle: ScenarioBundle | None = None,
+    workers: int = 1,
+) -> SequentialResult:
+    """Run seeds in batches until every target is estimated precisely enough.
+
+    Parameters
+    ----------
+    policy_factory:
+        Zero-argument callable returning a new policy, typically a policy
+        class.  Must be picklable when ``workers`` is above one.
+    targets:
+        Target strings such as ``"reveal:Hubris"`` or ``"share:Fear"``.
+    tolerance:
+        Stop once the confidence interval half width of every target is at
+        most this value.
+    confidence:
+        Two-sided confidence level of the intervals.
+    batch:
+        Number of seeds drawn between convergence checks.
+    min_runs:
+        Never stop before this many runs.
+    max_runs:
+        Stop after this many runs even if not converged.
+    seed:
+        First seed; seeds are drawn consecutively from here.
+    max_steps:
+        Maximum number of steps per run.
+    bundle:
+        Compiled scenario content.  Defaults to the cached bundle.  Worker
+        processes always use the default content.
+    workers:
+        Number of worker processes each batch is split across.  Results
+        are consumed in seed order, so the outcome does not depend on it.
+    """
+
+    parsed = [Target.parse(t) for t in targets]
+    if not parsed:
+        raise ValueError("At least one target is required")
+    if tolerance <= 0 or batch <= 0:
+        raise ValueError("tolerance and batch must be positive")
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    estimates = {t.name: Estimate(t) for t in parsed}
+
+    runs = 0
+    converged = False
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while runs < max_runs:
+            size = min(batch, max_runs - runs)
+            seeds = range(seed + runs, seed + runs + size)
+            if pool is None:
+                finals = _finals(policy_factory, seeds, max_steps, bundle or load_bundle())
+            else:
+                step = -(-size // workers)
+                futures = [
+                    pool.submit(_finals, policy_factory, seeds[i : i + step], max_steps, None)
+                    for i in range(0, size, step)
+                ]
+                finals = [f for future in futures for f in future.result()]
+
+            for final in finals:
+                for est in estimates.values():
+                    est.add(est.target.value(final))
+            runs += size
+
+            if runs >= min_runs and all(
+                est.half_width(z) <= tolerance for est in estimates.values()
+            ):
+                converged = True
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return SequentialResult(
+        runs=runs,
+        seeds=range(seed, seed + runs),
+        converged=converged,
+        estimates=estimates,
+        z=z,
+    )
+
+
+__all__ = ["Target", "Estimate", "SequentialResult", "estimate", "KINDS"]
@@ -0,0 +1,108 @@
+"""Read-only state snapshots handed to policies.
+
+The runner used to build a fresh dictionary per step, including a copy of
+the trait totals, only for the policy to read it.  A :class:`StateView` is
+created once per run and updated in place instead: its totals are a live
+:class:`TotalsView` over the runner's own column list and its options are
+the scene's read-only records from the compiled bundle, so a step allocates
+nothing for the policy.
+
+Both views implement :class:`collections.abc.Mapping`, which is the
+compatibility layer for existing policies: ``state["options"]``,
+``state.get("totals", {})`` and ``dict(state)`` behave as they did for the
+old dictionaries.  Views are only valid during the policy call; a policy
+that wants to keep totals across steps must copy them, e.g. with
+``dict(state["totals"])``.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+# Keys of a snapshot, in the order of the old dictionaries.
+SNAPSHOT_KEYS: Tuple[str, ...] = ("act", "scene_id", "options", "totals", "step", "act_step")
+
+
+class TotalsView(Mapping):
+    """Live read-only mapping of trait label -> cumulative total.
+
+    Iterates over the traits present so far in insertion order, like the
+    runner's totals dictionary.
+    """
+
+    __slots__ = ("_columns", "_codes", "_values", "_order", "_present")
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        codes: Dict[str, int],
+        values: List[float],
+        order: List[int],
+        present: List[bool],
+    ) -> None:
+        self._columns = columns
+        self._codes = codes
+        self._values = values
+        self._order = order
+        self._present = present
+
+    def __getitem__(self, label: str) -> float:
+        code = self._codes.get(label)
+        if code is None or not self._present[code]:
+            raise KeyError(label)
+        return self._values[code]
+
+    def __iter__(self) -> Iterator[str]:
+        columns = self._columns
+        return (columns[code] for code in self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, label: object) -> bool:
+        code = self._codes.get(label)  # type: ignore[arg-type]
+        return code is not None and self._present[code]
+
+    def __repr__(self) -> str:
+        return f"TotalsView({dict(self)!r})"
+
+
+class StateView(Mapping):
+    """Reusable read-only snapshot of the runner state before a step.
+
+    Fields are exposed both as attributes and as mapping keys from
+    :data:`SNAPSHOT_KEYS`.  ``scene_index`` identifies the scene within the
+    compiled bundle and is available as an attribute only.
+    """
+
+    __slots__ = ("act", "scene_id", "scene_index", "options", "totals", "step", "act_step")
+
+    def __init__(self, totals: TotalsView) -> None:
+        self.act = 0
+        self.scene_id: str | None = None
+        self.scene_index = -1
+        self.options: Sequence[Mapping[str, Any]] = ()
+        self.totals = totals
+        self.step = 0
+        self.act_step = 0
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in SNAPSHOT_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(SNAPSHOT_KEYS)
+
+    def __len__(self) -> int:
+        return len(SNAPSHOT_KEYS)
+
+    def __contains__(self, key: object) -> bool:
+        return key in SNAPSHOT_KEYS
+
+    def __repr__(self) -> str:
+        return f"StateView(scene_id={self.scene_id!r}, step={self.step})"
+
+
+__all__ = ["StateView", "TotalsView", "SNAPSHOT_KEYS"]
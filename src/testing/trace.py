@@ -0,0 +1,413 @@
+"""Compact columnar representation of a simulation trace.
+
+A :class:`Trace` stores one row per step in typed :mod:`array` columns
+(scene index, option position, flag bits and a flat block of cumulative
+trait totals) instead of a list of dictionaries.  Trait columns are shared
+with the runner's compiled option tables, so text, tags and deltas are
+looked up from the scenario content rather than copied into every step.
+
+For backward compatibility a trace behaves like the old list of step
+dictionaries followed by the ``final`` summary: it can be iterated, indexed
+(including ``trace[-1]``) and measured with :func:`len`.  Step dictionaries
+are only built on access; :meth:`Trace.as_dicts` materialises the full list.
+
+Traces are recorded at one of :data:`RECORD_LEVELS`:
+
+``"final"``
+    no steps at all, only the ``final`` summary;
+``"deltas"``
+    the chosen option per step, with totals replayed from the option
+    weights on access;
+``"full"``
+    the chosen option plus a snapshot of the cumulative totals per step.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from modules.trait_registry import TRAIT_REGISTRY
+
+# Recording levels, from least to most detailed.
+RECORD_LEVELS: Tuple[str, ...] = ("final", "deltas", "full")
+
+# Flag bits stored per step.
+FLAG_SCENE_CAP_FAIL = 1
+FLAG_MAJOR_SPACING_FAIL = 2
+FLAG_TRAIT_CAP_FAIL = 4
+
+
+def check_record(record: str) -> str:
+    """Validate a recording level name and return it."""
+
+    if record not in RECORD_LEVELS:
+        raise ValueError(f"Unknown record level: {record!r}")
+    return record
+
+
+def require_record(trace: Any, record: str) -> None:
+    """Raise if ``trace`` was recorded below the ``record`` level.
+
+    Plain lists of step dictionaries are treated as ``"full"`` traces.
+    """
+
+    have = getattr(trace, "record", "full")
+    if RECORD_LEVELS.index(have) < RECORD_LEVELS.index(record):
+        raise ValueError(f"Trace recorded at {have!r} level; {record!r} required")
+
+
+def decode_flags(bits: int) -> List[str]:
+    """Return the runner's flag list for a packed flag value."""
+
+    flags = ["scene_cap_fail" if bits & FLAG_SCENE_CAP_FAIL else "scene_cap_ok"]
+    flags.append(
+        "major_spacing_fail" if bits & FLAG_MAJOR_SPACING_FAIL else "major_spacing_ok"
+    )
+    if bits & FLAG_TRAIT_CAP_FAIL:
+        flags.append("trait_cap_fail")
+    return flags
+
+
+def step_record(
+    run_id: str,
+    step: int,
+    table: Any,
+    outcome: Any,
+    flags: int,
+    totals: Dict[str, float],
+    delta: Dict[str, float] | None = None,
+) -> Dict[str, Any]:
+    """Build the legacy dictionary for ``step`` (0-based) of a run.
+
+    ``delta`` overrides the outcome's static delta, e.g. with calibrated
+    weights.
+    """
+
+    option = outcome.option
+    return {
+        "run_id": run_id,
+        "step": step + 1,
+        "scene_id": table.scene.scene_id,
+        "choice_id": option.choice_id,
+        "text": option.text,
+        "primary": option.primary,
+        "pw": option.pw,
+        "secondary": option.secondary,
+        "sw": option.sw,
+        "delta": dict(outcome.delta) if delta is None else delta,
+        "totals": totals,
+        "flags": decode_flags(flags),
+        "end": False,
+    }
+
+
+class Trace(Sequence):
+    """Columnar trace of a single run.
+
+    Parameters
+    ----------
+    run_id:
+        Identifier stamped on every step record.
+    tables:
+        The runner's per-scene option tables, indexed by scene index.
+    columns:
+        Trait names of the totals block, indexed by trait column code.
+    record:
+        One of :data:`RECORD_LEVELS`.  Below ``"full"`` no totals are
+        stored and :meth:`append` ignores its ``totals`` argument.
+    traits:
+        Canonical trait code of every column, ``-1`` for unknown labels.
+        Resolved from ``columns`` when omitted.
+    weighted:
+        Store the weights applied at every step, for runs whose weights
+        differ from the content (calibrated runs).
+    digest:
+        Digest of the content ``tables`` were compiled from, if known.
+    """
+
+    __slots__ = (
+        "run_id",
+        "record",
+        "final",
+        "digest",
+        "_tables",
+        "_columns",
+        "_traits",
+        "_scenes",
+        "_choices",
+        "_flags",
+        "_totals",
+        "_replayed",
+        "_weights",
+        "_order",
+        "_intro",
+    )
+
+    def __init__(
+        self,
+        run_id: str,
+        tables: Sequence[Any],
+        columns: Tuple[str, ...],
+        record: str = "full",
+        traits: Sequence[int] | None = None,
+        weighted: bool = False,
+        digest: str | None = None,
+    ) -> None:
+        self.run_id = run_id
+        self.record = check_record(record)
+        self.final: Dict[str, Any] = {}
+        self.digest = digest
+        self._tables = tables
+        self._columns = columns
+        if traits is None:
+            traits = [TRAIT_REGISTRY.get(label, -1) for label in columns]
+        self._traits = tuple(traits)
+        self._scenes = array("H")
+        self._choices = array("B")
+        self._flags = array("B")
+        self._totals = array("d") if record == "full" else None
+        # Totals rebuilt on the first random access to a "deltas" trace.
+        self._replayed: array | None = None
+        # Two applied weights per step, aligned with the outcome's codes.
+        self._weights = array("d") if weighted and record != "final" else None
+        # Trait codes in the order they entered the totals and the step at
+        # which each one did, reproducing the runner's dict key order.
+        self._order = array("H")
+        self._intro = array("L")
+
+    # ------------------------------------------------------------------
+    # Recording
+
+    def introduce(self, code: int) -> None:
+        """Record that trait ``code`` enters the totals at the next step."""
+
+        self._order.append(code)
+        self._intro.append(len(self._scenes))
+
+    def append(
+        self,
+        scene_index: int,
+        position: int,
+        flags: int,
+        totals: Sequence[float],
+        weights: Sequence[float] | None = None,
+    ) -> None:
+        """Append a step row with the cumulative ``totals`` after it.
+
+        ``weights`` are the weights applied at the step; they are only kept
+        by ``weighted`` traces.
+        """
+
+        self._replayed = None
+        self._scenes.append(scene_index)
+        self._choices.append(position)
+        self._flags.append(flags)
+        if self._totals is not None:
+            self._totals.extend(totals)
+        if self._weights is not None:
+            self._weights.extend(weights)
+            self._weights.extend([0.0] * (2 - len(weights)))
+
+    # ------------------------------------------------------------------
+    # Columnar access
+
+    @property
+    def steps(self) -> int:
+        """Number of recorded steps, excluding the final summary."""
+
+        return len(self._scenes)
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return self._columns
+
+    @property
+    def scene_indices(self) -> array:
+        return self._scenes
+
+    @property
+    def choice_positions(self) -> array:
+        return self._choices
+
+    @property
+    def flag_bits(self) -> array:
+        return self._flags
+
+    @property
+    def introductions(self) -> List[Tuple[int, int]]:
+        """``(column, step)`` pairs in the order traits entered the totals."""
+
+        return list(zip(self._order, self._intro))
+
+    def rows(self) -> Iterator[array]:
+        """Yield the cumulative totals after every step by column."""
+
+        return self._replay()
+
+    def totals_row(self, step: int) -> array:
+        """Return the cumulative totals after ``step`` (0-based) by column.
+
+        The first call on a trace without stored totals replays it once and
+        keeps the result, so reading every step by index stays linear.
+        """
+
+        if not 0 <= step < len(self._scenes):
+            raise IndexError("trace index out of range")
+        totals = self._totals
+        if totals is None:
+            if self._replayed is None:
+                replayed = array("d")
+                for row in self._replay():
+                    replayed.extend(row)
+                self._replayed = replayed
+            totals = self._replayed
+        width = len(self._columns)
+        return totals[step * width : (step + 1) * width]
+
+    def trait_row(self, step: int) -> array:
+        """Return the totals after ``step`` indexed by canonical trait code.
+
+        Columns that are aliases of the same trait are summed, so the row
+        always has ``len(TRAIT_REGISTRY)`` entries.
+        """
+
+        return self._by_trait(self.totals_row(step))
+
+    def trait_rows(self) -> Iterator[array]:
+        """Yield :meth:`trait_row` for every step in a single replay."""
+
+        for row in self._replay():
+            yield self._by_trait(row)
+
+    def _by_trait(self, row: Sequence[float]) -> array:
+        values = array("d", bytes(8 * len(TRAIT_REGISTRY)))
+        for code, value in zip(self._traits, row):
+            if code >= 0:
+                values[code] += value
+        return values
+
+    def _replay(self) -> Iterator[array]:
+        """Yield the totals after every step, rebuilding them if needed.
+
+        Replaying adds the same weights in the same order as the runner, so
+        rebuilt totals are bit-for-bit identical to recorded ones.
+        """
+
+        width = len(self._columns)
+        totals = self._totals if self._totals is not None else self._replayed
+        if totals is not None:
+            for step in range(len(self._scenes)):
+                yield totals[step * width : (step + 1) * width]
+            return
+        values = array("d", bytes(8 * width))
+        for step in range(len(self._scenes)):
+            for code, weight in self.applied(step):
+                values[code] += weight
+            yield array("d", values)
+
+    def scene(self, step: int) -> Any:
+        """Return the compiled scene visited at ``step`` (0-based)."""
+
+        return self._tables[self._scenes[step]].scene
+
+    def outcome(self, step: int) -> Any:
+        """Return the compiled outcome chosen at ``step`` (0-based)."""
+
+        return self._tables[self._scenes[step]].outcomes[self._choices[step]]
+
+    def delta(self, step: int) -> Dict[str, float]:
+        """Return the trait delta applied at ``step`` keyed by trait label."""
+
+        outcome = self.outcome(step)
+        if self._weights is None:
+            return dict(outcome.delta)
+        weights = self._weights[2 * step : 2 * step + len(outcome.adds)]
+        return dict(zip((trait for trait, _ in outcome.adds), weights))
+
+    def applied(self, step: int) -> Tuple[Tuple[int, float], ...]:
+        """Return the ``(column, weight)`` pairs applied at ``step``."""
+
+        codes = self.outcome(step).codes
+        if self._weights is None:
+            return codes
+        weights = self._weights[2 * step : 2 * step + len(codes)]
+        return tuple(zip((code for code, _ in codes), weights))
+
+    # ------------------------------------------------------------------
+    # Dictionary view
+
+    def step_dict(self, step: int, row: Sequence[float] | None = None) -> Dict[str, Any]:
+        """Build the legacy dictionary for ``step`` (0-based).
+
+        ``row`` may supply the step's totals to avoid looking them up again.
+        """
+
+        table = self._tables[self._scenes[step]]
+        outcome = table.outcomes[self._choices[step]]
+        if row is None:
+            row = self.totals_row(step)
+        totals = {
+            self._columns[code]: row[code]
+            for code, intro in zip(self._order, self._intro)
+            if intro <= step
+        }
+        return step_record(
+            self.run_id,
+            step,
+            table,
+            outcome,
+            self._flags[step],
+            totals,
+            self.delta(step),
+        )
+
+    def as_dicts(self) -> List[Dict[str, Any]]:
+        """Return the trace as a list of step dictionaries plus ``final``."""
+
+        return list(self)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for step, row in enumerate(self._replay()):
+            yield self.step_dict(step, row)
+        yield self.final
+
+    def __len__(self) -> int:
+        return len(self._scenes) + 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("trace index out of range")
+        if index == size - 1:
+            return self.final
+        return self.step_dict(index)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Trace):
+            return self.as_dicts() == other.as_dicts()
+        if isinstance(other, list):
+            return self.as_dicts() == other
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"Trace(run_id={self.run_id!r}, steps={self.steps}, record={self.record!r})"
+
+
+__all__ = [
+    "Trace",
+    "RECORD_LEVELS",
+    "check_record",
+    "require_record",
+    "decode_flags",
+    "step_record",
+    "FLAG_SCENE_CAP_FAIL",
+    "FLAG_MAJOR_SPACING_FAIL",
+    "FLAG_TRAIT_CAP_FAIL",
+]
@@ -0,0 +1,74 @@
+import math
+import pickle
+import random
+import statistics
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from testing import metrics
+from testing.accumulators import FinalAccumulator, RunningStats, TraitDistribution, merge_all
+from testing.policies import POLICIES
+from testing.runner import run_batch
+
+
+def test_running_stats_merge_matches_single_stream():
+    rng = random.Random(3)
+    values = [rng.gauss(5.0, 2.0) for _ in range(1000)]
+    whole = RunningStats()
+    for v in values:
+        whole.add(v)
+    parts = [RunningStats() for _ in range(4)]
+    for i, v in enumerate(values):
+        parts[i % 7 % 4].add(v)
+
+    merged = merge_all(pickle.loads(pickle.dumps(p)) for p in parts)
+    assert merged.n == whole.n == 1000
+    assert merged.mean == pytest.approx(statistics.fmean(values))
+    assert merged.variance == pytest.approx(statistics.variance(values))
+    assert whole.variance == pytest.approx(statistics.variance(values))
+    assert math.isnan(RunningStats().variance)
+    assert RunningStats().merge(RunningStats()).n == 0
+
+
+def test_final_accumulator_matches_metrics_and_merges():
+    finals = [r["final"] for r in run_batch(POLICIES["random"], range(40), record="final")]
+    traces = [[f] for f in finals]
+
+    acc = FinalAccumulator()
+    for final in finals:
+        acc.add(final)
+    assert acc.runs == 40
+    assert acc.distribution.means() == metrics.trait_distribution(traces)
+    for trait in ("Hubris", "Fear", "Control & Perfectionism"):
+        assert acc.reveals.rate(trait) == metrics.reveal_accuracy_rate(finals, trait)
+
+    halves = [FinalAccumulator(), FinalAccumulator(), FinalAccumulator()]
+    for i, final in enumerate(finals):
+        halves[i * 3 // 40].add(final)
+    merged = merge_all(pickle.loads(pickle.dumps(h)) for h in halves)
+    assert merged.runs == 40
+    assert merged.reveals == acc.reveals
+    means = merged.distribution.means()
+    assert means.keys() == acc.distribution.means().keys()
+    for trait, value in acc.distribution.means().items():
+        assert means[trait] == pytest.approx(value)
+        assert merged.distribution.stats[trait].variance == pytest.approx(
+            acc.distribution.stats[trait].variance
+        )
+
+
+def test_trait_distribution_counts_missing_traits_as_zero():
+    dist = TraitDistribution()
+    dist.add({"A": 1.0})
+    dist.add({"B": 3.0})
+    other = TraitDistribution()
+    other.add({"C": 6.0})
+    dist.merge(other)
+    assert dist.means() == {"A": 1 / 3, "B": 1.0, "C": 2.0}
+    assert dist.stats["B"].variance == pytest.approx(statistics.variance([0.0, 3.0, 0.0]))
+    with pytest.raises(ValueError):
+        merge_all([])
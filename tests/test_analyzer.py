@@ -0,0 +1,79 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from testing import assertions, metrics
+from testing.analyzer import CHECKS, TraceAnalyzer, analyze
+from testing.policies import POLICIES
+from testing.runner import iter_run, run, run_batch
+
+HELPERS = {
+    "scene_caps": assertions.check_scene_caps,
+    "trait_caps": assertions.check_trait_caps,
+    "major_spacing": assertions.check_major_spacing,
+    "tag_integrity": assertions.check_tag_integrity,
+}
+
+
+def _expected(traces):
+    return {
+        "errors": {name: [HELPERS[name](t) for t in traces] for name in CHECKS},
+        "path": metrics.path_coverage(traces),
+        "choice": metrics.choice_coverage(traces),
+        "distribution": metrics.trait_distribution(traces),
+    }
+
+
+@pytest.mark.parametrize("policy", sorted(POLICIES))
+@pytest.mark.parametrize("record", ["deltas", "full"])
+def test_analyzer_matches_individual_helpers(policy, record):
+    traces = [r["trace"] for r in run_batch(POLICIES[policy], range(6), record=record)]
+    report = analyze(traces)
+    expected = _expected(traces)
+
+    assert report.runs == 6
+    assert report.errors == expected["errors"]
+    assert report.error_counts == {
+        name: sum(len(e) for e in lists) for name, lists in expected["errors"].items()
+    }
+    assert report.path_coverage == expected["path"]
+    assert report.choice_coverage == expected["choice"]
+    assert report.trait_distribution == expected["distribution"]
+
+    # Plain step lists take the dictionary path and agree as well.
+    assert analyze([t.as_dicts() for t in traces]) == report
+
+
+def test_analyzer_uses_calibrated_weights():
+    calibration = {"multipliers": {"Fear": 2.0, "Control": 1.4}, "anti_streak": 0.15}
+    trace = run(POLICIES["random"](), 5, calibrator=calibration)["trace"]
+    assert any(trace.delta(s) != dict(trace.outcome(s).delta) for s in range(trace.steps))
+    result = TraceAnalyzer().feed(trace)
+    for name in CHECKS:
+        assert result[name] == HELPERS[name](trace)
+
+
+def test_analyzer_is_incremental_and_rejects_final_traces():
+    analyzer = TraceAnalyzer(keep_errors=False)
+    for run_result in run_batch(POLICIES["random"], range(3)):
+        analyzer.feed(run_result["trace"])
+    report = analyzer.report()
+    assert report.runs == 3 and report.errors == {}
+    assert report.path_coverage
+
+    final_only = run(POLICIES["random"](), 0, record="final")["trace"]
+    with pytest.raises(ValueError):
+        analyzer.feed(final_only)
+    assert analyzer.runs == 3
+    assert analyze([]).trait_distribution == {}
+
+
+def test_analyzer_accepts_iter_run_generators():
+    policy = POLICIES["hubris"]
+    streamed = analyze(iter_run(policy(), seed) for seed in range(3))
+    listed = analyze(list(iter_run(policy(), seed)) for seed in range(3))
+    assert streamed == listed
+    assert streamed.runs == 3 and streamed.trait_distribution
@@ -0,0 +1,122 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from analytics.batch_store import RunBatch, convert, encode_runs, iter_runs, load_runs
+from analytics.choice_histogram import HISTOGRAM_FILE, ChoiceHistogram, rebuild_histogram
+from analytics.ingest_runs import ingest_runs
+from analytics.transitions import from_runs
+from cli.build_index import build_index
+from cli.run_writer import batch_path, write_batch
+from src.cli import testrig
+from testing.runner import run_batch
+from testing.policies import POLICIES
+
+CALIBRATION = json.loads((ROOT / "configs" / "calibrator_v1.json").read_text())
+
+
+def _json_runs(directory: Path):
+    return [json.loads(p.read_text()) for p in sorted(directory.glob("run_*.json"))]
+
+
+@pytest.fixture()
+def dirs(tmp_path):
+    """The same runs written as JSON files and as batch files."""
+
+    json_dir, batch_dir = tmp_path / "json", tmp_path / "batch"
+    for out, fmt in ((json_dir, "json"), (batch_dir, "batch")):
+        write_batch("random", range(6), 20, output_dir=out, timestamp="t", format=fmt)
+        write_batch("hubris", range(3), 20, output_dir=out, timestamp="t", format=fmt, calibration=CALIBRATION)
+    return json_dir, batch_dir
+
+
+def test_batch_reads_back_as_json_artifacts(dirs):
+    json_dir, batch_dir = dirs
+    assert not list(batch_dir.glob("*.json"))
+    batched = load_runs(batch_path(batch_dir, "random", list(range(6))))
+    batched += load_runs(batch_path(batch_dir, "hubris", list(range(3))))
+    expected = {r["runId"]: r for r in _json_runs(json_dir)}
+    assert {r["runId"]: r for r in batched} == expected
+    assert all("delta" in d for r in batched if r["policy"] == "hubris" for d in r["decisions"])
+
+
+def test_step_lists_and_unknown_runs_round_trip():
+    result = next(run_batch(POLICIES["random"], [3], 12))
+    trace = result["trace"].as_dicts()
+    dashboard = {"timestamp": "t", "policy": "random", "trace": trace, "final": result["final"]}
+    legacy = {"decisions_made": 12, "trait_progression": trace, "final_reveal": ["Hubris"]}
+    odd = {"trace": [{"step": 1}], "note": "kept verbatim"}
+    runs = [dashboard, legacy, odd, {}]
+    assert list(RunBatch.from_bytes(encode_runs(runs))) == runs
+
+
+def test_readers_see_batch_runs(dirs, tmp_path):
+    json_dir, batch_dir = dirs
+    by_id = lambda runs: sorted(runs, key=lambda r: r["runId"])
+    assert by_id(build_index(batch_dir)) == by_id(build_index(json_dir))
+
+    rows = ingest_runs(json_dir, tmp_path / "json.csv")
+    assert sorted(ingest_runs(batch_dir, tmp_path / "batch.csv"), key=str) == sorted(rows, key=str)
+
+    assert rebuild_histogram(batch_dir) == rebuild_histogram(json_dir)
+    assert from_runs(batch_dir) == from_runs(json_dir)
+
+
+def test_convert_packs_existing_files(tmp_path):
+    results = ROOT / "data" / "test_results"
+    expected = _json_runs(results)
+    written = convert(results, tmp_path, batch_size=16)
+    assert len(written) == -(-len(expected) // 16)
+    packed = [data for _, data in iter_runs(tmp_path)]
+    assert sorted(packed, key=json.dumps) == sorted(expected, key=json.dumps)
+
+
+def test_convert_removes_sources(dirs):
+    json_dir, _ = dirs
+    expected = _json_runs(json_dir)
+    convert(json_dir, remove=True)
+    assert not list(json_dir.glob("run_*.json"))
+    assert sorted((data for _, data in iter_runs(json_dir)), key=json.dumps) == sorted(
+        expected, key=json.dumps
+    )
+
+
+def test_testrig_batch_format(tmp_path):
+    testrig.main(["run", "--policy", "random", "--runs", "5", "--max-steps", "10", "--format", "batch", "--output", str(tmp_path)])
+    assert not list(tmp_path.glob("run_*.json"))
+    assert all(p.name.startswith("batch_random_") for p in tmp_path.glob("*.jrb"))
+    index = json.loads((tmp_path / "index.json").read_text())
+    assert sorted(entry["runId"] for entry in index) == [f"random_{seed}" for seed in range(5)]
+
+    # Re-writing the batch does not count its runs twice.
+    testrig.main(["run", "--policy", "random", "--runs", "5", "--max-steps", "10", "--format", "batch", "--output", str(tmp_path)])
+    assert ChoiceHistogram.load(tmp_path / HISTOGRAM_FILE).runs() == 5
+
+
+def test_batch_files_do_not_depend_on_workers(tmp_path):
+    common = ["run", "--policy", "hubris", "--runs", "12", "--max-steps", "8", "--format", "batch"]
+    serial, parallel = tmp_path / "serial", tmp_path / "parallel"
+    testrig.main(common + ["--output", str(serial)])
+    testrig.main(common + ["--output", str(parallel), "--workers", "3"])
+    names = sorted(p.name for p in serial.glob("*.jrb"))
+    assert names == sorted(p.name for p in parallel.glob("*.jrb")) == ["batch_hubris_0-11.jrb"]
+
+    # Rerunning with another worker count rewrites the same files.
+    testrig.main(common + ["--output", str(serial), "--workers", "3"])
+    assert sorted(p.name for p in serial.glob("*.jrb")) == names
+    assert len(build_index(serial)) == 12
+
+
+def test_overlapping_batches_are_superseded(tmp_path):
+    write_batch("random", range(0, 12), 8, output_dir=tmp_path, format="batch")
+    write_batch("random", range(5, 21), 8, output_dir=tmp_path, format="batch")
+
+    assert sorted(p.name for p in tmp_path.glob("*.jrb")) == ["batch_random_0-4.jrb", "batch_random_5-20.jrb"]
+    seeds = [data["seed"] for _, data in iter_runs(tmp_path)]
+    assert sorted(seeds) == list(range(21))
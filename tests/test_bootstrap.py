@@ -0,0 +1,107 @@
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from analytics.baseline_metrics import bootstrap_metrics, compute_metrics, main
+from testing import metrics
+from testing.bootstrap import entropy, entropy_interval, mean_intervals, resample_means
+from testing.policies import POLICIES
+from testing.runner import run_batch
+
+
+def test_resample_means_match_explicit_resampling():
+    rng = np.random.default_rng(1)
+    samples = rng.random((50, 3))
+    replicates = resample_means(samples, resamples=40, seed=7)
+    assert replicates.shape == (40, 3)
+
+    # Same draws, one resample at a time.
+    draws = np.random.default_rng(7).integers(0, 50, size=(40, 50))
+    assert np.allclose(replicates, samples[draws].mean(axis=1))
+    assert np.array_equal(resample_means(samples, 40, seed=7), replicates)
+    assert resample_means(samples[:, 0], 10).shape == (10,)
+    with pytest.raises(ValueError):
+        resample_means(np.empty((0, 2)))
+
+
+def test_intervals_cover_estimates_and_shrink():
+    rng = np.random.default_rng(2)
+    small = mean_intervals(rng.random(100), resamples=1000)[0]
+    large = mean_intervals(rng.random(10_000), resamples=1000)[0]
+    assert small.low <= small.estimate <= small.high
+    assert large.high - large.low < (small.high - small.low) / 5
+    assert entropy(np.array([[1.0, 1.0], [0.0, 0.0]])).tolist() == [1.0, 0.0]
+    assert entropy_interval(np.ones((10, 4))).estimate == pytest.approx(2.0)
+
+
+def test_metrics_intervals_wrap_point_estimates():
+    finals = [r["final"] for r in run_batch(POLICIES["random"], range(200), record="final")]
+    traces = [[f] for f in finals]
+
+    reveal = metrics.reveal_accuracy_interval(finals, "Hubris", resamples=500)
+    assert reveal.estimate == pytest.approx(metrics.reveal_accuracy_rate(finals, "Hubris"))
+    assert reveal.low <= reveal.estimate <= reveal.high
+
+    shares = metrics.trait_distribution_interval(traces, resamples=500)
+    expected = metrics.trait_distribution(traces)
+    assert shares.keys() == expected.keys()
+    for trait, interval in shares.items():
+        assert interval.estimate == pytest.approx(expected[trait])
+        assert interval.low <= interval.estimate <= interval.high
+
+    assert metrics.entropy_interval(traces, resamples=500).high > 0
+    assert metrics.reveal_accuracy_interval([], "Hubris").estimate == 0.0
+    assert metrics.trait_distribution_interval([]) == {}
+
+
+def _rows(runs):
+    rng = np.random.default_rng(3)
+    rows = []
+    for run in range(runs):
+        shares = rng.dirichlet(np.ones(4)) * 100
+        final = {t: float(v) for t, v in zip("ABCD", shares)}
+        top3 = sorted(final, key=final.get, reverse=True)[:3]
+        for _ in range(run % 5 + 1):
+            rows.append(
+                {
+                    "run": f"r{run}",
+                    "policy": "random",
+                    "final_normalized": json.dumps(final),
+                    "top3": json.dumps(top3),
+                }
+            )
+    return rows
+
+
+def test_baseline_bootstrap_report(tmp_path):
+    rows = _rows(2000)
+    start = time.perf_counter()
+    result = bootstrap_metrics(rows, resamples=2000)
+    assert time.perf_counter() - start < 5.0
+
+    base = compute_metrics(rows)
+    assert result["entropy_low"] <= base["entropy"] <= result["entropy_high"]
+    for trait in "ABCD":
+        assert result[f"share_{trait}_low"] <= result[f"share_{trait}"] <= result[f"share_{trait}_high"]
+        assert 0.0 <= result[f"reveal_{trait}_low"] <= result[f"reveal_{trait}_high"] <= 1.0
+    assert bootstrap_metrics([]) == {}
+
+    csv_path = tmp_path / "runs.csv"
+    with csv_path.open("w", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows[:200])
+    report = tmp_path / "report.md"
+    main(["--in", str(csv_path), "--report", str(report), "--bootstrap", "200"])
+    text = report.read_text()
+    assert "entropy_high:" in text and "share_A_low:" in text
+    main(["--in", str(csv_path), "--report", str(report)])
+    assert "entropy_high:" not in report.read_text()
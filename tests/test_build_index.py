@@ -0,0 +1,79 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+import cli.build_index as index_module
+from analytics.run_log import LOG_DIR, RunLog
+from cli.build_index import MANIFEST_FILE, build_index, refresh_index
+from cli.run_writer import write_batch
+
+
+def _fresh(results):
+    (results / MANIFEST_FILE).unlink()
+    return build_index(results)
+
+
+def _count_parses(monkeypatch):
+    parsed = []
+    original = index_module._file_block
+
+    def counting(path):
+        parsed.append(path.name)
+        return original(path)
+
+    monkeypatch.setattr(index_module, "_file_block", counting)
+    return parsed
+
+
+def test_index_text_matches_json_dump(tmp_path):
+    write_batch("random", range(3), 10, output_dir=tmp_path)
+    write_batch("hubris", range(2), 10, output_dir=tmp_path, format="batch")
+    index = build_index(tmp_path)
+    assert len(index) == 5
+    assert (tmp_path / "index.json").read_text() == json.dumps(index, indent=2)
+    assert refresh_index(tmp_path) == 5
+
+    empty = tmp_path / "empty"
+    empty.mkdir()
+    assert build_index(empty) == []
+    assert (empty / "index.json").read_text() == "[]"
+
+
+def test_only_new_changed_and_deleted_files_are_handled(tmp_path, monkeypatch):
+    write_batch("random", range(6), 10, output_dir=tmp_path)
+    build_index(tmp_path)
+    parsed = _count_parses(monkeypatch)
+
+    assert len(build_index(tmp_path)) == 6
+    assert parsed == []
+
+    write_batch("random", range(6, 8), 10, output_dir=tmp_path)
+    (tmp_path / "run_random_0.json").unlink()
+    changed = tmp_path / "run_random_1.json"
+    data = json.loads(changed.read_text())
+    data["flags"] = ["edited"]
+    changed.write_text(json.dumps(data))
+
+    index = build_index(tmp_path)
+    assert sorted(parsed) == ["run_random_1.json", "run_random_6.json", "run_random_7.json"]
+    assert [e["runId"] for e in index] == [f"random_{i}" for i in range(1, 8)]
+    assert index[0]["flags"] == ["edited"]
+    assert index == _fresh(tmp_path)
+
+    # An index edited by hand is rebuilt rather than spliced.
+    (tmp_path / "index.json").write_text("[]")
+    assert build_index(tmp_path) == index
+
+
+def test_run_log_is_followed_incrementally(tmp_path):
+    with RunLog(tmp_path / LOG_DIR, mode="a") as log:
+        log.extend({"runId": f"r{i}", "seed": i} for i in range(3))
+    assert [e["seed"] for e in build_index(tmp_path)] == [0, 1, 2]
+
+    with RunLog(tmp_path / LOG_DIR, mode="a") as log:
+        log.extend([{"runId": "r1", "seed": 10}, {"runId": "r3", "seed": 3}])
+    index = build_index(tmp_path)
+    assert [e["seed"] for e in index] == [0, 10, 2, 3]
+    assert index == _fresh(tmp_path)
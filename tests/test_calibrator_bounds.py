@@ -41,3 +41,54 @@ def test_anti_streak_and_decay() -> None:
 def test_epsilon_bound() -> None:
     calib = Calibrator(_base_config({"epsilon": 0.05}))
     assert calib.epsilon == 0.03
+
+
+def test_streak_state_matches_history() -> None:
+    calib = Calibrator(_base_config({"multipliers": {"Fear": 1.5, "Wrath": 0.9}}))
+    history = []
+    streak_trait, streak = None, 0
+    for selected in ["Fear", "Fear", "Wrath", "Fear", "Fear", "Fear", "Wrath"]:
+        for trait in ("Fear", "Wrath", "Envy"):
+            assert calib.multiplier(trait, streak_trait, streak) == calib.calibrate(history, trait)
+        history.append(selected)
+        streak_trait, streak = calib.advance(streak_trait, streak, selected)
+
+
+def test_runner_applies_calibration() -> None:
+    sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+    from testing.policies import POLICIES
+    from testing.runner import iter_run, run
+
+    config = _base_config({"multipliers": {"Fear": 2.0, "Control": 1.4, "Hubris": 0.8}})
+    calib = Calibrator(config)
+
+    for record in ("full", "deltas"):
+        result = run(POLICIES["random"](), 5, record=record, calibrator=config)
+        history = []
+        totals = {}
+        steps = result["trace"][:-1]
+        for step in steps:
+            for trait, weight in (("primary", "pw"), ("secondary", "sw")):
+                name = step[trait]
+                if name and step[weight] > 0:
+                    applied = step[weight] * calib.calibrate(history, name)
+                    assert step["delta"][name] == applied
+                    totals[name] = totals.get(name, 0.0) + applied
+            history.append(step["primary"])
+        for name, value in totals.items():
+            assert steps[-1]["totals"][name] == value
+        assert list(iter_run(POLICIES["random"](), 5, calibrator=calib)) == result["trace"].as_dicts()
+
+
+def test_runner_resolves_calibration_aliases() -> None:
+    sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+    from testing.policies import POLICIES
+    from testing.runner import run
+
+    def trace(multipliers):
+        config = _base_config({"multipliers": multipliers})
+        return run(POLICIES["random"](), 5, calibrator=config)["trace"].as_dicts()
+
+    aliased = trace({"Fear & Insecurity": 2.0, "Control & Perfectionism": 1.4})
+    assert aliased == trace({"Fear": 2.0, "Control": 1.4})
+    assert aliased != trace({})
@@ -26,3 +26,33 @@ def test_normalize_traits_merges_duplicates():
     norm = normalize_traits(data)
     assert norm["Control"] == 3.0
     assert "Control & Perfectionism" not in norm
+
+
+def test_registry_codes_cover_runner_labels():
+    from modules.trait_registry import TRAIT_REGISTRY
+    from testing.runner import TRAITS
+
+    assert [TRAIT_REGISTRY.code(label) for label in TRAITS] == list(range(12))
+    assert TRAIT_REGISTRY.to_array({"Control & Perfectionism": 1.0, "Control": 2.0})[3] == 3.0
+
+
+def test_trace_trait_row_merges_aliases():
+    from modules.trait_registry import TRAIT_REGISTRY
+    from testing.policies import POLICIES
+    from testing.runner import run
+
+    trace = run(POLICIES["random"](), 3)["trace"]
+    step = trace.steps - 1
+    expected = normalize_traits(trace[step]["totals"])
+    row = trace.trait_row(step)
+    assert TRAIT_REGISTRY.from_array(row) == {
+        name: expected.get(name, 0.0) for name in TRAIT_REGISTRY.names
+    }
+
+
+def test_canonical_map_agrees_with_registry():
+    from analytics.canonical import CANONICAL_MAP
+    from modules.trait_registry import TRAIT_REGISTRY
+
+    assert CANONICAL_MAP["Cynicism"] == "Cynicism"
+    assert all(TRAIT_REGISTRY.canonical(label) == name for label, name in CANONICAL_MAP.items())
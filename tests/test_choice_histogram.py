@@ -0,0 +1,87 @@
+import json
+import pickle
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from analytics.choice_histogram import HISTOGRAM_FILE, ChoiceHistogram, rebuild_histogram
+from analytics.ingest_runs import ingest_runs
+from cli.run_writer import write_batch
+from src.cli import testrig
+
+
+def _decision_counts(results: Path):
+    counts = Counter()
+    for file in results.glob("run_*.json"):
+        data = json.loads(file.read_text())
+        for d in data["decisions"]:
+            counts[(data["policy"], d["sceneId"], d["choiceId"])] += 1
+    return counts
+
+
+def test_histogram_collected_while_writing_matches_artifacts(tmp_path):
+    results = tmp_path / "results"
+    hist = ChoiceHistogram()
+    write_batch("random", range(6), 20, output_dir=results, histogram=hist)
+    write_batch("hubris", range(3), 20, output_dir=results, histogram=hist)
+
+    assert {(p, s, c): n for p, s, c, n in hist.items()} == _decision_counts(results)
+    assert hist.runs() == 9 and hist.runs("hubris") == 3
+    scene = hist.scenes()[0]
+    assert sum(hist.scene_counts(scene, "random").values()) == 6
+    assert sum(hist.shares(scene).values()) == pytest.approx(1.0)
+
+    assert rebuild_histogram(results) == hist
+    assert ChoiceHistogram.from_bytes(hist.to_bytes()) == hist
+    assert pickle.loads(pickle.dumps(hist)) == hist
+
+    csv_path = tmp_path / "runs.csv"
+    ingest_runs(results, csv_path, tmp_path / "ingested.bin")
+    assert ChoiceHistogram.load(tmp_path / "ingested.bin") == hist
+
+
+def test_shards_merge_to_whole():
+    whole = ChoiceHistogram()
+    shards = [ChoiceHistogram(), ChoiceHistogram()]
+    picks = [("a", "s1", "x"), ("b", "s1", "y"), ("a", "s2", "z"), ("a", "s1", "x")]
+    for i, key in enumerate(picks):
+        whole.add(*key)
+        shards[i % 2].add(*key)
+    merged = ChoiceHistogram().merge(shards[1]).merge(shards[0])
+    assert merged == whole
+    assert merged.count("s1", "x") == 2 and merged.count("s1", "y", "a") == 0
+    assert whole.scene_counts("s1") == {"x": 2, "y": 1}
+
+    with pytest.raises(ValueError):
+        whole.add("b", "s2", "z", -1)
+    with pytest.raises(ValueError):
+        ChoiceHistogram.from_bytes(b"nope")
+
+
+def test_testrig_keeps_histogram_in_sync_when_overwriting(tmp_path):
+    common = ["--max-steps", "12", "--output", str(tmp_path)]
+    testrig.main(["run", "--policy", "random", "--runs", "5"] + common)
+    testrig.main(["run", "--policy", "random", "--runs", "5", "--seed", "3", "--workers", "2"] + common)
+    testrig.main(["run", "--policy", "hubris", "--runs", "2"] + common)
+
+    hist = ChoiceHistogram.load(tmp_path / HISTOGRAM_FILE)
+    assert hist.runs("random") == 8
+    assert {(p, s, c): n for p, s, c, n in hist.items()} == _decision_counts(tmp_path)
+
+
+def test_testrig_subtracts_superseded_batch_files(tmp_path):
+    common = ["run", "--policy", "random", "--max-steps", "8", "--format", "batch", "--output", str(tmp_path)]
+    testrig.main(common + ["--runs", "12"])
+    testrig.main(common + ["--runs", "12", "--workers", "3"])
+    assert ChoiceHistogram.load(tmp_path / HISTOGRAM_FILE).runs() == 12
+
+    testrig.main(common + ["--seed", "5", "--runs", "16", "--workers", "3"])
+    hist = ChoiceHistogram.load(tmp_path / HISTOGRAM_FILE)
+    assert hist.runs() == 21
+    assert hist == rebuild_histogram(tmp_path)
@@ -0,0 +1,47 @@
+import os
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from testing.content import SCENARIO_FILES, data_path, load_bundle
+from testing.runner import load_scenarios
+
+
+def test_bundle_is_cached_and_immutable():
+    bundle = load_bundle()
+    assert load_bundle() is bundle
+    assert len(bundle.scenes) == len(load_scenarios())
+
+    record = bundle.scenes[0].records[0]
+    try:
+        record["choice_id"] = "tampered"
+    except TypeError:
+        pass
+    assert record["choice_id"] == bundle.scenes[0].options[0].choice_id
+
+
+def test_load_scenarios_returns_copies():
+    first = load_scenarios()
+    first[0]["choices"].clear()
+    assert load_scenarios()[0]["choices"]
+
+
+def test_bundle_invalidated_on_change(tmp_path):
+    for fname in SCENARIO_FILES.values():
+        shutil.copy(data_path() / fname, tmp_path / fname)
+
+    original = load_bundle(tmp_path)
+
+    # Touching a file without changing it keeps the compiled bundle.
+    act1 = tmp_path / SCENARIO_FILES[1]
+    stat = act1.stat()
+    os.utime(act1, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert load_bundle(tmp_path) is original
+
+    act1.write_text(act1.read_text().replace("mirror_pool", "mirror_lake"))
+    updated = load_bundle(tmp_path)
+    assert updated is not original
+    assert updated.digest != original.digest
+    assert updated.scenes[0].scene_id == "mirror_lake"
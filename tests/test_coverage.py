@@ -0,0 +1,87 @@
+import json
+import pickle
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from testing import metrics
+from testing import coverage as coverage_module
+from testing.content import compile_bundle, load_bundle
+from testing.coverage import CoverageBitmap, measure
+from testing.policies import POLICIES
+from testing.runner import run_batch
+
+
+def test_bitmap_matches_set_coverage_and_merges():
+    traces = [r["trace"] for r in run_batch(POLICIES["random"], range(12), max_steps=20, record="deltas")]
+    parts = [CoverageBitmap.for_bundle(max_steps=20) for _ in range(3)]
+    for i, trace in enumerate(traces):
+        parts[i % 3].add(trace)
+    merged = pickle.loads(pickle.dumps(parts[0]))
+    for part in parts[1:]:
+        merged.merge(pickle.loads(pickle.dumps(part)))
+
+    assert merged.runs == 12
+    assert set(merged.scene_ids()) == metrics.path_coverage(traces)
+    assert set(merged.choice_ids()) == metrics.choice_coverage(traces)
+    assert merged.scene_ratio() == 1.0
+
+    from_dicts = CoverageBitmap.for_bundle(max_steps=20)
+    for trace in traces:
+        from_dicts.add(trace.as_dicts())
+    assert (from_dicts.scenes, from_dicts.options) == (merged.scenes, merged.options)
+
+    bundle = load_bundle()
+    uncovered = merged.uncovered_choices()
+    covered = set(merged.choice_ids())
+    scenes = {s.scene_id for s in bundle.scenes[:20]}
+    assert all(scene in scenes and choice not in covered for scene, choice in uncovered)
+    assert len(uncovered) + len(merged.choice_ids()) == sum(len(s.options) for s in bundle.scenes[:20])
+    assert merged.saturated == (not uncovered)
+
+
+def test_measure_stops_once_saturated():
+    coverage = measure(POLICIES["random"], range(1000), max_steps=10)
+    assert coverage.saturated
+    assert coverage.runs < 1000
+    assert coverage.uncovered_choices() == [] and coverage.uncovered_scenes() == []
+
+    single = measure(POLICIES["hubris"], range(5), max_steps=10, stop_when_saturated=False)
+    assert single.runs == 5 and not single.saturated
+    assert single.choice_ratio() < 1.0
+
+
+def test_bitmaps_over_different_content_do_not_merge():
+    coverage = CoverageBitmap.for_bundle()
+    with pytest.raises(ValueError):
+        coverage.merge(CoverageBitmap("other", 1, 1))
+
+
+def _bundle(weight):
+    scene = {
+        "scene_id": "s0",
+        "choices": [{"choice_id": "c0", "primary_trait": "Fear", "primary_weight": weight}],
+    }
+    return compile_bundle({1: json.dumps({"scenes": [scene]}).encode()})
+
+
+def test_traces_over_other_content_are_rejected():
+    other = _bundle(0.5)
+    trace = next(run_batch(POLICIES["random"], [0], max_steps=1, bundle=other, record="deltas"))["trace"]
+    assert trace.digest == other.digest
+
+    CoverageBitmap.for_bundle(other).add(trace)
+    with pytest.raises(ValueError):
+        CoverageBitmap.for_bundle().add(trace)
+
+
+def test_lookups_keep_recent_content_only():
+    bundles = [_bundle(w) for w in (0.1, 0.2, 0.3)]
+    for bundle in bundles:
+        CoverageBitmap.for_bundle(bundle).add([{"scene_id": "s0", "choice_id": "c0"}], bundle)
+    assert list(coverage_module._LOOKUPS) == [
+        b.digest for b in bundles[-coverage_module._LOOKUP_DIGESTS:]
+    ]
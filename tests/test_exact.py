@@ -0,0 +1,75 @@
+import sys
+from fractions import Fraction
+from itertools import product
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from testing.exact import DEFAULT_MAX_STEPS, solve
+from testing.runner import load_bundle, run
+
+
+def _scripted(path):
+    """Policy replaying option positions from ``path`` in order."""
+
+    picks = iter(path)
+
+    def policy(state, rng):
+        return state["options"][next(picks)]["choice_id"]
+
+    return policy
+
+
+@pytest.mark.parametrize("model", ["random", "uniform"])
+def test_probabilities_sum_to_one(model):
+    dist = solve(model, max_steps=10)
+    for table in (dist.top3, dist.archetypes, dist.reveals):
+        assert sum(table.values()) == 1
+
+
+def test_uniform_matches_enumeration():
+    max_steps = 7
+    bundle = load_bundle()
+    sizes = [len(scene.options) for scene in bundle.scenes[:max_steps]]
+
+    expected = {}
+    paths = list(product(*(range(n) for n in sizes)))
+    for path in paths:
+        top3 = tuple(run(_scripted(path), 0, max_steps)["final"]["top3"])
+        expected[top3] = expected.get(top3, 0) + Fraction(1, len(paths))
+
+    dist = solve("uniform", max_steps=max_steps)
+    assert {k: v for k, v in dist.top3.items() if v} == expected
+
+
+def test_random_matches_monte_carlo():
+    from testing.policies.random_policy import SeededRandomPolicy
+
+    max_steps = 12
+    runs = 4000
+    counts = {}
+    for seed in range(runs):
+        top3 = tuple(run(SeededRandomPolicy(), seed, max_steps, record="final")["final"]["top3"])
+        counts[top3] = counts.get(top3, 0) + 1
+
+    dist = solve("random", max_steps=max_steps)
+    for top3, p in dist.top3.items():
+        assert abs(counts.get(top3, 0) / runs - float(p)) < 0.03
+
+
+def test_default_prefix_completes():
+    dist = solve()
+    assert dist.steps == DEFAULT_MAX_STEPS
+    assert sum(dist.top3.values()) == 1
+
+
+def test_state_limit():
+    with pytest.raises(RuntimeError):
+        solve(max_steps=20, max_states=100)
+
+
+def test_unknown_model():
+    with pytest.raises(ValueError):
+        solve("greedy")
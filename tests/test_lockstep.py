@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+pytest.importorskip("numpy")
+
+from testing.lockstep import run_lockstep
+from testing.policies import POLICIES
+from testing.policies.random_policy import SeededRandomPolicy
+from testing.runner import run
+
+
+@pytest.mark.parametrize(
+    "name", ["hubris", "control_fear", "deception_avarice", "reckless_chaotic"]
+)
+def test_lockstep_matches_runner(name):
+    policy_cls = POLICIES[name]
+    seeds = list(range(50))
+    for max_steps in (100, 9):
+        finals = run_lockstep(policy_cls, seeds, max_steps)
+        assert finals == [run(policy_cls(), s, max_steps)["final"] for s in seeds]
+
+
+def test_lockstep_rejects_stateful_policies():
+    with pytest.raises(TypeError):
+        run_lockstep(SeededRandomPolicy, [0])
@@ -0,0 +1,85 @@
+import math
+import pickle
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from testing.policies import POLICIES
+from testing.quantiles import QuantileSketch, TrajectoryBands, collect_bands
+from modules.trait_registry import TRAIT_REGISTRY
+from testing.runner import run_batch
+
+
+def _exact(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_sketch_quantiles_within_relative_error():
+    rng = random.Random(4)
+    values = [rng.lognormvariate(0, 2) for _ in range(5000)] + [0.0] * 300
+    values += [-rng.expovariate(1.0) for _ in range(200)]
+    sketch = QuantileSketch(alpha=0.01)
+    for v in values:
+        sketch.add(v)
+
+    for q in (0.0, 0.01, 0.05, 0.3, 0.5, 0.9, 0.95, 0.999, 1.0):
+        exact = _exact(values, q)
+        assert abs(sketch.quantile(q) - exact) <= 0.01 * abs(exact) + 1e-12
+    assert (sketch.quantile(0.0), sketch.quantile(1.0)) == (min(values), max(values))
+    assert len(sketch.positive) < 2000
+    assert math.isnan(QuantileSketch().quantile(0.5))
+
+
+def test_sketch_merge_is_exact_and_picklable():
+    rng = random.Random(5)
+    values = [rng.uniform(0, 3) for _ in range(2000)]
+    whole = QuantileSketch()
+    parts = [QuantileSketch() for _ in range(3)]
+    for i, v in enumerate(values):
+        whole.add(v)
+        parts[i % 3].add(v)
+    merged = pickle.loads(pickle.dumps(parts[2])).merge(parts[0]).merge(parts[1])
+    assert merged.positive == whole.positive and merged.count == whole.count
+    assert [merged.quantile(q) for q in (0.05, 0.5, 0.95)] == [whole.quantile(q) for q in (0.05, 0.5, 0.95)]
+    assert QuantileSketch.from_dict(whole.to_dict()).quantile(0.5) == whole.quantile(0.5)
+    with pytest.raises(ValueError):
+        whole.merge(QuantileSketch(alpha=0.05))
+
+
+def test_trajectory_bands_match_exact_percentiles():
+    traces = [r["trace"] for r in run_batch(POLICIES["random"], range(300), max_steps=15, record="deltas")]
+    bands = collect_bands(POLICIES["random"], range(300), max_steps=15)
+    assert bands.runs == 300 and bands.steps == 15
+
+    result = bands.bands()
+    for trait in ("Control", "Fear", "Hubris", "Moodiness"):
+        for step in (0, 7, 14):
+            values = [t.trait_row(step)[TRAIT_REGISTRY.code(trait)] for t in traces]
+            for q in (0.05, 0.5, 0.95):
+                exact = _exact(values, q)
+                assert result[trait][q][step] == pytest.approx(exact, rel=0.011, abs=1e-9)
+
+    # Step dictionaries and split collection give the same sketches.
+    from_dicts = TrajectoryBands()
+    for trace in traces:
+        from_dicts.add(trace.as_dicts())
+    halves = collect_bands(POLICIES["random"], range(150), max_steps=15)
+    halves.merge(collect_bands(POLICIES["random"], range(150, 300), max_steps=15))
+    restored = TrajectoryBands.from_dict(pickle.loads(pickle.dumps(halves.to_dict())))
+    assert from_dicts.bands() == result == restored.bands()
+
+
+def test_bands_merge_trait_aliases():
+    # The content weights the short "Control" and "Fear" labels, which the
+    # runner keeps in columns of their own next to the long labels.
+    bands = collect_bands(POLICIES["random"], range(200), max_steps=20)
+    assert bands.traits == list(TRAIT_REGISTRY.names)
+    result = bands.bands()
+    for trait in ("Control", "Fear"):
+        assert result[trait][0.95][-1] > 0
+    assert TrajectoryBands(["Control & Perfectionism"]).traits == ["Control"]
@@ -0,0 +1,89 @@
+import csv
+import json
+import shutil
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+from analytics.choice_histogram import HISTOGRAM_FILE, ChoiceHistogram, rebuild_histogram
+from analytics.ingest_runs import ingest_runs
+from cli.build_index import build_index
+from cli.resim import find_stale, resimulate
+from cli.run_writer import write_batch
+from testing.content import load_bundle
+
+
+def _edit_act2(content: Path):
+    act2 = content / "act2_beasts.json"
+    data = json.loads(act2.read_text())
+    choice = data["scenes"][0]["choices"][0]
+    choice["primary_weight"] = round(choice["primary_weight"] + 0.1, 2)
+    act2.write_text(json.dumps(data))
+
+
+def test_resim_only_reruns_runs_visiting_changed_scenes(tmp_path):
+    content = tmp_path / "scenarios"
+    shutil.copytree(ROOT / "data" / "scenarios", content)
+    results = tmp_path / "results"
+    csv_path = tmp_path / "runs.csv"
+
+    before = load_bundle(content)
+    act1 = len(before.acts[1])
+    short = write_batch("random", range(4), act1, output_dir=results, bundle=before)
+    full = write_batch("hubris", range(3), 100, output_dir=results, bundle=before)
+    build_index(results)
+    ingest_runs(results, csv_path)
+    rebuild_histogram(results)
+    assert find_stale(results, before) == ([], 7)
+
+    _edit_act2(content)
+    after = load_bundle(content)
+    run_ids, reused = resimulate(results, csv_path, bundle=after)
+
+    assert sorted(run_ids) == sorted(full)
+    assert reused == len(short)
+    assert find_stale(results, after) == ([], 7)
+
+    # Index and CSV match a full rebuild from the rewritten artifacts.
+    index = json.loads((results / "index.json").read_text())
+    assert index == build_index(results)
+    with csv_path.open() as f:
+        updated = list(csv.DictReader(f))
+    rebuilt = tmp_path / "rebuilt.csv"
+    ingest_runs(results, rebuilt)
+    with rebuilt.open() as f:
+        assert updated == list(csv.DictReader(f))
+    assert ChoiceHistogram.load(results / HISTOGRAM_FILE) == rebuild_histogram(results)
+
+
+def test_resim_and_ingest_cover_the_run_log(tmp_path):
+    content = tmp_path / "scenarios"
+    shutil.copytree(ROOT / "data" / "scenarios", content)
+    results = tmp_path / "results"
+    csv_path = tmp_path / "runs.csv"
+
+    before = load_bundle(content)
+    act1 = len(before.acts[1])
+    short = write_batch("random", range(2), act1, output_dir=results, bundle=before, format="log")
+    full = write_batch("hubris", range(2), 100, output_dir=results, bundle=before, format="log")
+    rows = ingest_runs(results, csv_path)
+    assert {row["run"] for row in rows} == set(short + full)
+    rebuild_histogram(results)
+
+    _edit_act2(content)
+    after = load_bundle(content)
+    run_ids, reused = resimulate(results, csv_path, bundle=after)
+
+    assert sorted(run_ids) == sorted(full)
+    assert reused == len(short)
+    assert find_stale(results, after) == ([], 4)
+    assert not list(results.glob("run_*.json"))
+    with csv_path.open() as f:
+        updated = list(csv.DictReader(f))
+    rebuilt = tmp_path / "rebuilt.csv"
+    ingest_runs(results, rebuilt)
+    with rebuilt.open() as f:
+        assert updated == list(csv.DictReader(f))
+    assert ChoiceHistogram.load(results / HISTOGRAM_FILE) == rebuild_histogram(results)
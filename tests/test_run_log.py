@@ -0,0 +1,113 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from analytics.choice_histogram import HISTOGRAM_FILE, ChoiceHistogram
+from analytics.run_log import INDEX_FILE, LOG_DIR, RunLog
+from cli.build_index import build_index
+from src.cli import testrig
+
+
+def _run(i, **extra):
+    return {"runId": f"r{i}", "policy": "p", "seed": i, "decisions": list(range(i)), **extra}
+
+
+def test_append_get_and_reopen(tmp_path):
+    with RunLog(tmp_path, segment_bytes=200, mode="a") as log:
+        log.extend(_run(i) for i in range(10))
+        assert log.get("r3") == _run(3)
+    assert len(list(tmp_path.glob("segment_*.jsonl"))) > 1
+
+    log = RunLog(tmp_path, segment_bytes=200)
+    assert log.run_ids() == [f"r{i}" for i in range(10)]
+    assert [log.get(f"r{i}") for i in range(10)] == [_run(i) for i in range(10)]
+    assert list(log) == [_run(i) for i in range(10)]
+    assert log.summaries()[2] == {"runId": "r2", "policy": "p", "seed": 2}
+    assert log.get("missing") is None
+
+
+def test_later_append_supersedes(tmp_path):
+    with RunLog(tmp_path, mode="a") as log:
+        log.extend([_run(1), _run(2), _run(1, note="again")])
+    log = RunLog(tmp_path)
+    assert log.run_ids() == ["r1", "r2"]
+    assert log.get("r1")["note"] == "again"
+
+
+def test_truncated_segment_line_is_dropped(tmp_path):
+    with RunLog(tmp_path, mode="a") as log:
+        log.extend(_run(i) for i in range(3))
+    segment = tmp_path / "segment_00000.jsonl"
+    with segment.open("ab") as fh:
+        fh.write(b'{"runId":"r3","pol')
+    log = RunLog(tmp_path, mode="a")
+    assert log.run_ids() == ["r0", "r1", "r2"]
+    assert segment.read_bytes().endswith(b"\n")
+
+    with log:
+        log.append(_run(3))
+    assert list(RunLog(tmp_path)) == [_run(i) for i in range(4)]
+
+
+def test_unindexed_and_truncated_index_lines_recover(tmp_path):
+    with RunLog(tmp_path, mode="a") as log:
+        log.extend(_run(i) for i in range(3))
+    index = tmp_path / INDEX_FILE
+    lines = index.read_bytes().splitlines(keepends=True)
+    # The last run reached its segment but its index line was cut short.
+    index.write_bytes(b"".join(lines[:2]) + lines[2][:10])
+
+    with RunLog(tmp_path, mode="a") as log:
+        assert log.run_ids() == ["r0", "r1", "r2"]
+        assert log.get("r2") == _run(2)
+    assert RunLog(tmp_path).run_ids() == ["r0", "r1", "r2"]
+
+
+def test_readers_never_write_and_writers_are_exclusive(tmp_path):
+    writer = RunLog(tmp_path, mode="a")
+    writer.extend(_run(i) for i in range(2))
+    # A writer is part way through its next run and index line.
+    writer._out.write(b'{"runId":"r2","pol')
+    writer._out.flush()
+    with (tmp_path / INDEX_FILE).open("ab") as fh:
+        fh.write(b'{"runId":"r')
+    before = {p.name: p.read_bytes() for p in tmp_path.iterdir()}
+
+    reader = RunLog(tmp_path)
+    assert reader.run_ids() == ["r0", "r1"]
+    assert list(reader) == [_run(0), _run(1)]
+    assert {p.name: p.read_bytes() for p in tmp_path.iterdir()} == before
+    with pytest.raises(ValueError):
+        reader.append(_run(3))
+
+    with pytest.raises(RuntimeError):
+        RunLog(tmp_path, mode="a")
+    writer.close()
+    with RunLog(tmp_path, mode="a") as log:
+        assert log.run_ids() == ["r0", "r1"]
+
+
+def test_testrig_log_format(tmp_path):
+    serial, parallel = tmp_path / "serial", tmp_path / "parallel"
+    base = ["suite", "--all", "--runs", "3", "--max-steps", "8", "--format", "log"]
+    testrig.main(base + ["--output", str(serial)])
+    testrig.main(base + ["--output", str(parallel), "--workers", "2"])
+
+    assert not list(serial.glob("run_*.json"))
+    runs = list(RunLog(serial / LOG_DIR))
+    assert [r["runId"] for r in runs] == [r["runId"] for r in RunLog(parallel / LOG_DIR)]
+    index = json.loads((serial / "index.json").read_text())
+    assert [entry["runId"] for entry in index] == [r["runId"] for r in runs]
+    strip = lambda entries: [{k: v for k, v in e.items() if k != "timestamp"} for e in entries]
+    assert strip(index) == strip(build_index(parallel))
+
+    # Re-running the same seeds replaces the logged runs and their counts.
+    testrig.main(base + ["--output", str(serial)])
+    assert len(RunLog(serial / LOG_DIR)) == len(runs)
+    assert ChoiceHistogram.load(serial / HISTOGRAM_FILE).runs() == len(runs)
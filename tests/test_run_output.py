@@ -32,3 +32,46 @@ def test_run_writer_and_index(tmp_path):
     assert index_data[0]["runId"] == run_data["runId"]
     assert index_data[0]["policy"] == "hubris"
     assert "normalized" in index_data[0]
+
+
+def test_run_batch_matches_run():
+    from testing.policies import POLICIES
+    from testing.runner import run, run_batch
+
+    for name, policy_cls in POLICIES.items():
+        seeds = [0, 3, 11]
+        batch = list(run_batch(policy_cls, seeds, max_steps=20))
+        assert batch == [run(policy_cls(), seed, 20) for seed in seeds], name
+
+
+def test_compiled_policies_match_uncompiled():
+    from testing.policies import POLICIES
+    from testing.policies.base import RuleBasedPolicy
+    from testing.runner import run
+
+    for name, policy_cls in POLICIES.items():
+        if not issubclass(policy_cls, RuleBasedPolicy):
+            continue
+        for seed in range(20):
+            plain = policy_cls()
+            plain.compile = None  # runner skips the compile step
+            assert run(policy_cls(), seed)["final"] == run(plain, seed)["final"], name
+            assert not plain._compiled
+
+
+def test_compiled_tables_keep_recent_content_only():
+    from testing.content import compile_bundle
+    from testing.policies import POLICIES
+    from testing.policies import base
+
+    def bundle(weight):
+        scene = {
+            "scene_id": "s0",
+            "choices": [{"choice_id": "c0", "primary_trait": "Fear", "primary_weight": weight}],
+        }
+        return compile_bundle({1: json.dumps({"scenes": [scene]}).encode()})
+
+    bundles = [bundle(w) for w in (0.1, 0.2, 0.3)]
+    for b in bundles:
+        POLICIES["hubris"]().compile(b)
+    assert list(base._COMPILED) == [b.digest for b in bundles[-base._COMPILED_DIGESTS:]]
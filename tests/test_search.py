@@ -0,0 +1,78 @@
+import sys
+from itertools import product
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from testing.runner import load_bundle, run
+from testing.search import search
+
+MAX_STEPS = 9
+
+
+def _scripted(path):
+    picks = iter(path)
+    return lambda state, rng: state["options"][next(picks)]["choice_id"]
+
+
+@pytest.fixture(scope="module")
+def all_paths():
+    sizes = [len(s.options) for s in load_bundle().scenes[:MAX_STEPS]]
+    return [
+        run(_scripted(path), 0, MAX_STEPS)["trace"]
+        for path in product(*(range(n) for n in sizes))
+    ]
+
+
+@pytest.mark.parametrize("trait", ["Hubris", "Control", "Fear"])
+def test_trait_search_is_optimal(all_paths, trait):
+    result = search(f"trait:{trait}", MAX_STEPS)
+    best = max(t[-2]["totals"].get(trait, 0.0) for t in all_paths)
+    assert result.value == pytest.approx(best)
+    assert result.trace[-2]["totals"].get(trait, 0.0) == pytest.approx(best)
+
+
+def test_trait_cap_search_is_optimal(all_paths):
+    result = search("flag:trait_cap", MAX_STEPS)
+    best = max(sum("trait_cap_fail" in s["flags"] for s in t[:-1]) for t in all_paths)
+    assert result.value == best
+    assert result.flag_counts().get("trait_cap_fail", 0) == best
+
+
+@pytest.mark.parametrize("flag", ["scene_cap", "major_spacing"])
+def test_flag_search_matches_trace(flag):
+    result = search(f"flag:{flag}")
+    assert result.flag_counts().get(f"{flag}_fail", 0) == result.value
+
+
+def test_unknown_objective():
+    with pytest.raises(ValueError):
+        search("flag:everything")
+
+
+def test_major_spacing_search_on_synthetic_content():
+    import json
+
+    from testing.content import compile_bundle
+
+    scenes = [
+        {
+            "scene_id": f"s{i}",
+            "choices": [
+                {"choice_id": f"minor{i}", "primary_trait": "Fear", "primary_weight": 0.3},
+                {"choice_id": f"major{i}", "primary_trait": "Wrath", "primary_weight": 0.8},
+            ],
+        }
+        for i in range(6)
+    ]
+    bundle = compile_bundle({1: json.dumps({"scenes": scenes}).encode()})
+    result = search("flag:major_spacing", bundle=bundle)
+
+    best = 0
+    for path in product(range(2), repeat=6):
+        trace = run(_scripted(path), 0, bundle=bundle)["trace"]
+        best = max(best, sum("major_spacing_fail" in s["flags"] for s in trace[:-1]))
+    assert best > 0
+    assert result.value == best == result.flag_counts()["major_spacing_fail"]
@@ -0,0 +1,36 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from testing.metrics import reveal_accuracy_rate
+from testing.policies import POLICIES
+from testing.runner import run_batch
+from testing.sequential import Target, estimate
+
+
+def test_estimate_matches_batch_metrics():
+    result = estimate(POLICIES["random"], ["reveal:Hubris"], tolerance=0.05, batch=50, min_runs=100)
+    assert result.converged
+    assert result.runs % 50 == 0 and result.runs >= 100
+
+    finals = [r["final"] for r in run_batch(POLICIES["random"], result.seeds, record="final")]
+    mean, half = result.intervals()["reveal:Hubris"]
+    assert mean == pytest.approx(reveal_accuracy_rate(finals, "Hubris"))
+    assert half <= 0.05
+
+
+def test_estimate_stops_at_max_runs():
+    result = estimate(POLICIES["random"], ["share:Fear"], tolerance=1e-6, batch=30, max_runs=70)
+    assert not result.converged
+    assert result.runs == 70
+
+
+def test_target_resolves_aliases():
+    target = Target.parse("reveal:Control & Perfectionism")
+    assert target.name == "reveal:Control"
+    assert target.value({"top3": ["Control"]}) == 1.0
+    with pytest.raises(ValueError):
+        Target.parse("mean:Hubris")
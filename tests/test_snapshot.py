@@ -0,0 +1,33 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from testing.runner import iter_run
+from testing.snapshot import SNAPSHOT_KEYS, StateView
+
+
+def test_policies_receive_reusable_read_only_view():
+    seen = []
+
+    def policy(state, rng):
+        seen.append((state, dict(state), dict(state["totals"])))
+        with pytest.raises(TypeError):
+            state["totals"]["Hubris"] = 1.0
+        return state["options"][0]["choice_id"]
+
+    steps = list(iter_run(policy, 0, max_steps=6))[:-1]
+
+    views = {id(view) for view, _, _ in seen}
+    assert len(views) == 1
+    assert isinstance(seen[0][0], StateView)
+
+    for index, (_, copy, totals) in enumerate(seen):
+        assert list(copy) == list(SNAPSHOT_KEYS)
+        assert copy["step"] == index
+        assert copy["scene_id"] == steps[index]["scene_id"]
+        # Totals before a step are the totals after the previous one.
+        assert totals == (steps[index - 1]["totals"] if index else dict.fromkeys(totals, 0.0))
+        assert list(totals) == list(steps[index - 1]["totals"] if index else totals)
@@ -0,0 +1,62 @@
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "src"))
+
+from src.cli import testrig
+
+
+def _contents(directory: Path):
+    files = {}
+    for path in sorted(directory.glob("*.json")):
+        data = json.loads(path.read_text())
+        if isinstance(data, dict):
+            data.pop("timestamp", None)
+        else:
+            for entry in data:
+                entry.pop("timestamp", None)
+        files[path.name] = data
+    return files
+
+
+def test_parallel_suite_matches_serial(tmp_path):
+    serial = tmp_path / "serial"
+    parallel = tmp_path / "parallel"
+    common = ["suite", "--policy", "hubris", "--seed", "5", "--runs", "9", "--max-steps", "10"]
+
+    testrig.main(common + ["--output", str(serial)])
+    testrig.main(common + ["--output", str(parallel), "--workers", "3"])
+
+    assert _contents(serial) == _contents(parallel)
+    assert len(list(parallel.glob("run_*.json"))) == 9
+
+
+def test_run_timestamps_shared(tmp_path):
+    testrig.main(["run", "--policy", "random", "--runs", "4", "--output", str(tmp_path)])
+    index = json.loads((tmp_path / "index.json").read_text())
+    assert len({entry["timestamp"] for entry in index}) == 1
+
+
+def test_parallel_batch_files_match_serial_bytes(tmp_path, monkeypatch):
+    class _FixedClock:
+        @staticmethod
+        def utcnow():
+            return datetime(2024, 1, 1)
+
+    monkeypatch.setattr(testrig, "datetime", _FixedClock)
+    serial = tmp_path / "serial"
+    parallel = tmp_path / "parallel"
+    common = ["suite", "--all", "--seed", "5", "--runs", "9", "--max-steps", "10", "--format", "batch"]
+
+    testrig.main(common + ["--output", str(serial)])
+    testrig.main(common + ["--output", str(parallel), "--workers", "3"])
+
+    def files(directory):
+        return {p.name: p.read_bytes() for p in sorted(directory.iterdir()) if p.name != "index.manifest"}
+
+    assert files(serial) == files(parallel)
+    assert any(name.endswith(".jrb") for name in files(serial))
@@ -0,0 +1,88 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from testing import assertions, metrics
+from testing.policies import POLICIES
+from testing.runner import run
+from testing.trace import Trace
+
+
+def test_trace_behaves_like_step_list():
+    result = run(POLICIES["hubris"](), 7, max_steps=12)
+    trace = result["trace"]
+    assert isinstance(trace, Trace)
+
+    steps = trace.as_dicts()
+    assert len(trace) == len(steps) == trace.steps + 1 == 13
+    assert trace[-1] is result["final"]
+    assert trace[0] == steps[0]
+    assert trace[2:4] == steps[2:4]
+    assert [s["step"] for s in steps[:-1]] == list(range(1, 13))
+    json.dumps(steps)
+
+    first = steps[0]
+    assert set(first) >= {"scene_id", "choice_id", "delta", "totals", "flags", "end"}
+    assert first["totals"][first["primary"]] == first["pw"] + (
+        first["sw"] if first["secondary"] == first["primary"] else 0.0
+    )
+
+
+def test_trace_consumers_accept_columnar_trace():
+    trace = run(POLICIES["random"](), 3)["trace"]
+    as_list = trace.as_dicts()
+    assert assertions.check_scene_caps(trace) == assertions.check_scene_caps(as_list)
+    assert assertions.check_trait_caps(trace) == assertions.check_trait_caps(as_list)
+    assert metrics.path_coverage([trace]) == metrics.path_coverage([as_list])
+    assert metrics.trait_distribution([trace]) == metrics.trait_distribution([as_list])
+
+
+def test_record_levels():
+    policy_cls = POLICIES["balanced_human"]
+    full = run(policy_cls(), 11)
+    deltas = run(policy_cls(), 11, record="deltas")
+    final = run(policy_cls(), 11, record="final")
+
+    assert deltas["trace"].as_dicts() == full["trace"].as_dicts()
+    assert final["final"] == full["final"]
+    assert final["trace"].as_dicts() == [full["final"]]
+    assert metrics.trait_distribution([final["trace"]]) == metrics.trait_distribution(
+        [full["trace"]]
+    )
+
+    with pytest.raises(ValueError):
+        metrics.path_coverage([final["trace"]])
+    with pytest.raises(ValueError):
+        run(policy_cls(), 11, record="everything")
+
+
+def test_indexing_deltas_trace_replays_once(monkeypatch):
+    full = run(POLICIES["random"](), 4, max_steps=30)["trace"]
+    deltas = run(POLICIES["random"](), 4, max_steps=30, record="deltas")["trace"]
+
+    calls = []
+    applied = Trace.applied
+    monkeypatch.setattr(Trace, "applied", lambda self, step: calls.append(step) or applied(self, step))
+    assert [deltas[i] for i in range(len(deltas))] == full.as_dicts()
+    assert len(calls) == deltas.steps
+    assert deltas.as_dicts() == full.as_dicts() and len(calls) == deltas.steps
+    with pytest.raises(IndexError):
+        deltas.totals_row(deltas.steps)
+
+
+def test_iter_run_streams_steps():
+    from itertools import islice
+
+    from testing.runner import iter_run
+
+    policy_cls = POLICIES["control_fear"]
+    expected = run(policy_cls(), 5, max_steps=15)["trace"].as_dicts()
+    assert list(iter_run(policy_cls(), 5, max_steps=15)) == expected
+    assert list(islice(iter_run(policy_cls(), 5), 3)) == expected[:3]
+    assert assertions.check_major_spacing(iter_run(policy_cls(), 5, 15)) == (
+        assertions.check_major_spacing(expected)
+    )
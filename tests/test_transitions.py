@@ -0,0 +1,74 @@
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
+
+from analytics.canonical import canonicalize
+from analytics.ingest_runs import ingest_runs
+from analytics.transitions import TransitionMatrix, from_csv, from_runs, main
+from cli.run_writer import write_batch
+
+
+@pytest.fixture()
+def results(tmp_path):
+    out = tmp_path / "results"
+    write_batch("random", range(8), 15, output_dir=out)
+    write_batch("hubris", range(4), 15, output_dir=out)
+    return out
+
+
+def test_artifacts_and_csv_give_the_same_matrices(results, tmp_path):
+    built = from_runs(results)
+    csv_path = tmp_path / "runs.csv"
+    ingest_runs(results, csv_path)
+    assert from_csv(csv_path) == built
+
+    expected = Counter()
+    traits = Counter()
+    for file in results.glob("run_*.json"):
+        data = json.loads(file.read_text())
+        decisions = data["decisions"]
+        for a, b in zip(decisions, decisions[1:]):
+            expected[(data["policy"], f"{a['sceneId']}:{a['choiceId']}", f"{b['sceneId']}:{b['choiceId']}")] += 1
+            traits[(data["policy"], canonicalize(a["primary"]), canonicalize(b["primary"]))] += 1
+    assert {(p, s, d): n for p, s, d, n in built["choice"].items()} == expected
+    assert {(p, s, d): n for p, s, d, n in built["trait"].items()} == traits
+
+    trait = built["trait"]
+    source = trait.most_common(1)[0][0]
+    assert sum(trait.probabilities(source).values()) == pytest.approx(1.0)
+    assert sum(trait.row(source, "hubris").values()) + sum(trait.row(source, "random").values()) == sum(
+        trait.row(source).values()
+    )
+
+
+def test_binary_round_trip_and_merge(results, tmp_path):
+    built = from_runs(results)
+    for kind, matrix in built.items():
+        path = tmp_path / f"{kind}.bin"
+        matrix.save(path)
+        assert TransitionMatrix.load(path) == matrix
+
+    a, b = TransitionMatrix("trait"), TransitionMatrix("trait")
+    a.add_sequence("p", ["X", "Y", "X"])
+    b.add_sequence("p", ["Y", "X"])
+    b.add("q", "X", "X", 3)
+    a.merge(b)
+    assert a.count("Y", "X") == 2 and a.count("X", "X", "q") == 3 and a.count("X", "Z") == 0
+    with pytest.raises(ValueError):
+        a.merge(TransitionMatrix("choice"))
+    with pytest.raises(ValueError):
+        TransitionMatrix.from_bytes(a.to_bytes()[:-4])
+
+
+def test_cli_writes_requested_matrices(results, tmp_path, capsys):
+    traits = tmp_path / "traits.bin"
+    main(["--runs-dir", str(results), "--traits", str(traits), "--top", "3"])
+    assert TransitionMatrix.load(traits) == from_runs(results)["trait"]
+    out = capsys.readouterr().out.splitlines()
+    assert len([line for line in out if line.startswith("trait:")]) == 3
+    assert not (tmp_path / "choices.bin").exists()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Benchmark the per-step cost of policy state snapshots.
+
+Runs the same policy over the same seeds twice: once receiving the
+runner's reusable :class:`~testing.snapshot.StateView` and once through a
+wrapper that rebuilds the previous per-step snapshot dictionary, totals
+copy included.  Reports wall time and the bytes allocated for snapshots per
+step, measured with :mod:`tracemalloc`.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+
+from testing.policies import POLICIES  # noqa: E402
+from testing.runner import load_bundle, run_batch  # noqa: E402
+
+
+class Probe:
+    """Policy wrapper measuring what building its input allocates.
+
+    With ``copy=True`` the wrapped policy receives a fresh dictionary like
+    the runner used to build; otherwise it receives the view as is.
+    """
+
+    allocated = 0
+    steps = 0
+
+    def __init__(self, policy, copy: bool) -> None:
+        self.policy = policy
+        self.copy = copy
+
+    def __call__(self, state, rng):
+        before = tracemalloc.get_traced_memory()[0]
+        if self.copy:
+            state = {
+                "act": state["act"],
+                "scene_id": state["scene_id"],
+                "options": state["options"],
+                "totals": dict(state["totals"]),
+                "step": state["step"],
+                "act_step": state["act_step"],
+            }
+        Probe.allocated += tracemalloc.get_traced_memory()[0] - before
+        Probe.steps += 1
+        return self.policy(state, rng)
+
+
+def measure(policy_cls, copy: bool, seeds, max_steps):
+    """Return (seconds untraced, snapshot bytes per step)."""
+
+    start = time.perf_counter()
+    for _ in run_batch(lambda: Probe(policy_cls(), copy), seeds, max_steps, record="final"):
+        pass
+    elapsed = time.perf_counter() - start
+
+    Probe.allocated = Probe.steps = 0
+    tracemalloc.start()
+    for _ in run_batch(lambda: Probe(policy_cls(), copy), seeds[:50], max_steps, record="final"):
+        pass
+    tracemalloc.stop()
+    return elapsed, Probe.allocated / max(Probe.steps, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--policy", choices=POLICIES.keys(), default="random")
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--max-steps", type=int, default=100)
+    args = parser.parse_args()
+
+    load_bundle()
+    policy_cls = POLICIES[args.policy]
+    seeds = range(args.runs)
+    for label, copy in (("dict snapshot", True), ("StateView", False)):
+        elapsed, per_step = measure(policy_cls, copy, seeds, args.max_steps)
+        print(f"{label:>14}: {elapsed:.3f}s for {args.runs} runs, {per_step:.0f} B/step")
+
+
+if __name__ == "__main__":
+    main()